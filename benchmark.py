@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+MarketPulse 性能基准测试
+使用 MockProvider 和本地 SMTP 桩服务离线运行，结果保存为 JSON 便于不同版本之间对比
+
+使用方法:
+    python benchmark.py                           # 完整运行（批量规模 10 / 1000 / 10000）
+    python benchmark.py --quick                   # 快速运行（批量规模 10 / 1000）
+    python benchmark.py -o results/v1.1.json      # 指定结果文件
+    python benchmark.py --only import_time        # 只运行指定的测试
+    python benchmark.py --only indicators         # 指标内核与 pandas 的一致性和吞吐量
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import socketserver
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src import kernels
+from src.analyzer import StockAnalyzer
+from src.app import MarketPulse
+from src.indicators import PanelContext
+from src.notifier import EmailNotifier
+from src.providers import MockProvider
+from src.strategies import MovingAverageStrategy, StrategyFactory, align_closes
+
+STRATEGIES = [
+    {
+        "name": "均线策略",
+        "type": "moving_average",
+        "enabled": True,
+        "params": {"periods": [5, 10, 20]},
+    }
+]
+
+
+def stock_codes(count: int, start: int = 0) -> List[str]:
+    """生成 count 个模拟股票代码"""
+    return [f"{i:06d}" for i in range(start, start + count)]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """耗时样本（秒）的统计，单位毫秒"""
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.50) * 1000,
+        "p95_ms": percentile(0.95) * 1000,
+        "p99_ms": percentile(0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def timed(func: Callable, repeat: int) -> List[float]:
+    """执行 repeat 次，返回每次的耗时（秒）"""
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_analyze_latency(repeat: int) -> Dict:
+    """单只股票 analyze 的延迟（每次使用不同的股票，避免命中指标缓存）"""
+    analyzer = StockAnalyzer(MockProvider(), STRATEGIES)
+    codes = stock_codes(repeat)
+    analyzer.analyze(codes[0])  # 预热
+    return summarize(timed(lambda i: analyzer.analyze(codes[i]), repeat))
+
+
+def bench_analyze_batch(sizes: List[int], max_workers: int) -> Dict:
+    """analyze_batch 在不同股票数量下的吞吐量"""
+    results = {}
+    for size in sizes:
+        for mode, options in (
+            ("threads", {"max_workers": max_workers}),
+            ("store", {"max_workers": max_workers, "use_store": True}),
+        ):
+            analyzer = StockAnalyzer(MockProvider(), STRATEGIES, **options)
+            codes = stock_codes(size)
+
+            start = time.perf_counter()
+            triggered = len(analyzer.analyze_batch(codes))
+            elapsed = time.perf_counter() - start
+
+            results[f"{mode}_{size}"] = {
+                "symbols": size,
+                "mode": mode,
+                "seconds": elapsed,
+                "symbols_per_second": size / elapsed,
+                "triggered": triggered,
+            }
+    return results
+
+
+def bench_strategy_cpu(symbols: int) -> Dict:
+    """策略本身的 CPU 时间，按 K 线数折算（数据预先获取，不计入）"""
+    provider = MockProvider()
+    frames = {}
+    for code in stock_codes(symbols):
+        frames[code] = provider.fetch(code)
+        frames[code].attrs["code"] = code
+    bars = sum(len(frame) for frame in frames.values())
+    # MockProvider 的日期带有生成时刻，按日期对齐会互相错开，这里按最新一根对齐
+    panel = align_closes([frame["close"] for frame in frames.values()])
+
+    results = {}
+    for name, last_bar_only in (("analyze_last_bar", True), ("analyze_rolling", False)):
+        strategy = MovingAverageStrategy({"params": {"periods": [5, 10, 20], "last_bar_only": last_bar_only}})
+        start = time.process_time()
+        for frame in frames.values():
+            strategy.analyze(frame)
+        cpu = time.process_time() - start
+        results[name] = {"cpu_seconds": cpu, "us_per_symbol": cpu / symbols * 1e6, "ns_per_bar": cpu / bars * 1e9}
+
+    strategy = MovingAverageStrategy({"params": {"periods": [5, 10, 20]}})
+    start = time.process_time()
+    strategy.signal_matrix(panel)
+    cpu = time.process_time() - start
+    results["signal_matrix"] = {"cpu_seconds": cpu, "ns_per_bar": cpu / panel.size * 1e9}
+
+    return results
+
+
+# 指标内核与 pandas 参考实现的最大允许误差
+INDICATOR_TOLERANCE = 1e-9
+
+
+def synthetic_ohlcv(rows: int, symbols: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """随机游走的 (日期 × 股票) OHLCV 矩阵，部分股票开头为 NaN（上市晚）"""
+    rng = np.random.default_rng(seed)
+    close = 20 + np.cumsum(rng.standard_normal((rows, symbols)) * 0.5, axis=0)
+    high = close + np.abs(rng.standard_normal((rows, symbols))) * 0.3
+    low = close - np.abs(rng.standard_normal((rows, symbols))) * 0.3
+    volume = rng.lognormal(13, 0.5, (rows, symbols))
+
+    listed = rng.integers(0, rows // 2, symbols)
+    listed[: symbols // 2] = 0
+    missing = np.arange(rows)[:, np.newaxis] < listed[np.newaxis, :]
+    fields = {"close": close, "high": high, "low": low, "volume": volume}
+    for values in fields.values():
+        values[missing] = np.nan
+    return fields
+
+
+def pandas_indicators(fields: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """用 pandas 常见写法计算的参考指标"""
+    close = pd.DataFrame(fields["close"])
+    high, low, volume = (pd.DataFrame(fields[name]) for name in ("high", "low", "volume"))
+
+    change = close.diff()
+    gain = change.clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    loss = (-change).clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False, min_periods=26).mean()
+    middle = close.rolling(20).mean()
+    width = 2 * close.rolling(20).std(ddof=0)
+    previous = close.shift()
+    true_range = np.fmax(high - low, np.fmax((high - previous).abs(), (low - previous).abs()))
+
+    reference = {
+        "ema": close.ewm(span=12, adjust=False).mean(),
+        "rsi": 100 - 100 / (1 + gain / loss),
+        "macd": macd,
+        "macd_signal": macd.ewm(span=9, adjust=False, min_periods=9).mean(),
+        "bollinger_upper": middle + width,
+        "bollinger_lower": middle - width,
+        "atr": true_range.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean(),
+        "volume_ratio": volume / volume.rolling(20).mean().shift(),
+    }
+    return {name: frame.to_numpy() for name, frame in reference.items()}
+
+
+def kernel_indicators(fields: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """用 src.kernels 计算与 pandas_indicators 对应的指标，fields 可以是一维或二维"""
+    close = fields["close"]
+    macd, signal, _ = kernels.macd(close)
+    upper, _, lower = kernels.bollinger(close)
+    return {
+        "ema": kernels.ema(close, 12),
+        "rsi": kernels.rsi(close, 14),
+        "macd": macd,
+        "macd_signal": signal,
+        "bollinger_upper": upper,
+        "bollinger_lower": lower,
+        "atr": kernels.atr(fields["high"], fields["low"], close, 14),
+        "volume_ratio": kernels.volume_ratio(fields["volume"], 20),
+    }
+
+
+def bench_indicators(rows: int, symbols: int) -> Dict:
+    """
+    指标内核与 pandas 的一致性和吞吐量
+
+    一致性：矩阵计算与 pandas 的最大绝对误差、NaN 位置是否一致，逐列（单只股票）
+    计算与矩阵计算的最大绝对误差；指标策略逐只 analyze 与 signal_matrix 最后一行的信号是否相同。
+    """
+    fields = synthetic_ohlcv(rows, symbols)
+
+    start = time.perf_counter()
+    reference = pandas_indicators(fields)
+    pandas_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = kernel_indicators(fields)
+    matrix_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = [kernel_indicators({name: values[:, j] for name, values in fields.items()}) for j in range(symbols)]
+    per_symbol_seconds = time.perf_counter() - start
+
+    equivalence = {}
+    for name, expected in reference.items():
+        actual = matrix[name]
+        both = ~np.isnan(expected) & ~np.isnan(actual)
+        per_symbol = np.column_stack([column[name] for column in columns])
+        equivalence[name] = {
+            "max_abs_error": float(np.max(np.abs(actual[both] - expected[both]), initial=0.0)),
+            "nan_mismatch": int((np.isnan(expected) != np.isnan(actual)).sum()),
+            "per_symbol_max_abs_error": float(np.nanmax(np.abs(per_symbol - actual), initial=0.0)),
+        }
+
+    bars = rows * symbols
+    results = {
+        "rows": rows,
+        "symbols": symbols,
+        "equivalent": all(
+            max(item["max_abs_error"], item["per_symbol_max_abs_error"]) <= INDICATOR_TOLERANCE
+            and not item["nan_mismatch"]
+            for item in equivalence.values()
+        ),
+        "equivalence": equivalence,
+        "throughput": {
+            name: {"seconds": seconds, "ns_per_bar": seconds / bars * 1e9}
+            for name, seconds in (
+                ("pandas", pandas_seconds),
+                ("kernels_matrix", matrix_seconds),
+                ("kernels_per_symbol", per_symbol_seconds),
+            )
+        },
+        "strategies": bench_indicator_strategies(fields),
+    }
+    return results
+
+
+def bench_indicator_strategies(fields: Dict[str, np.ndarray]) -> Dict:
+    """各指标策略逐只 analyze 与 signal_matrix 的耗时，以及最新一根 K 线的信号是否一致"""
+    rows, symbols = fields["close"].shape
+    dates = pd.date_range(end="2024-12-31", periods=rows, freq="B")
+    frames = []
+    for j in range(symbols):
+        valid = ~np.isnan(fields["close"][:, j])
+        frame = pd.DataFrame({"date": dates[valid], **{name: values[valid, j] for name, values in fields.items()}})
+        frame.attrs["code"] = f"{j:06d}"
+        frames.append(frame)
+
+    results = {}
+    for name in ("rsi", "macd", "bollinger", "atr", "volume_breakout"):
+        strategy = StrategyFactory.create(name, {})
+
+        start = time.perf_counter()
+        counts = [len(strategy.analyze(frame) or []) for frame in frames]
+        analyze_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        signals = strategy.signal_matrix(fields["close"], PanelContext(fields["close"], fields))
+        matrix_seconds = time.perf_counter() - start
+
+        latest = sum(mask[-1].astype(int) for mask in signals.values())
+        results[name] = {
+            "analyze_us_per_symbol": analyze_seconds / symbols * 1e6,
+            "signal_matrix_us_per_symbol": matrix_seconds / symbols * 1e6,
+            "latest_signals": int(sum(counts)),
+            "consistent": bool(np.array_equal(latest, counts)),
+        }
+    return results
+
+
+def bench_peak_memory(symbols: int) -> Dict:
+    """analyze_batch 过程中 Python 分配的峰值内存"""
+    results = {}
+    for mode, options in (("threads", {}), ("store", {"use_store": True})):
+        analyzer = StockAnalyzer(MockProvider(), STRATEGIES, **options)
+        codes = stock_codes(symbols)
+        gc.collect()
+
+        tracemalloc.start()
+        analyzer.analyze_batch(codes)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[mode] = {"symbols": symbols, "peak_mib": peak / 2**20}
+
+    try:
+        import resource
+
+        # Linux 上单位为 KiB，macOS 上为字节
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results["max_rss_mib"] = max_rss / (2**20 if sys.platform == "darwin" else 2**10)
+    except ImportError:
+        pass
+
+    return results
+
+
+class _StubSMTPHandler(socketserver.StreamRequestHandler):
+    """最简 SMTP 桩：接受任意认证，丢弃邮件内容"""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        self.reply("220 benchmark stub")
+        for line in self.rfile:
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250-benchmark stub")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command.startswith("AUTH"):
+                self.reply("235 ok")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                for data_line in self.rfile:
+                    if data_line == b".\r\n":
+                        break
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class _StubSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def bench_notification(repeat: int) -> Dict:
+    """通知正文格式化和通过本地 SMTP 桩发送的耗时"""
+    analyzer = StockAnalyzer(MockProvider(), STRATEGIES)
+    results = analyzer.analyze_batch(stock_codes(200))
+    sample = results[0]
+
+    format_samples = timed(
+        lambda i: MarketPulse._format_result(results[i % len(results)]) + MarketPulse._format_footer(),
+        repeat,
+    )
+
+    server = _StubSMTPServer(("127.0.0.1", 0), _StubSMTPHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["MARKETPULSE_BENCHMARK_AUTH"] = "benchmark"
+    notifier = EmailNotifier(
+        {
+            "sender": "benchmark@localhost",
+            "receiver": "benchmark@localhost",
+            "smtp_server": "127.0.0.1",
+            "smtp_port": server.server_address[1],
+            "use_ssl": False,
+            "auth_code_env": "MARKETPULSE_BENCHMARK_AUTH",
+        }
+    )
+    body = MarketPulse._format_result(sample) + MarketPulse._format_footer()
+
+    try:
+        notifier.send("benchmark", body)  # 预热：建立连接并登录
+        send_samples = timed(lambda i: notifier.send(f"benchmark {i}", body), repeat)
+    finally:
+        notifier.close()
+        server.shutdown()
+        server.server_close()
+
+    return {"format": summarize(format_samples), "smtp_send": summarize(send_samples)}
+
+
+# 冷启动时应当保持轻量的模块，以及它们不应导入的重型依赖
+IMPORT_TARGETS = ("src.config", "src.notifier", "src.app", "src.analyzer")
+HEAVY_MODULES = ("pandas", "numpy", "akshare")
+
+
+def bench_import_time(repeat: int = 5) -> Dict:
+    """
+    冷启动耗时：在新解释器中导入各模块、执行轻量命令
+
+    imports 中的时间只含 import 本身，cli 中的时间含解释器启动；
+    heavy_modules 列出导入后已加载的重型依赖。
+    """
+    probe = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import {module}\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+
+    imports = {}
+    for module in IMPORT_TARGETS:
+        samples, heavy = [], ""
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, "-c", probe.format(module=module)],
+                capture_output=True, text=True, check=True,
+            ).stdout.splitlines()
+            samples.append(float(output[0]))
+            heavy = output[1] if len(output) > 1 else ""
+        imports[module] = {**summarize(samples), "heavy_modules": [m for m in heavy.split(",") if m]}
+
+    cli = {}
+    for name, command in (
+        ("python", ["-c", "pass"]),
+        ("main.py --list", ["main.py", "--list"]),
+        ("main.py --dry-run", ["main.py", "--dry-run"]),
+    ):
+        cli[name] = summarize(
+            timed(lambda i: subprocess.run([sys.executable, *command], capture_output=True), repeat)
+        )
+
+    return {"imports": imports, "cli": cli}
+
+
+def environment() -> Dict:
+    """运行环境信息，用于对比不同机器/版本的结果"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MarketPulse 性能基准测试")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="结果文件路径")
+    parser.add_argument("--quick", action="store_true", help="跳过 10000 只股票的批量测试")
+    parser.add_argument("--repeat", type=int, default=200, help="延迟测试的重复次数")
+    parser.add_argument("--workers", type=int, default=8, help="批量分析的线程数")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="只运行指定的测试")
+    args = parser.parse_args()
+
+    # 基准测试只关心耗时，关闭逐只股票的日志
+    logging.disable(logging.WARNING)
+
+    sizes = [10, 1000] if args.quick else [10, 1000, 10000]
+    benchmarks = [
+        ("import_time", lambda: bench_import_time()),
+        ("analyze_latency", lambda: bench_analyze_latency(args.repeat)),
+        ("analyze_batch", lambda: bench_analyze_batch(sizes, args.workers)),
+        ("strategy_cpu", lambda: bench_strategy_cpu(1000)),
+        ("indicators", lambda: bench_indicators(250, 1000)),
+        ("peak_memory", lambda: bench_peak_memory(1000)),
+        ("notification", lambda: bench_notification(args.repeat)),
+    ]
+
+    if args.only:
+        benchmarks = [(name, bench) for name, bench in benchmarks if name in args.only]
+
+    print("=" * 60)
+    print("MarketPulse 性能基准测试")
+    print("=" * 60)
+
+    report = {"environment": environment(), "results": {}}
+    for name, bench in benchmarks:
+        start = time.perf_counter()
+        report["results"][name] = bench()
+        print(f"\n✓ {name} ({time.perf_counter() - start:.1f}s)")
+        print(json.dumps(report["results"][name], ensure_ascii=False, indent=2))
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
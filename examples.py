@@ -9,7 +9,7 @@ MarketPulse 使用示例
 from src.config import ConfigManager
 from src.providers import AkshareProvider, MockProvider, FallbackProvider
 from src.analyzer import StockAnalyzer
-from src.strategies import StrategyFactory, Strategy
+from src.strategies import StrategyFactory, Strategy, signal_messages
 from src.notifier import Notifier
 import pandas as pd
 
@@ -57,8 +57,8 @@ def example_3_custom_strategy():
         def __init__(self, config=None):
             super().__init__("rsi", config)
 
-        def analyze(self, data: pd.DataFrame):
-            """简化的 RSI 分析示例"""
+        def detect(self, data: pd.DataFrame):
+            """简化的 RSI 分析示例，返回 (信号标识, 消息)"""
             if len(data) < 14:
                 return None
 
@@ -72,16 +72,20 @@ def example_3_custom_strategy():
 
             latest_rsi = rsi.iloc[-1]
 
+            # 消息中带有 RSI 数值，信号去重用固定的标识
             signals = []
             if latest_rsi < 30:
-                signals.append(f"RSI 低于 30 ({latest_rsi:.2f}) - 超卖信号")
+                signals.append(("oversold", f"RSI 低于 30 ({latest_rsi:.2f}) - 超卖信号"))
             elif latest_rsi > 70:
-                signals.append(f"RSI 高于 70 ({latest_rsi:.2f}) - 超买信号")
+                signals.append(("overbought", f"RSI 高于 70 ({latest_rsi:.2f}) - 超买信号"))
 
             return signals if signals else None
 
-    # 注册策略
-    StrategyFactory.register("rsi", RSIStrategy)
+        def analyze(self, data: pd.DataFrame):
+            return signal_messages(self.detect(data))
+
+    # 注册策略（内置的 "rsi" 策略见 src/indicator_strategies.py，这里用另一个名称）
+    StrategyFactory.register("simple_rsi", RSIStrategy)
 
     print("RSI 策略已注册")
     print(f"可用策略: {StrategyFactory._strategies.keys()}")
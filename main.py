@@ -6,10 +6,64 @@ MarketPulse - 股票策略监控系统
 功能：监控自选股票，当触发策略时发送邮件通知
 
 使用方法:
-    python main.py
+    python main.py              # 运行一次
+    python main.py --daemon     # 常驻运行，按 config.json 的 schedule 定时执行
+    python main.py --profile    # 剖析运行一次（不发送通知），写出 pstats 文件
+    python main.py --check-config / --list / --dry-run / --test-notify
 """
 
-from src.app import main
+import argparse
+import sys
+
+from src.app import main, run_command
 
 if __name__ == "__main__":
-    main(config_file="config.json")
+    parser = argparse.ArgumentParser(description="MarketPulse - 股票策略监控系统")
+    parser.add_argument("-c", "--config", default="config.json", help="配置文件路径")
+    parser.add_argument("--daemon", action="store_true", help="常驻运行，按 schedule 配置定时执行")
+
+    # 轻量命令：不导入 pandas / numpy / akshare，启动很快
+    commands = parser.add_mutually_exclusive_group()
+    commands.add_argument(
+        "--check-config", dest="command", action="store_const", const="check-config", help="检查配置"
+    )
+    commands.add_argument(
+        "--list", dest="command", action="store_const", const="list", help="列出监控股票"
+    )
+    commands.add_argument(
+        "--dry-run", dest="command", action="store_const", const="dry-run", help="试运行：显示运行计划，不获取数据"
+    )
+    commands.add_argument(
+        "--test-notify", dest="command", action="store_const", const="test-notify", help="发送一封测试通知"
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="OUTPUT",
+        help="剖析运行一次并写出剖析文件（默认 .cache/profile-<时间>.pstats）",
+    )
+    parser.add_argument(
+        "--profile-mode",
+        choices=["cprofile", "sample"],
+        default="cprofile",
+        help="cprofile: 确定性剖析（单线程运行）；sample: 采样剖析，输出折叠栈",
+    )
+    parser.add_argument("--profile-symbols", type=int, metavar="N", help="只剖析前 N 只股票")
+    parser.add_argument("--profile-notify", action="store_true", help="剖析时照常发送通知")
+    args = parser.parse_args()
+
+    if args.command:
+        sys.exit(run_command(args.config, args.command))
+
+    profile = None
+    if args.profile is not None:
+        profile = {
+            "output": args.profile or None,
+            "mode": args.profile_mode,
+            "symbols": args.profile_symbols,
+            "notify": args.profile_notify,
+        }
+
+    main(config_file=args.config, daemon=args.daemon, profile=profile)
@@ -3,31 +3,137 @@
 
 """股票分析器模块"""
 
+import asyncio
 import logging
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 
-from .providers import DataProvider, FallbackProvider, AkshareProvider, MockProvider
-from .strategies import StrategyFactory
+from .providers import (
+    DataProvider,
+    FallbackProvider,
+    AkshareProvider,
+    MockProvider,
+    CachedProvider,
+    PRICE_COLUMNS,
+)
+from . import indicator_strategies  # noqa: F401  注册 RSI / MACD 等指标策略
+from . import metrics
+from .expressions import share_plan
+from .indicators import IndicatorCache
+from .store import PriceStore
+from .strategies import Signal, Strategy, StrategyFactory
 
 logger = logging.getLogger(__name__)
 
 
+def _run_strategies(strategies: List[Strategy], data: pd.DataFrame) -> Dict[str, List[Signal]]:
+    """
+    依次执行所有策略（策略共享同一份 data，不再逐个复制）
+
+    Returns:
+        策略名称 -> 触发的 (信号标识, 消息) 列表，只包含有信号的策略
+    """
+    strategy_signals: Dict[str, List[Signal]] = {}
+    for strategy in strategies:
+        with metrics.timer("strategy", strategy.label):
+            signals = strategy.detect(data)
+        if signals:
+            strategy_signals.setdefault(strategy.label, []).extend(signals)
+    return strategy_signals
+
+
+# 进程池工作进程的状态，由 _init_worker 在每个进程中初始化一次
+_worker_state: Dict = {}
+
+
+def _init_worker(strategies: List[Strategy], panel_path: str, shape: Tuple[int, int], fields: List[str]):
+    """工作进程初始化：保存策略并以只读方式映射行情数组"""
+    _worker_state["strategies"] = strategies
+    _worker_state["panel"] = np.memmap(panel_path, dtype=np.float64, mode="r", shape=shape)
+    _worker_state["fields"] = {field: i for i, field in enumerate(fields)}
+
+
+def _evaluate_chunk(
+    chunk: List[Tuple[str, int, int, Tuple[str, ...]]]
+) -> List[Optional[Dict[str, List[Signal]]]]:
+    """
+    在工作进程中评估一批股票
+
+    Args:
+        chunk: (股票代码, 起始偏移, 结束偏移, 包含的列) 列表
+
+    Returns:
+        与 chunk 顺序一致的信号列表，评估出错的股票为 None
+    """
+    panel = _worker_state["panel"]
+    fields = _worker_state["fields"]
+    strategies = _worker_state["strategies"]
+
+    results = []
+    for stock_code, start, stop, columns in chunk:
+        try:
+            data = pd.DataFrame({column: panel[fields[column], start:stop] for column in columns})
+            data.attrs["code"] = stock_code
+            results.append(_run_strategies(strategies, data))
+        except Exception as e:
+            logger.error(f"评估股票 {stock_code} 时出错: {e}", exc_info=True)
+            results.append(None)
+    return results
+
+
 class StockAnalyzer:
     """股票分析器"""
 
-    def __init__(self, data_provider: DataProvider, strategies: List[Dict] = None):
+    def __init__(
+        self,
+        data_provider: DataProvider,
+        strategies: List[Dict] = None,
+        max_workers: int = 1,
+        process_workers: int = 0,
+        chunk_size: Optional[int] = None,
+        indicator_cache_size: int = 4096,
+        max_concurrency: int = 64,
+        use_store: bool = False,
+        store_dtype: str = "float64",
+        history_path: Optional[str] = None,
+        history_ttl_minutes: float = 60,
+    ):
         """
         初始化分析器
 
         Args:
             data_provider: 数据提供者
             strategies: 策略配置列表
+            max_workers: 批量分析时的并发线程数，1 表示顺序执行
+            process_workers: 策略评估使用的进程数，0 表示在当前进程内评估
+            chunk_size: 每次发送给工作进程的股票数，默认按进程数自动划分
+            indicator_cache_size: 共享指标缓存的最大条目数
+            max_concurrency: 异步批量分析时同时进行的获取数
+            use_store: 批量分析时先把行情装入紧凑的 PriceStore 再评估，降低全市场运行的内存占用
+            store_dtype: PriceStore 数值字段的类型（float64 或 float32）
+            history_path: PriceStore 的本地保存目录，设置后新进程直接内存映射打开
+            history_ttl_minutes: 本地保存的行情在多少分钟内视为有效
         """
         self.data_provider = data_provider
+        self.max_workers = max(1, int(max_workers))
+        self.process_workers = max(0, int(process_workers))
+        self.chunk_size = chunk_size
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.use_store = use_store
+        self.store_dtype = np.dtype(store_dtype)
+        self.history_path = history_path
+        self.history_ttl_minutes = history_ttl_minutes
         self.strategies = []
+        # 最近一次批量分析中完成评估的股票（获取失败、评估出错的不在其中），
+        # 信号去重只对这些股票判断信号是否已解除
+        self.analyzed_codes: Set[str] = set()
 
         # 初始化策略
         if strategies:
@@ -39,6 +145,14 @@ class StockAnalyzer:
                     if strategy:
                         self.strategies.append(strategy)
 
+        # 所有策略共享同一个指标缓存
+        self.indicator_cache = IndicatorCache(indicator_cache_size)
+        for strategy in self.strategies:
+            strategy.indicator_cache = self.indicator_cache
+
+        # 表达式策略共享一个求值计划，相同的子表达式每只股票只计算一次
+        share_plan(self.strategies)
+
     def analyze(self, stock_code: str) -> Optional[Dict]:
         """
         分析单只股票
@@ -52,36 +166,17 @@ class StockAnalyzer:
         try:
             logger.info(f"分析股票 {stock_code}")
 
-            # 获取数据
-            data = self.data_provider.fetch(stock_code)
+            with metrics.timer("analyze", symbol=stock_code):
+                # 获取数据
+                data = self._fetch(stock_code)
+                if data is None:
+                    return None
 
-            if data is None or len(data) == 0:
-                logger.warning(f"无法获取 {stock_code} 的数据")
-                return None
-
-            # 执行所有策略
-            all_signals = []
-            for strategy in self.strategies:
-                signals = strategy.analyze(data.copy())
-                if signals:
-                    all_signals.extend(signals)
-
-            if not all_signals:
-                logger.info(f"股票 {stock_code} 无触发信号")
-                return None
-
-            # 构造结果
-            latest = data.iloc[-1]
-            latest_date = latest.get("date", datetime.now())
-            latest_price = latest.get("close", 0)
-
-            return {
-                "code": stock_code,
-                "date": str(latest_date),
-                "price": float(latest_price),
-                "signals": all_signals,
-                "timestamp": datetime.now().isoformat(),
-            }
+                # 执行所有策略
+                strategy_signals = _run_strategies(self.strategies, data)
+                result = self._build_result(stock_code, data, strategy_signals)
+                self.analyzed_codes.add(stock_code)
+                return result
 
         except Exception as e:
             logger.error(f"分析股票 {stock_code} 时出错: {e}", exc_info=True)
@@ -97,15 +192,366 @@ class StockAnalyzer:
         Returns:
             分析结果列表
         """
+        self.analyzed_codes = set()
+        self._prefetch(stock_codes)
+
+        if self.use_store:
+            # 本地保存的存储可能包含更多股票，只分析本次请求的股票
+            return self.analyze_store(self.load_store(stock_codes), stock_codes)
+
+        if self.process_workers > 0 and len(stock_codes) > 1:
+            return self._analyze_batch_processes(stock_codes)
+
+        results = self._map(self.analyze, stock_codes)
+        return [result for result in results if result]
+
+    def load_store(self, stock_codes: List[str]) -> PriceStore:
+        """
+        获取行情并装入 PriceStore
+
+        配置了 history_path 时优先内存映射打开本地保存的存储（未过期且包含全部股票），
+        否则从数据提供者获取并保存到该目录，供之后的进程直接打开。
+
+        Args:
+            stock_codes: 股票代码列表
+
+        Returns:
+            新获取时只包含成功获取到数据的股票；打开本地保存的存储时可能还包含
+            之前运行的其他股票，调用方应按 stock_codes 取用
+        """
+        fields = self._store_fields()
+        with metrics.timer("load_store"):
+            store = self._open_history(stock_codes, fields)
+        if store is not None:
+            return store
+
+        with metrics.timer("load_store"):
+            store = PriceStore.from_provider(
+                self.data_provider,
+                stock_codes,
+                fields=fields,
+                dtype=self.store_dtype,
+                max_workers=self.max_workers,
+            )
+        logger.info(f"行情存储: {len(store)} 只股票，{store.nbytes / 2**20:.1f} MiB")
+
+        if self.history_path:
+            try:
+                store.save(self.history_path)
+            except OSError as e:
+                logger.warning(f"保存本地行情存储失败: {e}")
+        return store
+
+    def _store_fields(self) -> List[str]:
+        """
+        存储需要的行情字段
+
+        支持截面计算的策略只读取收盘价，声明了 fields 的策略（指标策略、表达式策略）
+        按声明读取，其余策略可能需要全部字段。
+        """
+        needed = {"close"}
+        for strategy in self.strategies:
+            declared = getattr(strategy, "fields", None)
+            if declared is not None:
+                needed.update(declared)
+            elif getattr(strategy, "panel_signals", None) is None:
+                needed.update(PRICE_COLUMNS)
+        return [field for field in PRICE_COLUMNS if field in needed]
+
+    def _open_history(self, stock_codes: List[str], fields: List[str]) -> Optional[PriceStore]:
+        """内存映射打开本地保存的存储，不存在、过期、缺少股票或字段时返回 None"""
+        if not self.history_path:
+            return None
+
+        age = PriceStore.age(self.history_path)
+        if age is None or age > self.history_ttl_minutes * 60:
+            return None
+
+        try:
+            store = PriceStore.open(self.history_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"打开本地行情存储失败: {e}")
+            return None
+
+        missing_fields = [field for field in fields if field not in store.fields]
+        if missing_fields:
+            logger.info(f"本地行情存储缺少字段 {missing_fields}，重新获取")
+            return None
+
+        missing = [code for code in stock_codes if code not in store]
+        if missing:
+            logger.info(f"本地行情存储缺少 {len(missing)} 只股票，重新获取")
+            return None
+
+        logger.info(f"使用本地行情存储: {self.history_path} ({len(store)} 只股票)")
+        return store
+
+    def analyze_store(self, store: PriceStore, stock_codes: Optional[List[str]] = None) -> List[Dict]:
+        """
+        基于 PriceStore 批量分析
+
+        支持截面计算的策略（panel_signals）对整个股票池一次性评估，
+        其余策略逐只股票读取零拷贝的 DataFrame 视图。
+
+        Args:
+            store: 行情存储
+            stock_codes: 要分析的股票，默认为存储中的全部股票
+
+        Returns:
+            分析结果列表（保持输入顺序）
+        """
+        stock_codes = [code for code in (store.codes if stock_codes is None else stock_codes) if code in store]
+        if not stock_codes:
+            return []
+
+        batch_signals: List[Dict[str, List[Signal]]] = [{} for _ in stock_codes]
+        complete = True
+        for strategy in self.strategies:
+            try:
+                with metrics.timer("strategy", strategy.label):
+                    strategy_results = self._store_signals(strategy, store, stock_codes)
+                for i, signals in enumerate(strategy_results):
+                    if signals:
+                        batch_signals[i].setdefault(strategy.label, []).extend(signals)
+            except Exception as e:
+                logger.error(f"策略 {strategy.label} 评估出错: {e}", exc_info=True)
+                complete = False
+
+        # 有策略出错时本次结果不完整，不据此判断信号解除
+        if complete:
+            self.analyzed_codes.update(stock_codes)
+
         results = []
+        for stock_code, strategy_signals in zip(stock_codes, batch_signals):
+            result = self._make_result(
+                stock_code,
+                store.dates(stock_code)[-1],
+                store.values(stock_code)[-1],
+                strategy_signals,
+            )
+            if result:
+                results.append(result)
+        return results
+
+    @staticmethod
+    def _store_signals(
+        strategy: Strategy, store: PriceStore, stock_codes: List[str]
+    ) -> List[Optional[List[Signal]]]:
+        """单个策略在存储上的信号，与 stock_codes 顺序一致"""
+        panel_signals = getattr(strategy, "panel_signals", None)
+        if panel_signals is not None:
+            return panel_signals(store.tail_matrix(max(strategy.periods), stock_codes))
+        return [strategy.detect(store.frame(stock_code)) for stock_code in stock_codes]
+
+    async def analyze_async(self, stock_code: str) -> Optional[Dict]:
+        """
+        异步分析单只股票
 
-        for stock_code in stock_codes:
-            result = self.analyze(stock_code)
+        Args:
+            stock_code: 股票代码
+
+        Returns:
+            分析结果字典或 None
+        """
+        try:
+            logger.info(f"分析股票 {stock_code}")
+
+            with metrics.timer("analyze", symbol=stock_code):
+                with metrics.timer("fetch"):
+                    data = await self.data_provider.fetch_async(stock_code)
+                data = self._check_data(stock_code, data)
+                if data is None:
+                    return None
+
+                strategy_signals = _run_strategies(self.strategies, data)
+                result = self._build_result(stock_code, data, strategy_signals)
+                self.analyzed_codes.add(stock_code)
+                return result
+
+        except Exception as e:
+            logger.error(f"分析股票 {stock_code} 时出错: {e}", exc_info=True)
+            return None
+
+    async def analyze_batch_async(
+        self, stock_codes: List[str], max_concurrency: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        异步批量分析股票，同时进行的获取数由信号量限制
+
+        Args:
+            stock_codes: 股票代码列表
+            max_concurrency: 最大并发数，默认使用初始化时的配置
+
+        Returns:
+            分析结果列表（保持输入顺序）
+        """
+        self.analyzed_codes = set()
+        await asyncio.to_thread(self._prefetch, stock_codes)
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def run(stock_code: str) -> Optional[Dict]:
+            async with semaphore:
+                return await self.analyze_async(stock_code)
+
+        results = await asyncio.gather(*(run(stock_code) for stock_code in stock_codes))
+        return [result for result in results if result]
+
+    def _map(self, func, stock_codes: List[str]) -> List:
+        """按配置的线程数对股票列表执行 func，结果保持输入顺序"""
+        if self.max_workers == 1 or len(stock_codes) <= 1:
+            return [func(stock_code) for stock_code in stock_codes]
+
+        # 数据获取以网络 I/O 为主，线程池即可并行；map 保持输入顺序
+        workers = min(self.max_workers, len(stock_codes))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyze") as executor:
+            return list(executor.map(func, stock_codes))
+
+    def _prefetch(self, stock_codes: List[str]) -> None:
+        """批量预取，失败不影响后续逐只获取"""
+        try:
+            self.data_provider.prefetch(stock_codes)
+        except Exception as e:
+            logger.error(f"批量预取数据失败: {e}", exc_info=True)
+
+    def _fetch(self, stock_code: str) -> Optional[pd.DataFrame]:
+        """获取数据，无数据时返回 None"""
+        with metrics.timer("fetch"):
+            data = self.data_provider.fetch(stock_code)
+        return self._check_data(stock_code, data)
+
+    @staticmethod
+    def _check_data(stock_code: str, data: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """检查获取到的数据，无数据时返回 None"""
+        if data is None or len(data) == 0:
+            logger.warning(f"无法获取 {stock_code} 的数据")
+            metrics.incr("fetch_failures")
+            return None
+
+        # 指标缓存以股票代码为键的一部分
+        data.attrs["code"] = stock_code
+        return data
+
+    def _fetch_safe(self, stock_code: str) -> Optional[pd.DataFrame]:
+        """获取数据，异常时记录日志并返回 None"""
+        try:
+            return self._fetch(stock_code)
+        except Exception as e:
+            logger.error(f"获取股票 {stock_code} 数据时出错: {e}", exc_info=True)
+            return None
+
+    @staticmethod
+    def _build_result(
+        stock_code: str, data: pd.DataFrame, strategy_signals: Dict[str, List[Signal]]
+    ) -> Optional[Dict]:
+        """根据各策略的信号构造结果，无信号时返回 None"""
+        latest = data.iloc[-1]
+        return StockAnalyzer._make_result(
+            stock_code, latest.get("date", datetime.now()), latest.get("close", 0), strategy_signals
+        )
+
+    @staticmethod
+    def _make_result(
+        stock_code: str, latest_date, latest_price, strategy_signals: Dict[str, List[Signal]]
+    ) -> Optional[Dict]:
+        """
+        由最新日期、价格和各策略信号构造结果，无信号时返回 None
+
+        'strategy_signals' 为策略名称 -> 消息列表，'signal_ids' 为与之一一对应的信号标识。
+        """
+        all_signals = [message for signals in strategy_signals.values() for _, message in signals]
+        if not all_signals:
+            logger.info(f"股票 {stock_code} 无触发信号")
+            return None
+
+        return {
+            "code": stock_code,
+            "date": str(latest_date),
+            "price": float(latest_price),
+            "signals": all_signals,
+            "strategy_signals": {
+                label: [message for _, message in signals] for label, signals in strategy_signals.items()
+            },
+            "signal_ids": {
+                label: [signal_id for signal_id, _ in signals] for label, signals in strategy_signals.items()
+            },
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def _analyze_batch_processes(self, stock_codes: List[str]) -> List[Dict]:
+        """先用线程池获取数据，再把策略评估分块交给进程池"""
+        frames = self._map(self._fetch_safe, stock_codes)
+        loaded = [(code, data) for code, data in zip(stock_codes, frames) if data is not None]
+        if not loaded:
+            return []
+
+        try:
+            batch_signals = self._evaluate_in_processes(loaded)
+        except Exception as e:
+            logger.error(f"进程池评估失败，改为在当前进程内评估: {e}", exc_info=True)
+            batch_signals = [_run_strategies(self.strategies, data) for _, data in loaded]
+
+        results = []
+        for (stock_code, data), signals in zip(loaded, batch_signals):
+            if signals is None:
+                continue
+            try:
+                result = self._build_result(stock_code, data, signals)
+                self.analyzed_codes.add(stock_code)
+            except Exception as e:
+                logger.error(f"分析股票 {stock_code} 时出错: {e}", exc_info=True)
+                result = None
             if result:
                 results.append(result)
 
         return results
 
+    def _evaluate_in_processes(
+        self, loaded: List[Tuple[str, pd.DataFrame]]
+    ) -> List[Optional[Dict[str, List[Signal]]]]:
+        """
+        在进程池中执行策略
+
+        行情按列拼接写入一个临时的内存映射文件，工作进程只映射该文件并接收
+        (代码, 偏移) 元组，不需要序列化 DataFrame。
+        """
+        fields = [f for f in PRICE_COLUMNS if any(f in data.columns for _, data in loaded)]
+        total = sum(len(data) for _, data in loaded)
+
+        with tempfile.TemporaryDirectory(prefix="marketpulse-") as tmp_dir:
+            panel_path = os.path.join(tmp_dir, "panel.f64")
+            shape = (len(fields), total)
+            panel = np.memmap(panel_path, dtype=np.float64, mode="w+", shape=shape)
+
+            items = []
+            offset = 0
+            for stock_code, data in loaded:
+                stop = offset + len(data)
+                columns = tuple(f for f in fields if f in data.columns)
+                for column in columns:
+                    panel[fields.index(column), offset:stop] = pd.to_numeric(
+                        data[column], errors="coerce"
+                    ).to_numpy(dtype=np.float64)
+                items.append((stock_code, offset, stop, columns))
+                offset = stop
+
+            panel.flush()
+            del panel
+
+            chunk_size = self.chunk_size or math.ceil(len(items) / (self.process_workers * 4))
+            chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+            with metrics.timer("process_pool"), ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                initializer=_init_worker,
+                initargs=(self.strategies, panel_path, shape, fields),
+            ) as executor:
+                batch_signals = []
+                for chunk_signals in executor.map(_evaluate_chunk, chunks):
+                    batch_signals.extend(chunk_signals)
+
+        return batch_signals
+
 
 class StockAnalyzerFactory:
     """股票分析器工厂"""
@@ -116,7 +562,7 @@ class StockAnalyzerFactory:
         从配置创建分析器
 
         Args:
-            config: 配置对象（需要有 get_data_source、get_strategies 方法）
+            config: 配置对象（需要有 get_data_source、get_strategies、get_analysis_config 方法）
 
         Returns:
             股票分析器实例
@@ -125,7 +571,19 @@ class StockAnalyzerFactory:
         data_source = config.get_data_source()
 
         if data_source.get("primary") == "akshare":
-            primary = AkshareProvider()
+            rate_limit = data_source.get("rate_limit", {})
+            primary = AkshareProvider(
+                rate_limit=rate_limit.get("rate"),
+                burst=rate_limit.get("burst", 1),
+            )
+            if data_source.get("cache_enabled", False):
+                primary = CachedProvider(
+                    primary,
+                    cache_dir=data_source.get("cache_dir", ".cache"),
+                    ttl_minutes=data_source.get("cache_ttl_minutes", 60),
+                    incremental=data_source.get("incremental", False),
+                    snapshot=data_source.get("snapshot", False),
+                )
             fallback = MockProvider()
             provider = FallbackProvider(primary, fallback)
         else:
@@ -133,6 +591,19 @@ class StockAnalyzerFactory:
 
         # 创建分析器
         strategies = config.get_strategies()
-        analyzer = StockAnalyzer(provider, strategies)
+        analysis_config = config.get_analysis_config()
+        analyzer = StockAnalyzer(
+            provider,
+            strategies,
+            max_workers=analysis_config.get("max_workers", 1),
+            process_workers=analysis_config.get("process_workers", 0),
+            chunk_size=analysis_config.get("chunk_size"),
+            indicator_cache_size=analysis_config.get("indicator_cache_size", 4096),
+            max_concurrency=analysis_config.get("max_concurrency", 64),
+            use_store=analysis_config.get("use_store", False),
+            store_dtype=analysis_config.get("store_dtype", "float64"),
+            history_path=analysis_config.get("history_path"),
+            history_ttl_minutes=data_source.get("cache_ttl_minutes", 60),
+        )
 
         return analyzer
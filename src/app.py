@@ -1,20 +1,105 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-"""MarketPulse 主应用模块"""
+"""
+MarketPulse 主应用模块
+
+分析相关模块（pandas / numpy）在首次分析时才导入，配置检查、监控列表、
+试运行和通知测试等轻量命令不会加载它们。
+"""
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import List, Dict
+import threading
+from datetime import datetime, time, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
 
-from .analyzer import StockAnalyzerFactory
+from . import metrics
 from .config import ConfigManager
 from .logger import setup_logger
+from .metrics import RunMetrics
 from .notifier import Notifier
+from .signal_state import SignalStateStore
 
 logger = logging.getLogger(__name__)
 
 
+class Scheduler:
+    """常驻调度器 - 在指定时区的若干时间点重复执行任务"""
+
+    def __init__(
+        self,
+        times: Iterable[str],
+        timezone: str = "Asia/Shanghai",
+        weekdays: Iterable[int] = (1, 2, 3, 4, 5),
+    ):
+        """
+        Args:
+            times: "HH:MM" 格式的触发时间列表
+            timezone: 触发时间所在时区
+            weekdays: 运行的星期（1=周一 ... 7=周日）
+        """
+        self.tz = ZoneInfo(timezone)
+        self.times = sorted({self._parse_time(t) for t in times})
+        self.weekdays = set(weekdays)
+
+        if not self.times:
+            raise ValueError("调度配置中没有触发时间")
+        if not self.weekdays:
+            raise ValueError("调度配置中没有运行的星期")
+
+    @staticmethod
+    def _parse_time(value: str) -> time:
+        try:
+            hour, minute = value.strip().split(":")
+            return time(int(hour), int(minute))
+        except ValueError:
+            raise ValueError(f"无效的调度时间: {value}（应为 HH:MM）")
+
+    def next_run(self, now: Optional[datetime] = None) -> datetime:
+        """返回 now 之后的下一个触发时间（带时区）"""
+        now = now.astimezone(self.tz) if now else datetime.now(self.tz)
+
+        for offset in range(8):
+            day = now.date() + timedelta(days=offset)
+            if day.isoweekday() not in self.weekdays:
+                continue
+            for t in self.times:
+                candidate = datetime.combine(day, t, tzinfo=self.tz)
+                if candidate > now:
+                    return candidate
+
+        raise RuntimeError("无法计算下一个触发时间")
+
+    def run_forever(self, job: Callable[[], Any], stop_event: Optional[threading.Event] = None) -> None:
+        """
+        按计划循环执行 job，直到 stop_event 被设置
+
+        job 抛出的异常会被记录，不会中断调度。
+        """
+        stop_event = stop_event or threading.Event()
+
+        while not stop_event.is_set():
+            next_time = self.next_run()
+            logger.info(f"下次运行时间: {next_time.isoformat()}")
+
+            # 分段等待，系统休眠或时钟调整后能及时纠正
+            while not stop_event.is_set():
+                remaining = (next_time - datetime.now(self.tz)).total_seconds()
+                if remaining <= 0:
+                    break
+                stop_event.wait(min(remaining, 60))
+
+            if stop_event.is_set():
+                break
+
+            try:
+                job()
+            except Exception as e:
+                logger.error(f"定时任务执行失败: {e}", exc_info=True)
+
+
 class MarketPulse:
     """MarketPulse 主应用"""
 
@@ -37,34 +122,102 @@ class MarketPulse:
             format_str=log_config.get("format"),
         )
 
-        # 初始化分析器和通知器
-        self.analyzer = StockAnalyzerFactory.create(self.config)
+        # 分析器在首次使用时创建（见 analyzer 属性）
+        self._analyzer = None
         notification_config = self.config.get("notification", {})
         self.notifier = Notifier(notification_config)
 
-    def run(self) -> Dict:
+        # 信号去重：只通知新触发 / 已解除 / 到期需重复提醒的信号
+        self.signal_state = None
+        dedup_config = notification_config.get("dedup", {})
+        if dedup_config.get("enabled", False):
+            self.signal_state = SignalStateStore(
+                state_file=dedup_config.get("state_file", ".cache/signal_state.json"),
+                realert_hours=dedup_config.get("realert_hours", 24),
+            )
+
+    @property
+    def analyzer(self):
+        """股票分析器，首次访问时导入分析模块并创建"""
+        if self._analyzer is None:
+            from .analyzer import StockAnalyzerFactory
+
+            self._analyzer = StockAnalyzerFactory.create(self.config)
+        return self._analyzer
+
+    def run(self, stocks: Optional[List[str]] = None, notify: bool = True) -> Dict:
         """
         运行分析和通知
 
+        Args:
+            stocks: 要分析的股票，默认为配置的监控列表
+            notify: 是否去重并发送通知；为 False 时只分析，不改变信号状态
+
         Returns:
             执行结果统计
         """
-        stocks = self.config.get_stocks()
+        stocks = self.config.get_stocks() if stocks is None else stocks
 
         if not stocks:
             logger.warning("未配置监控股票")
             return {"total": 0, "triggered": 0, "results": []}
 
+        # 分阶段耗时统计，关闭时各处的计时调用几乎没有开销
+        metrics_config = self.config.get("metrics", {})
+        run_metrics = RunMetrics() if metrics_config.get("enabled", False) else None
+        indicator_cache = self.analyzer.indicator_cache
+        # 指标缓存只在一次运行内共享：常驻模式下各次调度之间行情可能已被修正
+        indicator_cache.clear()
+        indicator_hits, indicator_misses = indicator_cache.hits, indicator_cache.misses
+
+        with metrics.collect(run_metrics):
+            result = self._run(stocks, notify)
+
+        if run_metrics is not None:
+            run_metrics.incr("symbols", len(stocks))
+            run_metrics.incr("indicator_cache_hits", indicator_cache.hits - indicator_hits)
+            run_metrics.incr("indicator_cache_misses", indicator_cache.misses - indicator_misses)
+            result["metrics"] = run_metrics.report()
+            self._write_metrics(run_metrics, metrics_config)
+
+        return result
+
+    def _run(self, stocks: List[str], notify: bool) -> Dict:
+        """分析、去重、通知一次"""
         logger.info(f"开始分析 {len(stocks)} 只股票: {stocks}")
 
         # 分析股票
-        results = self.analyzer.analyze_batch(stocks)
+        if self.config.get("analysis.use_async", False):
+            results = asyncio.run(self.analyzer.analyze_batch_async(stocks))
+        else:
+            results = self.analyzer.analyze_batch(stocks)
 
         # 发送通知
-        triggered_count = 0
-        for result in results:
-            triggered_count += 1
-            self._notify(result)
+        triggered_count = len(results)
+        if not notify:
+            to_notify = []
+        elif self.signal_state:
+            # 只对完成分析的股票判断信号解除，获取失败或出错的股票保持原状态
+            analyzed = [code for code in stocks if code in self.analyzer.analyzed_codes]
+            to_notify = self.signal_state.filter(results, analyzed)
+        else:
+            to_notify = results
+
+        # 每条通知实际发送成功后才记录其中股票的信号状态，发送失败的下次重新通知
+        digest_config = self.config.get("notification.digest", {})
+        if not notify:
+            logger.info("本次运行不发送通知")
+        elif not to_notify:
+            logger.info("没有需要通知的信号变化")
+        elif digest_config.get("enabled", False):
+            self._notify_digest(to_notify, digest_config.get("max_results_per_message", 50))
+        else:
+            for result in to_notify:
+                self._notify(result)
+
+        # 后台发送模式下通知由工作线程继续发送，在 close() 时处理完
+        if not self.notifier.queued:
+            self.notifier.close()
 
         # 日志汇总
         self._log_summary(stocks, results)
@@ -72,38 +225,300 @@ class MarketPulse:
         return {
             "total": len(stocks),
             "triggered": triggered_count,
+            "notified": len(to_notify),
             "results": results,
             "timestamp": datetime.now().isoformat(),
         }
 
-    def _notify(self, result: Dict) -> None:
-        """发送单只股票的通知"""
+    def _state_committer(self, stock_codes: List[str]) -> Optional[Callable[[], None]]:
+        """取出这些股票暂存的信号状态变化，返回通知实际发送成功后写入状态的回调"""
+        if not self.signal_state:
+            return None
+        changes = self.signal_state.take(stock_codes)
+        return lambda: self.signal_state.commit(changes)
+
+    def _notify(self, result: Dict) -> bool:
+        """发送单只股票的通知，返回是否发送成功（后台发送模式下为是否已入队）"""
         try:
-            subject = f"【MarketPulse】股票策略触发: {result['code']}"
+            if result["signals"]:
+                subject = f"【MarketPulse】股票策略触发: {result['code']}"
+            else:
+                subject = f"【MarketPulse】股票信号解除: {result['code']}"
+            body = self._format_result(result) + self._format_footer()
 
-            # 构造邮件正文
-            body = f"""股票代码: {result['code']}
-交易日期: {result['date']}
-当前价格: {result['price']:.2f}
+            logger.info(f"发送通知: {subject}")
+            with metrics.timer("notify"):
+                return self.notifier.notify(subject, body, self._state_committer([result["code"]]))
+
+        except Exception as e:
+            logger.error(f"发送通知失败: {e}", exc_info=True)
+            return False
+
+    def _notify_digest(self, results: List[Dict], max_results_per_message: int) -> None:
+        """把本次运行的触发结果合并成摘要邮件，每封最多 max_results_per_message 只股票"""
+        size = max(1, int(max_results_per_message))
+        batches = [results[i:i + size] for i in range(0, len(results), size)]
+
+        for index, batch in enumerate(batches, start=1):
+            try:
+                subject = f"【MarketPulse】股票策略触发汇总: {len(results)} 只股票"
+                if len(batches) > 1:
+                    subject += f" ({index}/{len(batches)})"
 
-触发信号:
+                body = "\n".join(self._format_result(result) for result in batch)
+                body += self._format_footer()
+
+                logger.info(f"发送通知: {subject}")
+                on_delivered = self._state_committer([result["code"] for result in batch])
+                with metrics.timer("notify"):
+                    self.notifier.notify(subject, body, on_delivered)
+
+            except Exception as e:
+                logger.error(f"发送汇总通知失败: {e}", exc_info=True)
+
+    @staticmethod
+    def _format_result(result: Dict) -> str:
+        """格式化单只股票的通知正文"""
+        body = f"股票代码: {result['code']}\n"
+        if result.get("price") is not None:
+            body += f"""交易日期: {result['date']}
+当前价格: {result['price']:.2f}
 """
 
+        if result["signals"]:
+            body += "\n触发信号:\n"
             for signal in result["signals"]:
                 body += f"  • {signal}\n"
 
-            body += f"""
+        if result.get("cleared"):
+            body += "\n已解除信号:\n"
+            for signal in result["cleared"]:
+                body += f"  • {signal}\n"
+
+        return body
+
+    @staticmethod
+    def _format_footer() -> str:
+        """通知正文的页脚"""
+        return f"""
 ---
 MarketPulse - Daily Beat
 https://github.com/yang-xianfeng/marketpulse
 生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
 
-            logger.info(f"发送通知: {subject}")
-            self.notifier.notify(subject, body)
+    def profile(
+        self,
+        output: Optional[str] = None,
+        mode: str = "cprofile",
+        symbols: Optional[int] = None,
+        interval: float = 0.005,
+        notify: bool = False,
+    ) -> Dict:
+        """
+        在剖析器下运行一次分析，写出剖析文件并按策略/数据提供者归因
+
+        Args:
+            output: 剖析文件路径，默认写到 .cache/profile-<时间>.pstats / .folded
+            mode: "cprofile"（确定性）或 "sample"（采样，开销低，包含所有线程）
+            symbols: 只剖析监控列表中的前 N 只股票
+            interval: 采样间隔（秒），仅 sample 模式使用
+            notify: 是否发送通知，默认不发送，便于在生产环境剖析
+
+        Returns:
+            run 的结果，附带 'profile' 归因报告
+        """
+        stocks = self.config.get_stocks()
+        if symbols:
+            stocks = stocks[:symbols]
+
+        if output is None:
+            suffix = "pstats" if mode == "cprofile" else "folded"
+            output = f".cache/profile-{datetime.now():%Y%m%d-%H%M%S}.{suffix}"
+
+        # cProfile 只统计调用线程，剖析期间改为单线程、进程内评估
+        saved = (self.analyzer.max_workers, self.analyzer.process_workers)
+        if mode == "cprofile":
+            self.analyzer.max_workers, self.analyzer.process_workers = 1, 0
+
+        from .profiling import profile_call
+
+        try:
+            result, report = profile_call(
+                lambda: self.run(stocks, notify=notify), output, mode=mode, interval=interval
+            )
+        finally:
+            self.analyzer.max_workers, self.analyzer.process_workers = saved
+
+        result["profile"] = report
+        return result
+
+    def stream(self, bars: Iterable) -> int:
+        """
+        盘中流式监控：对每根 K 线/每笔报价增量更新均线，新出现的信号立即通知
+
+        每只股票第一次出现时先用数据源的日线收盘价预热均线窗口，之后同一交易日的
+        报价只更新当日 K 线。
+
+        Args:
+            bars: (时间, 股票代码, 价格) 流，如 ReplayProvider.bars() 或 poll_snapshots()
 
+        Returns:
+            触发的新信号总数
+        """
+        from .strategies import MovingAverageStrategy
+        from .streaming import StreamingMonitor
+
+        def on_signal(stock_code: str, price: float, signals: List[str], timestamp: datetime) -> None:
+            self._notify({"code": stock_code, "date": str(timestamp), "price": price, "signals": signals})
+
+        monitors = [
+            StreamingMonitor(strategy, on_signal)
+            for strategy in self.analyzer.strategies
+            if isinstance(strategy, MovingAverageStrategy)
+        ]
+        if not monitors:
+            logger.warning("没有可用于流式监控的均线策略")
+            return 0
+
+        count = 0
+        seeded = set()
+        for timestamp, stock_code, price in bars:
+            if stock_code not in seeded:
+                seeded.add(stock_code)
+                self._seed_monitors(monitors, stock_code)
+            for monitor in monitors:
+                count += len(monitor.update(stock_code, price, timestamp))
+        return count
+
+    def _seed_monitors(self, monitors: List, stock_code: str) -> None:
+        """用日线收盘价预热各监控器的均线窗口，获取失败时从空窗口开始"""
+        import pandas as pd
+
+        try:
+            data = self.analyzer.data_provider.fetch(stock_code)
         except Exception as e:
-            logger.error(f"发送通知失败: {e}", exc_info=True)
+            logger.error(f"获取股票 {stock_code} 历史数据时出错: {e}", exc_info=True)
+            data = None
+
+        if data is None or len(data) == 0:
+            logger.warning(f"无法获取 {stock_code} 的历史数据，均线窗口将从空开始")
+            return
+
+        last_date = pd.Timestamp(data["date"].iloc[-1]).date() if "date" in data.columns else None
+        for monitor in monitors:
+            monitor.seed(stock_code, data["close"].to_numpy(dtype=float), last_date)
+
+    def check_config(self) -> List[str]:
+        """
+        检查配置
+
+        Returns:
+            发现的问题，为空表示通过
+        """
+        problems = []
+
+        stocks = self.config.get_stocks()
+        if not isinstance(stocks, list) or not all(isinstance(code, str) and code.strip() for code in stocks):
+            problems.append("stocks.watchlist 必须是股票代码字符串列表")
+        elif not stocks:
+            problems.append("stocks.watchlist 为空")
+
+        for i, strategy in enumerate(self.config.get("strategies", [])):
+            if not isinstance(strategy, dict) or not strategy.get("type"):
+                problems.append(f"strategies[{i}] 缺少 type")
+            elif strategy["type"] == "expression":
+                # 只在配置了表达式策略时导入（会加载 pandas）
+                from .expressions import ExpressionStrategy
+
+                try:
+                    ExpressionStrategy(strategy)
+                except ValueError as e:
+                    problems.append(f"strategies[{i}] {e}")
+
+        primary = self.config.get("data_source.primary", "mock")
+        if primary not in ("akshare", "mock"):
+            problems.append(f"未知的数据源: {primary}")
+
+        try:
+            self.create_scheduler()
+        except (ValueError, KeyError) as e:
+            # 未知时区抛出的 ZoneInfoNotFoundError 是 KeyError 的子类
+            problems.append(f"schedule 配置无效: {e}")
+
+        if self.notifier.enabled and not self.notifier.is_configured():
+            problems.append("通知已启用，但邮件配置不完整（SENDER_EMAIL / RECEIVER_EMAIL / SMTP_AUTH_CODE）")
+
+        return problems
+
+    def dry_run(self) -> Dict:
+        """
+        试运行：列出一次运行将使用的股票、策略、数据源和通知方式，不获取数据、不发送通知
+
+        Returns:
+            运行计划
+        """
+        try:
+            next_run = self.create_scheduler().next_run().isoformat()
+        except (ValueError, KeyError):
+            next_run = None
+
+        return {
+            "stocks": self.config.get_stocks(),
+            "strategies": [
+                strategy.get("name", strategy.get("type")) for strategy in self.config.get_strategies()
+            ],
+            "data_source": self.config.get("data_source.primary", "mock"),
+            "notification": self.notifier.enabled and self.notifier.is_configured(),
+            "next_run": next_run,
+            "problems": self.check_config(),
+        }
+
+    def test_notify(self) -> bool:
+        """发送一封测试通知，用于检查邮箱配置（同步发送，结果反映实际投递）"""
+        body = "这是一封 MarketPulse 测试通知，收到说明通知配置正确。\n" + self._format_footer()
+        return self.notifier.send_now("【MarketPulse】测试通知", body)
+
+    def create_scheduler(self) -> Scheduler:
+        """根据 schedule 配置创建调度器（times 优先于 time）"""
+        schedule_config = self.config.get("schedule", {})
+        times = schedule_config.get("times") or [schedule_config.get("time", "09:30")]
+
+        return Scheduler(
+            times,
+            timezone=schedule_config.get("timezone", "Asia/Shanghai"),
+            weekdays=schedule_config.get("weekdays", [1, 2, 3, 4, 5]),
+        )
+
+    def serve(self, stop_event: Optional[threading.Event] = None) -> None:
+        """
+        常驻运行：按 schedule 配置定时执行 run
+
+        数据提供者、缓存和通知器在多次运行间保持不变，避免每次冷启动。
+        """
+        scheduler = self.create_scheduler()
+        logger.info(
+            f"MarketPulse 常驻运行，触发时间 {[t.strftime('%H:%M') for t in scheduler.times]} "
+            f"({scheduler.tz.key})"
+        )
+        scheduler.run_forever(self.run, stop_event)
+
+    @staticmethod
+    def _write_metrics(run_metrics: RunMetrics, metrics_config: Dict) -> None:
+        """按配置写出指标文件，写入失败不影响本次运行结果"""
+        output = metrics_config.get("output")
+        if not output:
+            return
+
+        try:
+            run_metrics.write(output, metrics_config.get("format", "json"))
+            logger.info(f"运行指标已写入 {output}")
+        except OSError as e:
+            logger.warning(f"写入运行指标失败: {e}")
+
+    def close(self) -> None:
+        """关闭应用：发送完待发通知并释放连接"""
+        self.notifier.close()
 
     @staticmethod
     def _log_summary(stocks: List[str], results: List[Dict]) -> None:
@@ -123,16 +538,95 @@ https://github.com/yang-xianfeng/marketpulse
         logger.info(f"{'='*60}\n")
 
 
-def main(config_file: str = "config.json"):
-    """主入口"""
+def main(
+    config_file: str = "config.json",
+    daemon: bool = False,
+    profile: Optional[Dict] = None,
+):
+    """
+    主入口
+
+    Args:
+        config_file: 配置文件路径
+        daemon: 常驻运行，按 schedule 配置定时执行
+        profile: 剖析运行一次，内容为 MarketPulse.profile 的参数
+    """
     try:
         app = MarketPulse(config_file)
-        result = app.run()
-        return result
+        try:
+            if profile is not None:
+                return app.profile(**profile)
+            if daemon:
+                stop_event = threading.Event()
+                _install_stop_handler(stop_event)
+                app.serve(stop_event)
+                return None
+            return app.run()
+        finally:
+            app.close()
     except Exception as e:
         logger.error(f"程序执行失败: {e}", exc_info=True)
         raise
 
 
+def run_command(config_file: str, command: str) -> int:
+    """
+    执行不需要分析模块的轻量命令
+
+    Args:
+        config_file: 配置文件路径
+        command: check-config / list / dry-run / test-notify
+
+    Returns:
+        进程退出码
+    """
+    app = MarketPulse(config_file)
+    try:
+        if command == "list":
+            for stock_code in app.config.get_stocks():
+                print(stock_code)
+            return 0
+
+        if command == "check-config":
+            problems = app.check_config()
+            for problem in problems:
+                print(f"✗ {problem}")
+            if not problems:
+                print(f"✓ 配置检查通过: {config_file}")
+            return 1 if problems else 0
+
+        if command == "dry-run":
+            plan = app.dry_run()
+            print(f"监控股票 ({len(plan['stocks'])}): {', '.join(plan['stocks'])}")
+            print(f"策略: {', '.join(plan['strategies'])}")
+            print(f"数据源: {plan['data_source']}")
+            print(f"通知: {'已配置' if plan['notification'] else '未配置'}")
+            print(f"下次调度: {plan['next_run']}")
+            for problem in plan["problems"]:
+                print(f"✗ {problem}")
+            return 1 if plan["problems"] else 0
+
+        if command == "test-notify":
+            sent = app.test_notify()
+            print("✓ 测试通知已发送" if sent else "✗ 测试通知发送失败，详见日志")
+            return 0 if sent else 1
+
+        raise ValueError(f"未知的命令: {command}")
+    finally:
+        app.close()
+
+
+def _install_stop_handler(stop_event: threading.Event) -> None:
+    """收到 SIGINT / SIGTERM 时结束常驻运行"""
+    import signal
+
+    def handle(signum, frame):
+        logger.info(f"收到信号 {signum}，停止调度")
+        stop_event.set()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, handle)
+
+
 if __name__ == "__main__":
     main()
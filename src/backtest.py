@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""回测模块 - 基于 Strategy.signal_matrix 的向量化历史回测和参数扫描"""
+
+import itertools
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .indicators import PanelContext
+from .strategies import MovingAverageStrategy, Strategy
+
+logger = logging.getLogger(__name__)
+
+
+class BacktestResult:
+    """回测结果"""
+
+    def __init__(self, timelines: Dict[str, pd.DataFrame], summary: pd.DataFrame):
+        """
+        Args:
+            timelines: 信号标识 -> (日期 × 股票) 的布尔信号时间线
+            summary: 每个信号一行的统计表（触发次数、各持有期的平均收益和命中率）
+        """
+        self.timelines = timelines
+        self.summary = summary
+
+    def __repr__(self) -> str:
+        return f"BacktestResult(signals={list(self.timelines)})\n{self.summary}"
+
+
+def build_panel(frames: Dict[str, pd.DataFrame], column: str = "close") -> pd.DataFrame:
+    """
+    把多只股票的行情按日期对齐成 (日期 × 股票) 宽表
+
+    Args:
+        frames: 股票代码 -> 包含 'date' 和 column 列的 DataFrame
+        column: 取值的列
+
+    Returns:
+        以日期为索引、股票代码为列的 DataFrame，缺失日期（停牌等）为 NaN；
+        run_backtest / run_sweep 按每只股票自己的 K 线序列评估，不受这些空位影响
+    """
+    series = {
+        stock_code: pd.Series(
+            pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float64),
+            index=pd.to_datetime(frame["date"]),
+        )
+        for stock_code, frame in frames.items()
+    }
+    return pd.DataFrame(series).sort_index()
+
+
+class BarLayout:
+    """
+    (日期 × 股票) 矩阵与各股票自身 K 线序列之间的映射
+
+    每只股票只保留有收盘价的日期，按末尾对齐压缩成矩阵（与 align_closes 的约定一致），
+    停牌日不占位置。在压缩后的矩阵上计算均线、指标和持有期收益，结果与逐只股票
+    对其实际 K 线调用 analyze 一致；unpack 再把信号放回原来的日期。
+    """
+
+    def __init__(self, closes: np.ndarray):
+        valid = ~np.isnan(closes)
+        counts = valid.sum(axis=0)
+        rows = int(counts.max()) if counts.size else 0
+        rank = np.cumsum(valid, axis=0) - 1
+
+        self.date_rows, self.columns = np.nonzero(valid)
+        self.bar_rows = rows - counts[self.columns] + rank[self.date_rows, self.columns]
+        self.dates_shape = closes.shape
+        self.bars_shape = (rows, closes.shape[1])
+
+    def pack(self, values: np.ndarray) -> np.ndarray:
+        """按日期排列的矩阵 -> 按各股票 K 线序列排列的矩阵"""
+        out = np.full(self.bars_shape, np.nan)
+        out[self.bar_rows, self.columns] = values[self.date_rows, self.columns]
+        return out
+
+    def unpack(self, mask: np.ndarray) -> np.ndarray:
+        """按 K 线序列排列的信号 -> 按日期排列的信号，停牌日为 False"""
+        out = np.zeros(self.dates_shape, dtype=bool)
+        out[self.date_rows, self.columns] = mask[self.bar_rows, self.columns]
+        return out
+
+
+def forward_returns(closes: np.ndarray, horizon: int) -> np.ndarray:
+    """持有 horizon 个交易日的收益率，末尾无法计算的部分为 NaN"""
+    out = np.full(closes.shape, np.nan)
+    if horizon < len(closes):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:-horizon] = closes[horizon:] / closes[:-horizon] - 1
+    return out
+
+
+def onsets(mask: np.ndarray) -> np.ndarray:
+    """信号从无到有的日期（首次触发），持续触发的后续日期不计"""
+    started = mask.copy()
+    started[1:] &= ~mask[:-1]
+    return started
+
+
+def run_backtest(
+    strategy: Strategy,
+    closes: Union[pd.DataFrame, np.ndarray],
+    horizons: Iterable[int] = (1, 5, 10, 20),
+    onset_only: bool = True,
+    direction: int = -1,
+    fields: Optional[Dict[str, Union[pd.DataFrame, np.ndarray]]] = None,
+) -> BacktestResult:
+    """
+    在所有历史日期、所有股票上一次性评估策略
+
+    每只股票按自己的 K 线序列评估（见 BarLayout），停牌前后的 K 线直接相连，
+    持有期也按该股票的交易日计算。
+
+    Args:
+        strategy: 实现了 signal_matrix 的策略
+        closes: (日期 × 股票) 收盘价，建议用 build_panel 构造
+        horizons: 统计的持有期（交易日）
+        onset_only: 只统计信号首次出现的日期
+        direction: 信号方向，-1 表示看跌信号（之后下跌算命中），1 表示看涨
+        fields: 策略需要的其他字段（high/low/volume），与 closes 同形状
+
+    Returns:
+        回测结果
+    """
+    index, columns, values = _panel_values(closes)
+    layout = BarLayout(values)
+    bars = layout.pack(values)
+    context = PanelContext(
+        bars, {name: layout.pack(_panel_values(panel)[2]) for name, panel in (fields or {}).items()}
+    )
+
+    signals = strategy.signal_matrix(bars, context)
+    horizons = list(horizons)
+    returns = {horizon: forward_returns(bars, horizon) for horizon in horizons}
+
+    rows = [
+        {"signal": signal_id, **_signal_stats(mask, returns, onset_only, direction)}
+        for signal_id, mask in signals.items()
+    ]
+
+    timelines = {
+        signal_id: pd.DataFrame(layout.unpack(mask), index=index, columns=columns, copy=False)
+        for signal_id, mask in signals.items()
+    }
+    summary = pd.DataFrame(rows).set_index("signal") if rows else pd.DataFrame()
+
+    logger.info(f"回测完成: {values.shape[1]} 只股票 × {values.shape[0]} 个交易日")
+    return BacktestResult(timelines, summary)
+
+
+def run_sweep(
+    closes: Union[pd.DataFrame, np.ndarray],
+    periods_grid: Iterable[Sequence[int]],
+    thresholds: Iterable[float] = (0.0,),
+    horizons: Iterable[int] = (1, 5, 10, 20),
+    onset_only: bool = True,
+    direction: int = -1,
+    base_config: Optional[Dict] = None,
+) -> pd.DataFrame:
+    """
+    在同一份数据上评估均线策略的一组参数组合
+
+    前缀和、历史长度和各持有期收益只计算一次，每个周期的均线在所有组合间共享，
+    单个组合的开销只剩比较和统计。与 run_backtest 相同，每只股票按自己的 K 线序列评估。
+
+    Args:
+        closes: (日期 × 股票) 收盘价，建议用 build_panel 构造
+        periods_grid: 候选的 periods 配置，如 [(5, 10, 20), (5, 20, 60)]
+        thresholds: 候选的跌破幅度阈值（见 MovingAverageStrategy 的 threshold 参数）
+        horizons: 统计的持有期（交易日）
+        onset_only: 只统计信号首次出现的日期
+        direction: 信号方向，-1 表示看跌信号（之后下跌算命中），1 表示看涨
+        base_config: 其余策略配置，各组合在此基础上覆盖 periods 和 threshold
+
+    Returns:
+        每个 (periods, threshold, 信号) 一行的结果表
+    """
+    _, _, values = _panel_values(closes)
+    bars = BarLayout(values).pack(values)
+    context = PanelContext(bars)
+    horizons = list(horizons)
+    returns = {horizon: forward_returns(bars, horizon) for horizon in horizons}
+    base_config = base_config or {}
+
+    rows = []
+    for periods, threshold in itertools.product(_unique_periods(periods_grid), thresholds):
+        params = {**base_config.get("params", {}), "periods": list(periods), "threshold": threshold}
+        strategy = MovingAverageStrategy({**base_config, "params": params})
+
+        for signal_id, mask in strategy.signal_matrix(bars, context).items():
+            rows.append(
+                {
+                    "periods": ",".join(str(period) for period in periods),
+                    "threshold": threshold,
+                    "signal": signal_id,
+                    **_signal_stats(mask, returns, onset_only, direction),
+                }
+            )
+
+    logger.info(
+        f"参数扫描完成: {len(rows)} 组结果，{values.shape[1]} 只股票 × {values.shape[0]} 个交易日"
+    )
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).set_index(["periods", "threshold", "signal"])
+
+
+def _panel_values(closes: Union[pd.DataFrame, np.ndarray]) -> Tuple[pd.Index, pd.Index, np.ndarray]:
+    """拆出行索引、列索引和 float64 矩阵"""
+    if isinstance(closes, pd.DataFrame):
+        return closes.index, closes.columns, closes.to_numpy(dtype=np.float64)
+
+    values = np.asarray(closes, dtype=np.float64)
+    return pd.RangeIndex(values.shape[0]), pd.RangeIndex(values.shape[1]), values
+
+
+def _unique_periods(periods_grid: Iterable[Sequence[int]]) -> List[Tuple[int, ...]]:
+    """规范化 periods 配置并去重，保持原有顺序"""
+    return list(dict.fromkeys(tuple(sorted(int(p) for p in periods)) for periods in periods_grid))
+
+
+def _signal_stats(
+    mask: np.ndarray, returns: Dict[int, np.ndarray], onset_only: bool, direction: int
+) -> Dict:
+    """单个信号的触发次数以及各持有期的平均收益和命中率"""
+    events = onsets(mask) if onset_only else mask
+    stats = {"events": int(events.sum())}
+
+    for horizon, horizon_returns in returns.items():
+        sample = horizon_returns[events]
+        sample = sample[~np.isnan(sample)]
+        stats[f"mean_return_{horizon}d"] = float(sample.mean()) if len(sample) else np.nan
+        stats[f"hit_rate_{horizon}d"] = (
+            float((direction * sample > 0).mean()) if len(sample) else np.nan
+        )
+
+    return stats
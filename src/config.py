@@ -86,6 +86,10 @@ class ConfigManager:
         """获取数据源配置"""
         return self.get("data_source", {})
 
+    def get_analysis_config(self) -> Dict[str, Any]:
+        """获取分析执行配置"""
+        return self.get("analysis", {})
+
     def get_logging_config(self) -> Dict[str, Any]:
         """获取日志配置"""
         return self.get("logging", {})
@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+信号表达式模块 - 在配置中用表达式声明信号规则
+
+    close < ma(20) and rsi(14) < 30
+    cross_above(ma(5), ma(20)) and volume_ratio(20) > 2
+
+表达式在策略创建时解析为规范化的语法树（元组），编译进求值计划。多个策略共享
+同一个计划时，结构相同的子表达式只保留一个节点，每只股票只计算一次；指标节点
+经由 IndicatorCache（逐只分析）或 PanelContext（矩阵回测）计算，与其他策略共享。
+"""
+
+import logging
+import re
+import string
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import kernels
+from .indicators import KERNELS, FrameSource, PanelContext, cached_compute
+from .strategies import Signal, Strategy, StrategyFactory, signal_messages
+
+logger = logging.getLogger(__name__)
+
+# 语法树节点：
+#   ("num", 数值)                      常量
+#   ("field", 字段名)                  行情字段
+#   ("ind", 指标名, 参数, 分量)        KERNELS 中的指标，多输出指标（macd、bollinger）取第几个分量
+#   ("prev", 子节点, n)                n 根 K 线之前的值
+#   (一元运算, 子节点)                 neg / not / abs
+#   (二元运算, 左节点, 右节点)         + - * / < <= == != and or min max
+Node = tuple
+
+# 行情字段
+FIELDS = ("open", "high", "low", "close", "volume")
+
+# 指标函数：名称 -> (KERNELS 中的指标名, 默认参数, 输出分量)，默认参数为 None 表示必填
+FUNCTIONS: Dict[str, Tuple[str, Tuple, Optional[int]]] = {
+    "ma": ("sma", (None,), None),
+    "sma": ("sma", (None,), None),
+    "ema": ("ema", (None,), None),
+    "rsi": ("rsi", (14,), None),
+    "atr": ("atr", (14,), None),
+    "volume_ratio": ("volume_ratio", (20,), None),
+    "macd": ("macd", (12, 26, 9), 0),
+    "macd_signal": ("macd", (12, 26, 9), 1),
+    "macd_hist": ("macd", (12, 26, 9), 2),
+    "boll_upper": ("bollinger", (20, 2), 0),
+    "boll_mid": ("bollinger", (20, 2), 1),
+    "boll_lower": ("bollinger", (20, 2), 2),
+}
+
+# 其他函数及其参数个数
+SPECIAL_FUNCTIONS = {
+    "prev": (1, 2),
+    "abs": (1, 1),
+    "min": (2, 2),
+    "max": (2, 2),
+    "cross_above": (2, 2),
+    "cross_below": (2, 2),
+}
+
+_UNARY = {"neg": np.negative, "not": np.logical_not, "abs": np.abs}
+_BINARY = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.divide,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+    "and": np.logical_and,
+    "or": np.logical_or,
+    "min": np.minimum,
+    "max": np.maximum,
+}
+_ARITHMETIC = {"+", "-", "*", "/", "min", "max"}
+_COMPARISONS = {"<", "<=", ">", ">=", "==", "!="}
+# 规范化：交换律运算的操作数按固定顺序排列，> / >= 改写为 < / <=
+_COMMUTATIVE = {"+", "*", "==", "!=", "and", "or", "min", "max"}
+_FLIPPED = {">": "<", ">=": "<="}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<number>\d+\.?\d*|\.\d+)|(?P<name>[A-Za-z_]\w*)|(?P<op><=|>=|==|!=|[<>+\-*/(),]))"
+)
+
+
+class ExpressionError(ValueError):
+    """表达式语法或类型错误"""
+
+    def __init__(self, message: str, text: str = "", position: Optional[int] = None):
+        if position is not None:
+            message = f"{message}（{text!r} 第 {position + 1} 个字符）"
+        super().__init__(message)
+
+
+class _Token(NamedTuple):
+    kind: str
+    value: str
+    position: int
+
+
+def _tokenize(text: str) -> List[_Token]:
+    tokens = []
+    position = 0
+    end = len(text.rstrip())
+    while position < end:
+        match = _TOKEN.match(text, position)
+        if match is None:
+            position += len(text[position:]) - len(text[position:].lstrip())
+            raise ExpressionError(f"无法识别的字符 {text[position]!r}", text, position)
+        kind = match.lastgroup
+        tokens.append(_Token(kind, match.group(kind), match.start(kind)))
+        position = match.end()
+    tokens.append(_Token("end", "", end))
+    return tokens
+
+
+class _Parser:
+    """
+    递归下降解析器
+
+        or_expr    := and_expr ("or" and_expr)*
+        and_expr   := not_expr ("and" not_expr)*
+        not_expr   := "not" not_expr | comparison
+        comparison := sum (比较运算 sum)?
+        sum        := product (("+" | "-") product)*
+        product    := unary (("*" | "/") unary)*
+        unary      := "-" unary | 数字 | 字段 | 函数 "(" 参数 ")" | "(" or_expr ")"
+
+    每个规则返回 (节点, 类型)，类型为 "num" 或 "bool"。
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.index = 0
+
+    def parse(self) -> Tuple[Node, str]:
+        result = self._or()
+        token = self._peek()
+        if token.kind != "end":
+            raise self._error(f"多余的内容 {token.value!r}", token)
+        return result
+
+    def _peek(self) -> _Token:
+        return self.tokens[self.index]
+
+    def _next(self) -> _Token:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def _accept(self, *values: str) -> Optional[_Token]:
+        token = self._peek()
+        if token.kind in ("op", "name") and token.value in values:
+            self.index += 1
+            return token
+        return None
+
+    def _expect(self, value: str) -> _Token:
+        token = self._next()
+        if token.value != value or token.kind not in ("op", "name"):
+            raise self._error(f"应为 {value!r}，实际为 {token.value or '结尾'!r}", token)
+        return token
+
+    def _error(self, message: str, token: _Token) -> ExpressionError:
+        return ExpressionError(message, self.text, token.position)
+
+    def _check(self, operand: Tuple[Node, str], kind: str, token: _Token) -> Node:
+        node, actual = operand
+        if actual != kind:
+            expected = "条件（比较或 and/or 组合）" if kind == "bool" else "数值"
+            raise self._error(f"{token.value!r} 的操作数应为{expected}", token)
+        return node
+
+    def _or(self) -> Tuple[Node, str]:
+        left = self._and()
+        while True:
+            token = self._accept("or")
+            if token is None:
+                return left
+            left = (_binary("or", self._check(left, "bool", token), self._check(self._and(), "bool", token)), "bool")
+
+    def _and(self) -> Tuple[Node, str]:
+        left = self._not()
+        while True:
+            token = self._accept("and")
+            if token is None:
+                return left
+            left = (_binary("and", self._check(left, "bool", token), self._check(self._not(), "bool", token)), "bool")
+
+    def _not(self) -> Tuple[Node, str]:
+        token = self._accept("not")
+        if token is None:
+            return self._comparison()
+        return ("not", self._check(self._not(), "bool", token)), "bool"
+
+    def _comparison(self) -> Tuple[Node, str]:
+        left = self._sum()
+        token = self._accept(*_COMPARISONS)
+        if token is None:
+            return left
+        right = self._sum()
+        return _binary(token.value, self._check(left, "num", token), self._check(right, "num", token)), "bool"
+
+    def _sum(self) -> Tuple[Node, str]:
+        left = self._product()
+        while True:
+            token = self._accept("+", "-")
+            if token is None:
+                return left
+            right = self._product()
+            left = (_binary(token.value, self._check(left, "num", token), self._check(right, "num", token)), "num")
+
+    def _product(self) -> Tuple[Node, str]:
+        left = self._unary()
+        while True:
+            token = self._accept("*", "/")
+            if token is None:
+                return left
+            right = self._unary()
+            left = (_binary(token.value, self._check(left, "num", token), self._check(right, "num", token)), "num")
+
+    def _unary(self) -> Tuple[Node, str]:
+        token = self._accept("-")
+        if token is not None:
+            return _unary("neg", self._check(self._unary(), "num", token)), "num"
+
+        token = self._next()
+        if token.kind == "number":
+            return ("num", _number(token.value)), "num"
+        if token.kind == "op" and token.value == "(":
+            result = self._or()
+            self._expect(")")
+            return result
+        if token.kind == "name" and token.value not in ("and", "or", "not"):
+            if self._accept("("):
+                return self._call(token)
+            if token.value in FIELDS:
+                return ("field", token.value), "num"
+            raise self._error(f"未知的名称 {token.value!r}，可用字段: {', '.join(FIELDS)}", token)
+        raise self._error(f"意外的 {token.value or '结尾'!r}", token)
+
+    def _call(self, name: _Token) -> Tuple[Node, str]:
+        args: List[Tuple[Node, str]] = []
+        if not self._accept(")"):
+            args.append(self._or())
+            while self._accept(","):
+                args.append(self._or())
+            self._expect(")")
+
+        function = name.value
+        if function in FUNCTIONS:
+            return self._indicator(name, args), "num"
+
+        if function not in SPECIAL_FUNCTIONS:
+            names = ", ".join(list(FUNCTIONS) + list(SPECIAL_FUNCTIONS))
+            raise self._error(f"未知的函数 {function!r}，可用函数: {names}", name)
+
+        low, high = SPECIAL_FUNCTIONS[function]
+        if not low <= len(args) <= high:
+            raise self._error(f"{function} 需要 {low}-{high} 个参数，实际为 {len(args)} 个", name)
+
+        if function == "prev":
+            periods = self._constant(args[1], name, integer=True) if len(args) > 1 else 1
+            if periods < 1:
+                raise self._error("prev 的周期必须大于 0", name)
+            node, kind = args[0]
+            return _prev(node, periods), kind
+
+        operands = [self._check(arg, "num", name) for arg in args]
+        if function == "abs":
+            return _unary("abs", operands[0]), "num"
+        if function in ("min", "max"):
+            return _binary(function, *operands), "num"
+
+        # cross_above(a, b): 本根 a > b 且上一根 a <= b
+        a, b = operands
+        if function == "cross_above":
+            now, before = _binary(">", a, b), _binary("<=", _prev(a, 1), _prev(b, 1))
+        else:
+            now, before = _binary("<", a, b), _binary(">=", _prev(a, 1), _prev(b, 1))
+        return _binary("and", now, before), "bool"
+
+    def _indicator(self, name: _Token, args: List[Tuple[Node, str]]) -> Node:
+        indicator, defaults, component = FUNCTIONS[name.value]
+        if len(args) > len(defaults):
+            raise self._error(f"{name.value} 最多 {len(defaults)} 个参数，实际为 {len(args)} 个", name)
+
+        params = []
+        for i, default in enumerate(defaults):
+            if i < len(args):
+                params.append(self._constant(args[i], name))
+            elif default is None:
+                raise self._error(f"{name.value} 缺少第 {i + 1} 个参数", name)
+            else:
+                params.append(default)
+        # 周期类参数在内核中用作窗口长度，整数值统一为 int
+        params = tuple(int(p) if float(p).is_integer() else p for p in params)
+        if any(p <= 0 for p in params):
+            raise self._error(f"{name.value} 的参数必须大于 0", name)
+        return ("ind", indicator, params, component)
+
+    def _constant(self, arg: Tuple[Node, str], name: _Token, integer: bool = False):
+        node, _ = arg
+        if node[0] != "num" or (integer and not float(node[1]).is_integer()):
+            kind = "整数" if integer else "数字"
+            raise self._error(f"{name.value} 的参数必须是{kind}常量", name)
+        return int(node[1]) if integer else node[1]
+
+
+def _number(text: str):
+    return float(text) if "." in text else int(text)
+
+
+def _unary(op: str, child: Node) -> Node:
+    if child[0] == "num" and op in ("neg", "abs"):
+        return ("num", _UNARY[op](child[1]).item())
+    return (op, child)
+
+
+def _binary(op: str, left: Node, right: Node) -> Node:
+    if op in _FLIPPED:
+        op, left, right = _FLIPPED[op], right, left
+    if op in _ARITHMETIC and left[0] == "num" and right[0] == "num":
+        with np.errstate(all="ignore"):
+            value = _BINARY[op](np.float64(left[1]), np.float64(right[1])).item()
+        if not np.isfinite(value):
+            raise ExpressionError(f"常量运算结果无效: {left[1]} {op} {right[1]}")
+        return ("num", value)
+    if op in _COMMUTATIVE and repr(right) < repr(left):
+        left, right = right, left
+    return (op, left, right)
+
+
+def _prev(node: Node, periods: int) -> Node:
+    if node[0] == "num":
+        return node
+    if node[0] == "prev":
+        return ("prev", node[1], node[2] + periods)
+    return ("prev", node, periods)
+
+
+def _children(node: Node) -> Tuple[Node, ...]:
+    op = node[0]
+    if op in ("num", "field", "ind"):
+        return ()
+    if op == "prev":
+        return (node[1],)
+    return node[1:]
+
+
+def parse(text: str, kind: Optional[str] = None) -> Node:
+    """
+    解析表达式
+
+    Args:
+        text: 表达式文本
+        kind: 要求的结果类型，"bool"（条件）或 "num"（数值），None 表示不限
+
+    Returns:
+        规范化的语法树
+
+    Raises:
+        ExpressionError: 语法或类型错误
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise ExpressionError("表达式为空")
+
+    node, actual = _Parser(text).parse()
+    if kind is not None and actual != kind:
+        expected = "条件（比较或 and/or 组合）" if kind == "bool" else "数值"
+        raise ExpressionError(f"表达式 {text!r} 的结果应为{expected}")
+    return node
+
+
+def lookback(node: Node) -> int:
+    """表达式产生有效值所需的最少 K 线数"""
+    op = node[0]
+    if op == "num":
+        return 0
+    if op == "field":
+        return 1
+    if op == "ind":
+        return _indicator_lookback(node[1], node[2], node[3])
+    if op == "prev":
+        return lookback(node[1]) + node[2]
+    return max(lookback(child) for child in _children(node))
+
+
+def _indicator_lookback(name: str, params: Tuple, component: Optional[int]) -> int:
+    if name == "macd":
+        _, slow, signal = params
+        return slow if component == 0 else slow + signal - 1
+    period = params[0]
+    if name in ("rsi", "volume_ratio"):
+        return period + 1
+    return period
+
+
+def fields_used(node: Node) -> Set[str]:
+    """表达式用到的行情字段"""
+    if node[0] == "field":
+        return {node[1]}
+    if node[0] == "ind":
+        return set(KERNELS[node[1]][0])
+    return set().union(*(fields_used(child) for child in _children(node)))
+
+
+class ExpressionPlan:
+    """
+    表达式求值计划
+
+    节点按拓扑序保存，结构相同（规范化后）的子表达式只占一个节点；每个步骤用
+    下标引用子节点的结果，求值时依次计算，每个节点只计算一次。
+    """
+
+    def __init__(self):
+        self.nodes: List[Node] = []
+        self._steps: List[tuple] = []
+        self._ids: Dict[Node, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add(self, node: Node) -> int:
+        """加入表达式（已存在时复用），返回结果节点的下标"""
+        node_id = self._ids.get(node)
+        if node_id is not None:
+            return node_id
+
+        child_ids = tuple(self.add(child) for child in _children(node))
+        op = node[0]
+        if op in ("num", "field", "ind"):
+            step = node
+        elif op == "prev":
+            step = ("prev", child_ids[0], node[2])
+        else:
+            step = (op,) + child_ids
+
+        node_id = len(self.nodes)
+        self.nodes.append(node)
+        self._steps.append(step)
+        self._ids[node] = node_id
+        return node_id
+
+    def required(self, targets: Iterable[int]) -> Set[int]:
+        """计算 targets 需要的全部节点"""
+        needed = set(targets)
+        for node_id in range(len(self._steps) - 1, -1, -1):
+            if node_id in needed:
+                step = self._steps[node_id]
+                if step[0] == "prev":
+                    needed.add(step[1])
+                elif step[0] in _UNARY or step[0] in _BINARY:
+                    needed.update(step[1:])
+        return needed
+
+    def evaluate(
+        self, source, targets: Optional[Iterable[int]] = None, values: Optional[List] = None
+    ) -> List:
+        """
+        在指标来源上求值
+
+        Args:
+            source: 单只股票的 FrameSource 或矩阵上的 PanelContext
+            targets: 只计算这些节点及其依赖，None 表示全部
+            values: 之前在同一来源上的求值结果，已计算的节点直接复用并在原列表上补充
+
+        Returns:
+            按节点下标排列的结果，未计算的节点为 None
+        """
+        needed = None if targets is None else self.required(targets)
+        if values is None:
+            values = [None] * len(self._steps)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for node_id, step in enumerate(self._steps):
+                if values[node_id] is None and (needed is None or node_id in needed):
+                    values[node_id] = _evaluate_step(step, values, source)
+        return values
+
+    def evaluate_frame(self, data: pd.DataFrame, targets: Iterable[int], cache=None) -> List:
+        """
+        在单只股票上求值 targets 及其依赖
+
+        已计算的节点结果以计划本身为键存入指标缓存，共享计划的各策略对同一只股票
+        每个节点只求值一次；只计算调用方需要的节点，其他策略用到、而这只股票缺少的
+        字段不会影响调用方。
+        """
+        values = cached_compute(
+            data, "expression_plan", (self, len(self._steps)), lambda: [None] * len(self._steps), cache
+        )
+        return self.evaluate(FrameSource(data, cache), targets, values)
+
+
+def _evaluate_step(step: tuple, values: List, source):
+    op = step[0]
+    if op == "num":
+        return step[1]
+    if op == "field":
+        return source.field(step[1])
+    if op == "ind":
+        _, name, params, component = step
+        value = source.indicator(name, *params)
+        if component is not None:
+            value = value[component]
+        return np.asarray(value, dtype=np.float64)
+    if op == "prev":
+        return _shift(values[step[1]], step[2])
+    if op in _UNARY:
+        return _UNARY[op](values[step[1]])
+    return _BINARY[op](values[step[1]], values[step[2]])
+
+
+def _shift(values, periods: int):
+    """prev 的实现：条件向后移动后开头为 False，数值为 NaN"""
+    if np.ndim(values) == 0:
+        return values
+    if values.dtype == bool:
+        out = np.zeros_like(values)
+        if periods < len(values):
+            out[periods:] = values[:-periods]
+        return out
+    return kernels.shift(values, periods)
+
+
+class MessageTemplate:
+    """
+    信号消息模板，花括号中可以写数值表达式并带格式说明，如
+
+        价格 {close:.2f} 低于 20 日均线 {ma(20):.2f}，RSI {rsi(14):.1f}
+
+    表达式取最新一根 K 线的值。
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts: List[Tuple[str, Optional[Node], str]] = []
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise ExpressionError(f"消息模板 {text!r} 无效: {e}") from e
+
+        for literal, field, spec, _ in parsed:
+            if field == "":
+                raise ExpressionError(f"消息模板 {text!r} 中有空的占位符")
+            self.parts.append((literal, parse(field) if field is not None else None, spec or ""))
+
+    def nodes(self) -> List[Node]:
+        return [node for _, node, _ in self.parts if node is not None]
+
+    def bind(self, plan: ExpressionPlan) -> List[Optional[int]]:
+        """把占位符表达式编译进 plan，返回各部分对应的节点下标"""
+        return [None if node is None else plan.add(node) for _, node, _ in self.parts]
+
+    def render(self, node_ids: List[Optional[int]], values: List) -> str:
+        """用求值结果生成消息，格式说明无效时原样返回模板"""
+        pieces = []
+        try:
+            for (literal, _, spec), node_id in zip(self.parts, node_ids):
+                pieces.append(literal)
+                if node_id is not None:
+                    pieces.append(format(_latest(values[node_id]), spec))
+        except (TypeError, ValueError):
+            logger.warning(f"信号模板无效: {self.text}")
+            return self.text
+        return "".join(pieces)
+
+
+def _latest(value):
+    """最新一根 K 线的值"""
+    return value.item() if np.ndim(value) == 0 else value[-1].item()
+
+
+class ExpressionStrategy(Strategy):
+    """
+    表达式策略
+
+    配置示例：
+
+        {
+          "name": "超卖",
+          "type": "expression",
+          "params": {
+            "signals": {
+              "oversold_below_ma20": {
+                "when": "close < ma(20) and rsi(14) < 30",
+                "message": "价格 {close:.2f} 低于 20 日均线 {ma(20):.2f}，RSI {rsi(14):.1f}"
+              },
+              "volume_up": "volume_ratio(20) > 2 and close > prev(close)"
+            }
+          }
+        }
+
+    信号可以只写条件（省略 message 时消息为条件本身）。表达式在创建策略时解析，
+    语法错误会抛出 ValueError。
+    """
+
+    def __init__(self, config: Dict = None):
+        super().__init__("expression", config)
+        signals = self.config.get("params", {}).get("signals", {})
+        if not isinstance(signals, dict) or not signals:
+            raise ValueError(f"表达式策略 {self.label} 未配置 params.signals")
+
+        # 信号标识 -> (条件, 消息模板)
+        self.rules: Dict[str, Tuple[Node, MessageTemplate]] = {}
+        for signal_id, rule in signals.items():
+            if isinstance(rule, str):
+                rule = {"when": rule}
+            try:
+                if not isinstance(rule, dict) or "when" not in rule:
+                    raise ExpressionError("应为条件字符串或包含 when 的对象")
+                condition = parse(rule["when"], kind="bool")
+                message = rule.get("message", f"满足条件: {rule['when']}".replace("{", "{{").replace("}", "}}"))
+                self.rules[signal_id] = (condition, MessageTemplate(message))
+            except ExpressionError as e:
+                raise ValueError(f"策略 {self.label} 的信号 {signal_id} 无效: {e}") from e
+
+        conditions = [condition for condition, _ in self.rules.values()]
+        self.min_history = max(1, max(lookback(condition) for condition in conditions))
+        self.fields = sorted(set().union(*(fields_used(node) for node in self.expressions())))
+        self.bind(ExpressionPlan())
+
+    def expressions(self) -> List[Node]:
+        """条件和消息模板中的全部表达式"""
+        nodes = []
+        for condition, message in self.rules.values():
+            nodes.append(condition)
+            nodes.extend(message.nodes())
+        return nodes
+
+    def bind(self, plan: ExpressionPlan) -> None:
+        """把表达式编译进 plan，多个策略可以共享同一个计划"""
+        self.plan = plan
+        self._conditions = {signal_id: plan.add(condition) for signal_id, (condition, _) in self.rules.items()}
+        self._messages = {signal_id: message.bind(plan) for signal_id, (_, message) in self.rules.items()}
+        self._targets = set(self._conditions.values()) | {
+            node_id for node_ids in self._messages.values() for node_id in node_ids if node_id is not None
+        }
+
+    def analyze(self, data: pd.DataFrame) -> Optional[List[str]]:
+        """分析股票，返回最新一根 K 线满足条件的信号"""
+        return signal_messages(self.detect(data))
+
+    def detect(self, data: pd.DataFrame) -> Optional[List[Signal]]:
+        """分析股票，返回最新一根 K 线满足条件的 (信号标识, 消息)"""
+        if data is None or len(data) < self.min_history:
+            return None
+
+        missing = [field for field in self.fields if field not in data.columns]
+        if missing:
+            logger.error(f"数据缺少 {missing} 列，无法执行策略 {self.label}")
+            return None
+
+        values = self.plan.evaluate_frame(data, self._targets, self.indicator_cache)
+        signals = [
+            (signal_id, self.rules[signal_id][1].render(self._messages[signal_id], values))
+            for signal_id, node_id in self._conditions.items()
+            if _latest(values[node_id])
+        ]
+        return signals if signals else None
+
+    def signal_matrix(
+        self, closes: np.ndarray, context: Optional[PanelContext] = None
+    ) -> Dict[str, np.ndarray]:
+        """每个日期的信号，只计算条件用到的节点"""
+        context = context or PanelContext(closes)
+        enough_history = context.lengths >= self.min_history
+        values = self.plan.evaluate(context, self._conditions.values())
+        return {signal_id: enough_history & values[node_id] for signal_id, node_id in self._conditions.items()}
+
+
+def share_plan(strategies: List[Strategy]) -> Optional[ExpressionPlan]:
+    """
+    把所有表达式策略编译进同一个求值计划，跨策略消除公共子表达式
+
+    Returns:
+        共享的计划，没有表达式策略时返回 None
+    """
+    expression_strategies = [s for s in strategies if isinstance(s, ExpressionStrategy)]
+    if not expression_strategies:
+        return None
+
+    separate = sum(len(s.plan) for s in expression_strategies)
+    plan = ExpressionPlan()
+    for strategy in expression_strategies:
+        strategy.bind(plan)
+
+    logger.info(
+        f"{len(expression_strategies)} 个表达式策略编译为 {len(plan)} 个计算节点（合并前 {separate} 个）"
+    )
+    return plan
+
+
+StrategyFactory.register("expression", ExpressionStrategy)
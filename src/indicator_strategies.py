@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+指标策略模块 - 基于 NumPy 指标内核的 RSI / MACD / 布林带 / ATR / 成交量突破策略
+
+每个策略只定义一次信号规则（evaluate），同一份规则既可以作用于单只股票的序列
+（analyze，指标经由共享的 IndicatorCache 计算），也可以作用于 (日期 × 股票)
+矩阵（signal_matrix，指标由 PanelContext 缓存），两条路径结果一致。
+"""
+
+import logging
+from abc import abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import kernels
+from .indicators import FrameSource, PanelContext
+from .strategies import Signal, Strategy, StrategyFactory, signal_messages
+
+logger = logging.getLogger(__name__)
+
+# 信号标识 -> (触发掩码, 消息中显示的值)
+Evaluation = Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+
+class IndicatorStrategy(Strategy):
+    """
+    指标策略基类
+
+    子类声明需要的行情字段（FIELDS）、默认参数（DEFAULT_PARAMS）和信号消息模板
+    （DEFAULT_SIGNALS），并实现 evaluate。消息模板可以引用参数名、{value}（指标值）
+    和 {price}（最新收盘价），配置中的 params.signals 可覆盖默认模板。
+    """
+
+    FIELDS: Sequence[str] = ("close",)
+    DEFAULT_PARAMS: Dict = {}
+    DEFAULT_SIGNALS: Dict[str, str] = {}
+
+    def __init__(self, name: str, config: Dict = None):
+        super().__init__(name, config)
+        params = self.config.get("params", {})
+        self.params = {key: params.get(key, default) for key, default in self.DEFAULT_PARAMS.items()}
+        self.signals_config = params.get("signals", {})
+
+    @property
+    def fields(self) -> Sequence[str]:
+        """需要的行情字段"""
+        return self.FIELDS
+
+    @property
+    def min_history(self) -> int:
+        """产生信号所需的最少 K 线数"""
+        return 1
+
+    @abstractmethod
+    def evaluate(self, source) -> Evaluation:
+        """
+        在指标来源上计算信号
+
+        Args:
+            source: 单只股票的 FrameSource 或矩阵上的 PanelContext
+
+        Returns:
+            信号标识 -> (触发掩码, 消息中显示的值)，形状与行情相同
+        """
+        pass
+
+    def analyze(self, data: pd.DataFrame) -> Optional[List[str]]:
+        """分析股票，返回最新一根 K 线触发的信号"""
+        return signal_messages(self.detect(data))
+
+    def detect(self, data: pd.DataFrame) -> Optional[List[Signal]]:
+        """分析股票，返回最新一根 K 线触发的 (信号标识, 消息)"""
+        if data is None or len(data) < self.min_history:
+            return None
+
+        missing = [field for field in self.fields if field not in data.columns]
+        if missing:
+            logger.error(f"数据缺少 {missing} 列，无法执行策略 {self.label}")
+            return None
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            evaluation = self.evaluate(FrameSource(data, self.indicator_cache))
+
+        price = float(data["close"].iloc[-1])
+        signals = [
+            (signal_id, self.format_signal(signal_id, values[-1], price))
+            for signal_id, (mask, values) in evaluation.items()
+            if mask[-1]
+        ]
+        return signals if signals else None
+
+    def signal_matrix(
+        self, closes: np.ndarray, context: Optional[PanelContext] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        每个日期的信号
+
+        需要收盘价以外字段的策略（ATR、成交量突破）要通过 context 提供这些字段的矩阵。
+        """
+        context = context or PanelContext(closes)
+        enough_history = context.lengths >= self.min_history
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {
+                signal_id: enough_history & mask
+                for signal_id, (mask, _) in self.evaluate(context).items()
+            }
+
+    def format_signal(self, signal_id: str, value: float, price: float) -> str:
+        """生成信号消息，模板格式错误时原样返回模板"""
+        template = self.signals_config.get(signal_id, self.DEFAULT_SIGNALS.get(signal_id, signal_id))
+        try:
+            return template.format(value=value, price=price, **self.params)
+        except (KeyError, IndexError, ValueError):
+            logger.warning(f"策略 {self.label} 的信号模板无效: {template}")
+            return template
+
+
+class RSIStrategy(IndicatorStrategy):
+    """RSI 超买超卖策略（Wilder 平滑）"""
+
+    DEFAULT_PARAMS = {"period": 14, "oversold": 30, "overbought": 70}
+    DEFAULT_SIGNALS = {
+        "oversold": "RSI{period} ({value:.2f}) 低于 {oversold} - 超卖",
+        "overbought": "RSI{period} ({value:.2f}) 高于 {overbought} - 超买",
+    }
+
+    def __init__(self, config: Dict = None):
+        super().__init__("rsi", config)
+
+    @property
+    def min_history(self) -> int:
+        return self.params["period"] + 1
+
+    def evaluate(self, source) -> Evaluation:
+        rsi = source.indicator("rsi", self.params["period"])
+        return {
+            "oversold": (rsi < self.params["oversold"], rsi),
+            "overbought": (rsi > self.params["overbought"], rsi),
+        }
+
+
+class MACDStrategy(IndicatorStrategy):
+    """MACD 金叉死叉策略：柱状图由负转正为金叉，由正转负为死叉"""
+
+    DEFAULT_PARAMS = {"fast": 12, "slow": 26, "signal": 9}
+    DEFAULT_SIGNALS = {
+        "golden_cross": "MACD 金叉 (DIF {value:.3f})",
+        "death_cross": "MACD 死叉 (DIF {value:.3f})",
+    }
+
+    def __init__(self, config: Dict = None):
+        super().__init__("macd", config)
+
+    @property
+    def min_history(self) -> int:
+        # 信号线第一个有效值在第 slow + signal - 1 根，判断交叉还需要前一根
+        return self.params["slow"] + self.params["signal"]
+
+    def evaluate(self, source) -> Evaluation:
+        line, _, histogram = source.indicator(
+            "macd", self.params["fast"], self.params["slow"], self.params["signal"]
+        )
+        previous = kernels.shift(histogram)
+        return {
+            "golden_cross": ((previous <= 0) & (histogram > 0), line),
+            "death_cross": ((previous >= 0) & (histogram < 0), line),
+        }
+
+
+class BollingerStrategy(IndicatorStrategy):
+    """布林带突破策略：收盘价跌破下轨或突破上轨"""
+
+    DEFAULT_PARAMS = {"period": 20, "num_std": 2.0}
+    DEFAULT_SIGNALS = {
+        "break_lower": "价格 ({price:.2f}) 跌破布林带下轨 ({value:.2f})",
+        "break_upper": "价格 ({price:.2f}) 突破布林带上轨 ({value:.2f})",
+    }
+
+    def __init__(self, config: Dict = None):
+        super().__init__("bollinger", config)
+
+    @property
+    def min_history(self) -> int:
+        return self.params["period"]
+
+    def evaluate(self, source) -> Evaluation:
+        close = source.field("close")
+        upper, _, lower = source.indicator("bollinger", self.params["period"], self.params["num_std"])
+        return {
+            "break_lower": (close < lower, lower),
+            "break_upper": (close > upper, upper),
+        }
+
+
+class ATRStrategy(IndicatorStrategy):
+    """ATR 波动突破策略：单日涨跌幅超过前一日 ATR 的 multiplier 倍"""
+
+    FIELDS = ("high", "low", "close")
+    DEFAULT_PARAMS = {"period": 14, "multiplier": 2.0}
+    DEFAULT_SIGNALS = {
+        "range_breakout_up": "价格 ({price:.2f}) 向上突破 {multiplier} 倍 ATR{period} ({value:.2f})",
+        "range_breakout_down": "价格 ({price:.2f}) 向下突破 {multiplier} 倍 ATR{period} ({value:.2f})",
+    }
+
+    def __init__(self, config: Dict = None):
+        super().__init__("atr", config)
+
+    @property
+    def min_history(self) -> int:
+        return self.params["period"] + 1
+
+    def evaluate(self, source) -> Evaluation:
+        close = source.field("close")
+        previous_atr = kernels.shift(source.indicator("atr", self.params["period"]))
+        previous_close = kernels.shift(close)
+        band = self.params["multiplier"] * previous_atr
+        return {
+            "range_breakout_up": (close > previous_close + band, previous_atr),
+            "range_breakout_down": (close < previous_close - band, previous_atr),
+        }
+
+
+class VolumeBreakoutStrategy(IndicatorStrategy):
+    """放量突破策略：成交量超过前 period 日均量的 multiplier 倍，按当日涨跌区分方向"""
+
+    FIELDS = ("close", "volume")
+    DEFAULT_PARAMS = {"period": 20, "multiplier": 2.0}
+    DEFAULT_SIGNALS = {
+        "volume_up": "放量上涨：成交量为 {period} 日均量的 {value:.1f} 倍",
+        "volume_down": "放量下跌：成交量为 {period} 日均量的 {value:.1f} 倍",
+    }
+
+    def __init__(self, config: Dict = None):
+        super().__init__("volume_breakout", config)
+
+    @property
+    def min_history(self) -> int:
+        return self.params["period"] + 1
+
+    def evaluate(self, source) -> Evaluation:
+        close = source.field("close")
+        ratio = source.indicator("volume_ratio", self.params["period"])
+        change = kernels.diff(close)
+        surge = ratio > self.params["multiplier"]
+        return {
+            "volume_up": (surge & (change > 0), ratio),
+            "volume_down": (surge & (change < 0), ratio),
+        }
+
+
+StrategyFactory.register("rsi", RSIStrategy)
+StrategyFactory.register("macd", MACDStrategy)
+StrategyFactory.register("bollinger", BollingerStrategy)
+StrategyFactory.register("atr", ATRStrategy)
+StrategyFactory.register("volume_breakout", VolumeBreakoutStrategy)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""技术指标模块 - 指标计算函数和跨策略共享的指标缓存"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import kernels
+
+logger = logging.getLogger(__name__)
+
+
+def sma(data: pd.DataFrame, period: int) -> pd.Series:
+    """简单移动平均序列"""
+    return data["close"].rolling(window=period).mean()
+
+
+def sma_last(data: pd.DataFrame, period: int) -> float:
+    """
+    最新一根 K 线的简单移动平均值
+
+    只读取最近 period 个收盘价；倒序累加的求和顺序与 MovingAverageStrategy
+    的截面计算一致，两条路径结果逐位相同。
+    """
+    tail = data["close"].to_numpy(dtype=np.float64)[-period:]
+    if len(tail) < period:
+        return np.nan
+    return np.cumsum(tail[::-1])[-1] / period
+
+
+class WindowSums:
+    """
+    沿第 0 轴（日期）的前缀和
+
+    预计算一次后，任意窗口长度的滑动均值都只需两次相减，适合同一份数据
+    计算多个周期（回测、参数扫描）。values 可以是一维序列或 (日期 × 股票) 矩阵。
+    """
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(values)
+        head = np.zeros((1,) + values.shape[1:])
+
+        self.length = values.shape[0]
+        self.shape = values.shape
+        self.sums = np.concatenate([head, np.cumsum(np.where(missing, 0.0, values), axis=0)])
+        self.missing = np.concatenate(
+            [head.astype(np.int32), np.cumsum(missing, axis=0, dtype=np.int32)]
+        )
+
+    def mean(self, period: int) -> np.ndarray:
+        """滑动均值；前 period-1 行以及窗口内含 NaN 时为 NaN（与 pandas rolling 一致）"""
+        out = np.full(self.shape, np.nan)
+        if period > self.length:
+            return out
+
+        window = self.sums[period:] - self.sums[:-period]
+        missing = self.missing[period:] - self.missing[:-period]
+        out[period - 1:] = np.where(missing > 0, np.nan, window / period)
+        return out
+
+
+def history_lengths(values: np.ndarray) -> np.ndarray:
+    """每个日期上各股票已有的历史长度（从第一个有效值起算），与 values 同形状"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    first = np.where(valid.any(axis=0), np.argmax(valid, axis=0), values.shape[0])
+    rows = np.arange(values.shape[0]).reshape((-1,) + (1,) * (values.ndim - 1))
+    return np.maximum(rows - first + 1, 0)
+
+
+class PanelContext:
+    """
+    (日期 × 股票) 行情矩阵上可在多个策略/参数间共享的中间结果
+
+    前缀和与历史长度只计算一次，各周期的均线和 KERNELS 中的指标按需计算并缓存。
+    """
+
+    def __init__(self, closes: np.ndarray, fields: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Args:
+            closes: 收盘价矩阵
+            fields: 其他字段（open/high/low/volume）的矩阵，与 closes 同形状
+        """
+        self.closes = np.asarray(closes, dtype=np.float64)
+        self.fields = {name: np.asarray(values, dtype=np.float64) for name, values in (fields or {}).items()}
+        self.fields["close"] = self.closes
+        self.sums = WindowSums(self.closes)
+        self.lengths = history_lengths(self.closes)
+        self._means: Dict[int, np.ndarray] = {}
+        self._indicators: Dict[Tuple, Any] = {}
+
+    def mean(self, period: int) -> np.ndarray:
+        """period 日滑动均值矩阵"""
+        if period not in self._means:
+            self._means[period] = self.sums.mean(period)
+        return self._means[period]
+
+    def field(self, name: str) -> np.ndarray:
+        """字段矩阵"""
+        if name not in self.fields:
+            raise ValueError(f"缺少字段: {name}")
+        return self.fields[name]
+
+    def indicator(self, name: str, *params) -> Any:
+        """KERNELS 中的指标矩阵，同一 (指标, 参数) 只计算一次"""
+        key = (name, params)
+        if key not in self._indicators:
+            if name == "sma":
+                self._indicators[key] = self.mean(*params)
+            else:
+                fields, func = _kernel(name)
+                self._indicators[key] = func(*(self.field(field) for field in fields), *params)
+        return self._indicators[key]
+
+
+# 向量化指标：名称 -> (输入字段, 内核函数)，内核同时支持一维序列和 (日期 × 股票) 矩阵
+KERNELS: Dict[str, Tuple[Sequence[str], Callable[..., Any]]] = {
+    "sma": (("close",), kernels.rolling_mean),
+    "ema": (("close",), kernels.ema),
+    "rsi": (("close",), kernels.rsi),
+    "macd": (("close",), kernels.macd),
+    "bollinger": (("close",), kernels.bollinger),
+    "atr": (("high", "low", "close"), kernels.atr),
+    "volume_ratio": (("volume",), kernels.volume_ratio),
+}
+
+
+def _kernel(name: str) -> Tuple[Sequence[str], Callable[..., Any]]:
+    if name not in KERNELS:
+        raise KeyError(f"未知的指标: {name}")
+    return KERNELS[name]
+
+
+def _frame_kernel(name: str) -> Callable[..., Any]:
+    """把内核包装成 (data, *params) 形式的单只股票指标，返回 ndarray"""
+    fields, func = KERNELS[name]
+
+    def compute(data: pd.DataFrame, *params):
+        return func(*(data[field].to_numpy(dtype=np.float64) for field in fields), *params)
+
+    compute.__name__ = name
+    return compute
+
+
+# 指标注册表：名称 -> 计算函数 (data, *params)
+INDICATORS: Dict[str, Callable[..., Any]] = {
+    "sma": sma,
+    "sma_last": sma_last,
+}
+# sma 保留返回 Series 的 pandas 实现，其余内核按名称注册
+INDICATORS.update({name: _frame_kernel(name) for name in KERNELS if name not in INDICATORS})
+
+
+class IndicatorCache:
+    """
+    指标缓存
+
+    以 (股票代码, 指标名, 参数, 最新一行, 数据长度) 为键缓存计算结果，
+    同一次运行中多个策略请求同一指标时只计算一次；超过容量时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = max(1, int(maxsize))
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """命中时返回缓存值，否则计算并写入缓存"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # 计算放在锁外，避免阻塞其他线程
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getstate__(self) -> Dict:
+        # 发送到工作进程时只保留容量配置，缓存内容和锁不跨进程
+        return {"maxsize": self.maxsize}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(state["maxsize"])
+
+
+def compute_indicator(
+    data: pd.DataFrame,
+    name: str,
+    *params,
+    cache: Optional[IndicatorCache] = None,
+) -> Any:
+    """
+    计算指标，数据带有股票代码（data.attrs["code"]）且提供了缓存时复用缓存结果
+
+    Args:
+        data: 行情数据
+        name: 指标名（见 INDICATORS）
+        params: 指标参数
+        cache: 指标缓存
+
+    Returns:
+        指标计算结果
+    """
+    func = INDICATORS.get(name)
+    if func is None:
+        raise KeyError(f"未知的指标: {name}")
+
+    return cached_compute(data, name, params, lambda: func(data, *params), cache)
+
+
+def cached_compute(
+    data: pd.DataFrame,
+    name: str,
+    params: Tuple,
+    compute: Callable[[], Any],
+    cache: Optional[IndicatorCache] = None,
+) -> Any:
+    """
+    以 (股票代码, name, params, 最新一行, 数据长度) 为键缓存 compute() 的结果
+
+    键包含最新一行的全部字段（日期和价格），盘中重新下载或合并快照后最新一根
+    K 线被修正时不会命中旧结果。数据不带股票代码或未提供缓存时直接计算。
+    """
+    stock_code = data.attrs.get("code")
+    if cache is None or stock_code is None:
+        return compute()
+
+    last_row = tuple(data[column].iat[-1] for column in data.columns) if len(data) else ()
+    key = (stock_code, name, params, last_row, len(data))
+    return cache.get_or_compute(key, compute)
+
+
+class FrameSource:
+    """
+    单只股票的指标来源，接口与 PanelContext 的 field / indicator 相同
+
+    指标经由 compute_indicator 计算，提供缓存时在各策略间共享。
+    """
+
+    def __init__(self, data: pd.DataFrame, cache: Optional[IndicatorCache] = None):
+        self.data = data
+        self.cache = cache
+
+    def field(self, name: str) -> np.ndarray:
+        return self.data[name].to_numpy(dtype=np.float64)
+
+    def indicator(self, name: str, *params) -> Any:
+        return compute_indicator(self.data, name, *params, cache=self.cache)
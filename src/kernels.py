@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+指标内核模块 - 基于 NumPy 的向量化指标计算
+
+所有函数沿第 0 轴（日期）计算，输入可以是单只股票的一维序列，也可以是
+(日期 × 股票) 矩阵，输出与输入同形状，数据不足的位置为 NaN。开头的 NaN
+（历史较短的股票在矩阵中的填充）会被跳过，结果与对应的 pandas 写法一致。
+"""
+
+from typing import Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """向后移动 periods 行（等同 pandas shift），空出的位置为 NaN"""
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    if 0 < periods < len(values):
+        out[periods:] = values[:-periods]
+    return out
+
+
+def diff(values: np.ndarray) -> np.ndarray:
+    """与前一行的差（等同 pandas diff）"""
+    values = _as_float(values)
+    return values - shift(values)
+
+
+def rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """滑动均值（等同 pandas rolling(period).mean()），窗口内有 NaN 时为 NaN"""
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    if period <= len(values):
+        out[period - 1:] = sliding_window_view(values, period, axis=0).mean(axis=-1)
+    return out
+
+
+def rolling_std(values: np.ndarray, period: int, ddof: int = 0) -> np.ndarray:
+    """滑动标准差（等同 pandas rolling(period).std(ddof=ddof)）"""
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    if period <= len(values) and period > ddof:
+        out[period - 1:] = sliding_window_view(values, period, axis=0).std(axis=-1, ddof=ddof)
+    return out
+
+
+def ewm(values: np.ndarray, alpha: float, min_periods: int = 0) -> np.ndarray:
+    """
+    指数加权均值，等同 pandas ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean()
+
+    递推只能按日期顺序进行：一维序列用标量循环，矩阵在每个日期上对所有股票做一次向量运算。
+    """
+    values = _as_float(values)
+    if values.ndim == 1:
+        return _ewm_1d(values, alpha, max(int(min_periods), 1))
+
+    out = np.full(values.shape, np.nan)
+    weighted = np.full(values.shape[1:], np.nan)
+    old_weight = np.ones(values.shape[1:])
+    observations = np.zeros(values.shape[1:], dtype=np.int64)
+    min_periods = max(int(min_periods), 1)
+
+    for t in range(len(values)):
+        current = values[t]
+        observed = ~np.isnan(current)
+        observations += observed
+        started = ~np.isnan(weighted)
+
+        # 与 pandas 相同：已有均值时无论当前值是否缺失都衰减旧权重
+        old_weight = np.where(started, old_weight * (1 - alpha), old_weight)
+        update = started & observed
+        weighted = np.where(
+            update, (old_weight * weighted + alpha * current) / (old_weight + alpha), weighted
+        )
+        old_weight = np.where(update, 1.0, old_weight)
+        weighted = np.where(~started & observed, current, weighted)
+
+        out[t] = np.where(observations >= min_periods, weighted, np.nan)
+
+    return out
+
+
+def _ewm_1d(values: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    weighted = np.nan
+    old_weight = 1.0
+    observations = 0
+
+    for t, current in enumerate(values.tolist()):
+        observed = current == current
+        observations += observed
+        if weighted == weighted:
+            old_weight *= 1 - alpha
+            if observed:
+                weighted = (old_weight * weighted + alpha * current) / (old_weight + alpha)
+                old_weight = 1.0
+        elif observed:
+            weighted = current
+
+        if observations >= min_periods:
+            out[t] = weighted
+
+    return out
+
+
+def ema(values: np.ndarray, span: int, min_periods: int = 0) -> np.ndarray:
+    """指数移动平均，等同 pandas ewm(span=span, adjust=False).mean()"""
+    return ewm(values, 2.0 / (span + 1), min_periods)
+
+
+def wilder(values: np.ndarray, period: int) -> np.ndarray:
+    """Wilder 平滑（RSI / ATR 使用），等同 ewm(alpha=1/period, adjust=False, min_periods=period)"""
+    return ewm(values, 1.0 / period, period)
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """相对强弱指数（Wilder 平滑），前 period 个位置为 NaN"""
+    change = diff(close)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gain = wilder(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), period)
+        loss = wilder(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)), period)
+        return 100 - 100 / (1 + gain / loss)
+
+
+def macd(
+    close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD
+
+    Returns:
+        (MACD 线, 信号线, 柱状图)；慢线不足 slow 个数据、信号线不足 signal 个 MACD 值时为 NaN
+    """
+    line = ema(close, fast) - ema(close, slow, min_periods=slow)
+    signal_line = ema(line, signal, min_periods=signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(
+    close: np.ndarray, period: int = 20, num_std: float = 2.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    布林带（总体标准差）
+
+    Returns:
+        (上轨, 中轨, 下轨)
+    """
+    middle = rolling_mean(close, period)
+    width = num_std * rolling_std(close, period)
+    return middle + width, middle, middle - width
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """真实波幅，第一根 K 线（没有前收盘价）为最高价减最低价"""
+    high, low = _as_float(high), _as_float(low)
+    previous = shift(close)
+    with np.errstate(invalid="ignore"):
+        return np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """平均真实波幅（Wilder 平滑）"""
+    return wilder(true_range(high, low, close), period)
+
+
+def volume_ratio(volume: np.ndarray, period: int = 20) -> np.ndarray:
+    """成交量与前 period 日平均成交量之比（不含当日）"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return _as_float(volume) / shift(rolling_mean(volume, period))
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""运行指标模块 - 分阶段耗时、计数和分位数报告"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 报告中的分位数
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+# 报告中列出的最慢股票数
+SLOWEST_SYMBOLS = 10
+
+
+class RunMetrics:
+    """
+    一次运行的指标
+
+    阶段以 (stage, name) 为键，如 ("fetch", "")、("strategy", "均线策略")，
+    每次计时保存一个样本，报告时计算总耗时和分位数。
+    """
+
+    def __init__(self):
+        self.samples: Dict[Tuple[str, str], List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.symbol_seconds: Dict[str, float] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, name: str = "", symbol: Optional[str] = None) -> None:
+        """记录一次阶段耗时，给出 symbol 时同时累计到该股票的总耗时"""
+        with self._lock:
+            self.samples.setdefault((stage, name), []).append(seconds)
+            if symbol is not None:
+                self.symbol_seconds[symbol] = self.symbol_seconds.get(symbol, 0.0) + seconds
+
+    def incr(self, counter: str, value: int = 1) -> None:
+        """计数器加 value"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def report(self) -> Dict:
+        """
+        结构化报告
+
+        Returns:
+            {"elapsed_seconds", "stages": {阶段: 统计}, "counters", "slowest_symbols"}，
+            阶段名为 "stage" 或 "stage:name"
+        """
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self.samples.items()}
+            counters = dict(self.counters)
+            slowest = sorted(self.symbol_seconds.items(), key=lambda item: item[1], reverse=True)
+
+        stages = {}
+        for (stage, name), values in samples.items():
+            total = sum(values)
+            summary = {
+                "count": len(values),
+                "total_seconds": total,
+                "mean_ms": total / len(values) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+            for q in QUANTILES:
+                summary[f"p{int(q * 100)}_ms"] = _quantile(values, q) * 1000
+            stages[f"{stage}:{name}" if name else stage] = summary
+
+        return {
+            "elapsed_seconds": time.time() - self.started,
+            "stages": stages,
+            "counters": counters,
+            "slowest_symbols": [
+                {"code": code, "seconds": seconds} for code, seconds in slowest[:SLOWEST_SYMBOLS]
+            ],
+        }
+
+    def write(self, path: str, output_format: str = "json") -> None:
+        """
+        写入报告文件
+
+        Args:
+            path: 文件路径
+            output_format: "json" 或 "prometheus"（Prometheus 文本格式，可供 node_exporter textfile 收集）
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if output_format == "prometheus":
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.report(), ensure_ascii=False, indent=2)
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def to_prometheus(self, prefix: str = "marketpulse") -> str:
+        """Prometheus 文本格式：阶段耗时为 summary，计数器为 counter"""
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self.samples.items()}
+            counters = dict(self.counters)
+
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent per pipeline stage in the last run.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for (stage, name), values in sorted(samples.items()):
+            labels = f'stage="{_escape(stage)}",name="{_escape(name)}"'
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{{labels},quantile="{q}"}} {_quantile(values, q):.6f}')
+            lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {sum(values):.6f}")
+            lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {len(values)}")
+
+        for counter, value in sorted(counters.items()):
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            lines.append(f"{prefix}_{counter}_total {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+class _Timer:
+    """记录到 RunMetrics 的计时上下文"""
+
+    __slots__ = ("metrics", "stage", "name", "symbol", "start")
+
+    def __init__(self, metrics: RunMetrics, stage: str, name: str, symbol: Optional[str]):
+        self.metrics = metrics
+        self.stage = stage
+        self.name = name
+        self.symbol = symbol
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.metrics.record(self.stage, time.perf_counter() - self.start, self.name, self.symbol)
+
+
+class _NullTimer:
+    """未启用指标时使用的空计时上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+# 当前运行的指标，未启用时为 None；各模块通过 timer() / incr() 上报
+_active: Optional[RunMetrics] = None
+
+
+def timer(stage: str, name: str = "", symbol: Optional[str] = None):
+    """
+    阶段计时上下文，未启用指标时返回共享的空上下文，几乎没有开销
+
+    Args:
+        stage: 阶段，如 fetch、fallback、strategy、notify
+        name: 阶段内的细分，如策略名
+        symbol: 股票代码，用于统计最慢的股票
+    """
+    metrics = _active
+    if metrics is None:
+        return _NULL_TIMER
+    return _Timer(metrics, stage, name, symbol)
+
+
+def incr(counter: str, value: int = 1) -> None:
+    """计数器加 value，未启用指标时不做任何事"""
+    metrics = _active
+    if metrics is not None:
+        metrics.incr(counter, value)
+
+
+@contextmanager
+def collect(metrics: Optional[RunMetrics]) -> Iterator[Optional[RunMetrics]]:
+    """
+    在上下文内把 metrics 设为当前指标，metrics 为 None 时不收集
+
+    指标是进程级的：线程池中的获取和策略评估都会上报，进程池工作进程中的策略耗时不会。
+    """
+    global _active
+    previous, _active = _active, metrics
+    try:
+        yield metrics
+    finally:
+        _active = previous
+
+
+def _quantile(values: List[float], q: float) -> float:
+    """已排序样本的分位数（最近秩）"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _escape(value: str) -> str:
+    """Prometheus 标签值转义"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
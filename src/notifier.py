@@ -3,11 +3,17 @@
 
 """邮件和通知模块"""
 
+import atexit
 import logging
+import queue
 import smtplib
+import threading
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
+
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +31,7 @@ class EmailNotifier:
                 - receiver: 收件人邮箱
                 - smtp_server: SMTP 服务器地址
                 - smtp_port: SMTP 端口
+                - use_ssl: 是否使用 SMTP over SSL（默认 True）
                 - auth_code_env: 邮箱授权码环境变量名
         """
         self.config = email_config
@@ -32,6 +39,7 @@ class EmailNotifier:
         self.receiver = email_config.get("receiver", "")
         self.smtp_server = email_config.get("smtp_server", "smtp.qq.com")
         self.smtp_port = int(email_config.get("smtp_port", 465))
+        self.use_ssl = bool(email_config.get("use_ssl", True))
 
         # 从环境变量获取授权码
         import os
@@ -39,6 +47,10 @@ class EmailNotifier:
         auth_code_env = email_config.get("auth_code_env", "SMTP_AUTH_CODE")
         self.auth_code = os.getenv(auth_code_env, "")
 
+        # 持久化的 SMTP 会话，多次发送复用同一连接
+        self._server: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
+
         self._validate_config()
 
     def _validate_config(self) -> None:
@@ -81,12 +93,7 @@ class EmailNotifier:
 
             logger.info(f"发送邮件: {subject}")
 
-            # 连接 SMTP 服务器并发送
-            with smtplib.SMTP_SSL(
-                self.smtp_server, self.smtp_port, timeout=10
-            ) as server:
-                server.login(self.sender, self.auth_code)
-                server.sendmail(self.sender, self.receiver, msg.as_string())
+            self._deliver(msg.as_string())
 
             logger.info("邮件发送成功")
             return True
@@ -105,6 +112,189 @@ class EmailNotifier:
         """检查配置是否完整"""
         return bool(self.sender and self.receiver and self.auth_code)
 
+    def is_configured(self) -> bool:
+        """配置是否完整，不完整时 send 只记录日志"""
+        return self._is_configured()
+
+    def _deliver(self, message: str) -> None:
+        """通过持久连接发送；连接已被服务器断开时重连一次再发"""
+        with self._lock:
+            for attempt in range(2):
+                server = self._connect()
+                try:
+                    with metrics.timer("smtp"):
+                        server.sendmail(self.sender, self.receiver, message)
+                    return
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    self._reset()
+                    if attempt:
+                        raise
+                    logger.info("SMTP 连接已断开，重新连接")
+
+    def _connect(self) -> smtplib.SMTP:
+        """返回已登录的 SMTP 会话，必要时新建连接"""
+        if self._server is None:
+            smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+            server = smtp_class(self.smtp_server, self.smtp_port, timeout=10)
+            try:
+                server.login(self.sender, self.auth_code)
+            except Exception:
+                server.close()
+                raise
+            self._server = server
+        return self._server
+
+    def _reset(self) -> None:
+        """丢弃当前连接"""
+        if self._server is not None:
+            try:
+                self._server.close()
+            except Exception:
+                pass
+            self._server = None
+
+    def close(self) -> None:
+        """结束 SMTP 会话"""
+        with self._lock:
+            if self._server is not None:
+                try:
+                    self._server.quit()
+                except Exception:
+                    pass
+                self._reset()
+
+    def __enter__(self) -> "EmailNotifier":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class NotificationQueue:
+    """后台通知队列 - 由工作线程发送，失败时按指数退避重试"""
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        send: Callable[[str, str], bool],
+        workers: int = 1,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+    ):
+        """
+        Args:
+            send: 实际发送函数，返回是否成功
+            workers: 工作线程数
+            max_retries: 失败后的最大重试次数
+            backoff_seconds: 首次重试前的等待秒数，之后每次翻倍
+            max_backoff_seconds: 单次等待的上限
+        """
+        self._send = send
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_seconds = float(backoff_seconds)
+        self.max_backoff_seconds = float(max_backoff_seconds)
+
+        self.sent = 0
+        self.failed = 0
+        self._stats_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"notify-{i}", daemon=True)
+            for i in range(max(1, int(workers)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, subject: str, body: str, on_delivered: Optional[Callable[[], None]] = None) -> None:
+        """
+        加入队列，立即返回
+
+        Args:
+            on_delivered: 实际发送成功后在工作线程中调用，重试后仍失败则不调用
+        """
+        if self._closed:
+            raise RuntimeError("通知队列已关闭")
+        self._queue.put((subject, body, on_delivered))
+
+    def pending(self) -> int:
+        """尚未处理完的通知数"""
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待队列中的通知全部处理完
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            是否在超时前处理完
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """处理完剩余通知后停止工作线程，返回是否全部处理完"""
+        if self._closed:
+            return True
+
+        flushed = self.flush(timeout)
+        if not flushed:
+            logger.warning(f"通知队列关闭时仍有 {self.pending()} 条通知未发送")
+
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(self._STOP)
+        if flushed:
+            for thread in self._threads:
+                thread.join()
+
+        return flushed
+
+    def _worker(self) -> None:
+        """工作线程主循环"""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                subject, body, on_delivered = item
+                if self._deliver(subject, body) and on_delivered is not None:
+                    on_delivered()
+            except Exception as e:
+                logger.error(f"通知发送出错: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, subject: str, body: str) -> bool:
+        """发送一条通知，失败时指数退避重试，返回最终是否发送成功"""
+        delay = self.backoff_seconds
+        for attempt in range(self.max_retries + 1):
+            if self._send(subject, body):
+                with self._stats_lock:
+                    self.sent += 1
+                return True
+
+            if attempt < self.max_retries:
+                logger.warning(f"通知发送失败，{delay:.1f} 秒后重试 ({attempt + 1}/{self.max_retries}): {subject}")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff_seconds)
+
+        with self._stats_lock:
+            self.failed += 1
+        logger.error(f"通知发送失败，已放弃: {subject}")
+        return False
+
 
 class Notifier:
     """通知器 - 支持多种通知方式"""
@@ -123,12 +313,72 @@ class Notifier:
         if self.config.get("email", {}).get("enabled", True):
             self.email_notifier = EmailNotifier(self.config.get("email", {}))
 
-    def notify(self, subject: str, body: str) -> bool:
-        """发送通知"""
+        # 后台发送：notify 只入队，由工作线程发送；进程退出前会处理完队列
+        self.queue: Optional[NotificationQueue] = None
+        delivery_config = self.config.get("async_delivery", {})
+        if self.enabled and delivery_config.get("enabled", False) and self._has_channel():
+            self.flush_timeout = delivery_config.get("flush_timeout_seconds")
+            self.queue = NotificationQueue(
+                self._send,
+                workers=delivery_config.get("workers", 1),
+                max_retries=delivery_config.get("max_retries", 3),
+                backoff_seconds=delivery_config.get("backoff_seconds", 1.0),
+                max_backoff_seconds=delivery_config.get("max_backoff_seconds", 60.0),
+            )
+            atexit.register(self.close)
+
+    @property
+    def queued(self) -> bool:
+        """是否使用后台队列发送"""
+        return self.queue is not None
+
+    def notify(
+        self, subject: str, body: str, on_delivered: Optional[Callable[[], None]] = None
+    ) -> bool:
+        """
+        发送通知
+
+        Args:
+            on_delivered: 实际发送成功后调用；后台发送模式下在工作线程中调用
+
+        Returns:
+            是否发送成功（后台发送模式下为是否已入队）
+        """
+        if not self.enabled:
+            logger.warning("通知已禁用")
+            return False
+
+        if self.queue is not None:
+            self.queue.put(subject, body, on_delivered)
+            return True
+
+        sent = self._send(subject, body)
+        if sent and on_delivered is not None:
+            on_delivered()
+        return sent
+
+    def send_now(self, subject: str, body: str) -> bool:
+        """不经过后台队列立即发送，返回是否实际发送成功（用于检查通知配置）"""
         if not self.enabled:
             logger.warning("通知已禁用")
             return False
+        return self._send(subject, body)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待后台队列中的通知发送完"""
+        if self.queue is None:
+            return True
+        return self.queue.flush(timeout)
 
+    def close(self) -> None:
+        """发送完队列中的通知并释放各通知方式持有的连接"""
+        if self.queue is not None:
+            self.queue.close(self.flush_timeout)
+        if self.email_notifier:
+            self.email_notifier.close()
+
+    def _send(self, subject: str, body: str) -> bool:
+        """立即通过所有通知方式发送"""
         success = True
 
         # 尝试发送邮件
@@ -137,3 +387,11 @@ class Notifier:
                 success = False
 
         return success
+
+    def is_configured(self) -> bool:
+        """是否至少有一种通知方式配置完整"""
+        return self._has_channel()
+
+    def _has_channel(self) -> bool:
+        """是否有可实际发送的通知方式（配置不完整时没有重试的意义）"""
+        return bool(self.email_notifier and self.email_notifier.is_configured())
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""性能剖析模块 - cProfile / 采样剖析，并按策略和数据提供者归因"""
+
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+from .providers import DataProvider
+from .strategies import Strategy
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# cProfile 归因时统计的入口方法（嵌套的提供者会分别计入各自的类）
+ENTRY_METHODS = (
+    "analyze",
+    "detect",
+    "analyze_panel",
+    "panel_signals",
+    "fetch",
+    "fetch_since",
+    "fetch_async",
+    "fetch_since_async",
+    "prefetch",
+)
+
+
+class SamplingProfiler:
+    """
+    采样剖析器
+
+    后台线程每隔 interval 秒读取所有线程的调用栈（墙钟时间），累计为折叠栈
+    （flamegraph.pl / speedscope 可直接读取），同时按栈中最内层的策略和数据提供者归因。
+    开销与调用次数无关，适合在真实股票池上剖析。
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.attribution: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._sample(frame)
+
+    def _sample(self, frame) -> None:
+        names = []
+        strategy = provider = None
+        for current in _walk(frame):
+            names.append(_frame_name(current))
+            owner = current.f_locals.get("self")
+            if strategy is None and isinstance(owner, Strategy):
+                strategy = owner.label
+            elif provider is None and isinstance(owner, DataProvider):
+                provider = type(owner).__name__
+
+        self.samples += 1
+        self.stacks[";".join(reversed(names))] += 1
+        if strategy is not None:
+            self.attribution[("strategy", strategy)] += 1
+        if provider is not None:
+            self.attribution[("provider", provider)] += 1
+
+    def write_collapsed(self, path: str) -> None:
+        """写出折叠栈文件：每行 '栈帧;栈帧;... 次数'"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def report(self) -> Dict:
+        """按策略/数据提供者归因的采样时间（秒）"""
+        report: Dict[str, Dict[str, float]] = {"strategy": {}, "provider": {}}
+        for (kind, name), count in self.attribution.most_common():
+            report[kind][name] = count * self.interval
+        return report
+
+
+def profile_call(
+    func: Callable[[], T],
+    output: str,
+    mode: str = "cprofile",
+    interval: float = 0.005,
+) -> Tuple[T, Dict]:
+    """
+    在剖析器下执行 func 并写出剖析文件
+
+    Args:
+        func: 要剖析的调用
+        output: 输出文件；cprofile 模式为 pstats 文件（可用 snakeviz / pstats 查看），
+            sample 模式为折叠栈文件
+        mode: "cprofile"（确定性，只统计调用 func 的线程，需单线程运行）
+            或 "sample"（采样，包含所有线程）
+        interval: 采样间隔（秒）
+
+    Returns:
+        (func 的返回值, 归因报告)
+    """
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+
+    if mode == "sample":
+        profiler = SamplingProfiler(interval)
+        profiler.start()
+        try:
+            result = func()
+        finally:
+            profiler.stop()
+        profiler.write_collapsed(output)
+        report = {"mode": mode, "output": output, "samples": profiler.samples, **profiler.report()}
+
+    elif mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(func)
+        finally:
+            profiler.dump_stats(output)
+        report = {"mode": mode, "output": output, **attribute_stats(pstats.Stats(profiler))}
+
+    else:
+        raise ValueError(f"未知的剖析模式: {mode}")
+
+    _log_report(report)
+    return result, report
+
+
+def attribute_stats(stats: pstats.Stats) -> Dict:
+    """
+    按策略类和数据提供者类汇总 cProfile 结果
+
+    统计各类入口方法（见 ENTRY_METHODS）的累计时间；同一类的入口方法互相调用时
+    （如 analyze 调用 detect）只计外层一次。同一类的多个策略实例无法区分，
+    需要按策略名称细分时使用 sample 模式或运行指标。
+    """
+    owners = _method_owners()
+    report: Dict[str, Dict[str, float]] = {"strategy": {}, "provider": {}}
+
+    for (filename, lineno, funcname), (_, _, _, cumtime, callers) in stats.stats.items():
+        owner = owners.get((os.path.normcase(filename), lineno, funcname))
+        if owner is None:
+            continue
+
+        # 扣除由同一类的其他入口方法发起的调用，这部分已计入外层方法
+        nested = sum(
+            timing[3]
+            for (caller_file, caller_line, caller_name), timing in callers.items()
+            if owners.get((os.path.normcase(caller_file), caller_line, caller_name)) == owner
+        )
+        kind, name = owner
+        report[kind][name] = report[kind].get(name, 0.0) + cumtime - nested
+
+    for kind in report:
+        report[kind] = dict(sorted(report[kind].items(), key=lambda item: item[1], reverse=True))
+    return report
+
+
+def _method_owners() -> Dict[Tuple[str, int, str], Tuple[str, str]]:
+    """(文件, 行号, 函数名) -> (类别, 类名)，覆盖所有已加载的 Strategy / DataProvider 子类"""
+    owners = {}
+    for kind, base in (("strategy", Strategy), ("provider", DataProvider)):
+        for cls in _subclasses(base):
+            for method_name in ENTRY_METHODS:
+                method = cls.__dict__.get(method_name)
+                code = getattr(method, "__code__", None)
+                if code is not None:
+                    key = (os.path.normcase(code.co_filename), code.co_firstlineno, code.co_name)
+                    owners[key] = (kind, cls.__name__)
+    return owners
+
+
+def _subclasses(cls: type) -> Iterator[type]:
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+def _walk(frame) -> Iterator:
+    """从最内层向外遍历调用栈"""
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}"
+
+
+def _log_report(report: Dict) -> None:
+    logger.info(f"剖析结果已写入 {report['output']} ({report['mode']})")
+    for kind, title in (("strategy", "策略"), ("provider", "数据提供者")):
+        for name, seconds in report.get(kind, {}).items():
+            logger.info(f"  {title} {name}: {seconds:.3f}s")
+
@@ -3,16 +3,43 @@
 
 """数据提供者模块"""
 
+import asyncio
 import logging
+import os
+import threading
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
 
 import numpy as np
 import pandas as pd
 
+from . import metrics
+from .ratelimit import RateLimiter, SingleFlight
+
 logger = logging.getLogger(__name__)
 
+# 提供者可能返回的数值列
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# A 股交易时区和开盘时间：开盘前的快照仍是上一交易日的行情
+MARKET_TZ = ZoneInfo("Asia/Shanghai")
+SESSION_OPEN = time(9, 30)
+
+# 快照接口的成交量以手为单位，日线历史以股为单位
+SHARES_PER_LOT = 100
+
+
+@lru_cache(maxsize=None)
+def _akshare():
+    """首次使用时导入 akshare（导入耗时数秒），之后复用同一模块"""
+    import akshare
+
+    return akshare
+
 
 class DataProvider(ABC):
     """数据提供者基类"""
@@ -30,22 +57,114 @@ class DataProvider(ABC):
         """
         pass
 
+    def fetch_since(self, stock_code: str, start_date: datetime) -> Optional[pd.DataFrame]:
+        """
+        获取 start_date（含）之后的数据
+
+        默认实现获取全量数据后截取，支持按日期区间查询的提供者应覆盖此方法。
+
+        Args:
+            stock_code: 股票代码
+            start_date: 起始日期
+
+        Returns:
+            该区间的 DataFrame（可能为空），失败返回 None
+        """
+        data = self.fetch(stock_code)
+        if data is None or "date" not in data.columns:
+            return data
+        return data[pd.to_datetime(data["date"]) >= pd.Timestamp(start_date)]
+
+    def prefetch(self, stock_codes: List[str]) -> None:
+        """
+        批量分析开始前的预取钩子，默认不做任何事
+
+        Args:
+            stock_codes: 即将分析的股票代码列表
+        """
+
+    async def fetch_async(self, stock_code: str) -> Optional[pd.DataFrame]:
+        """
+        异步获取股票数据
+
+        默认在事件循环的线程池中执行阻塞的 fetch，原生异步的数据源应直接覆盖此方法。
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.fetch, stock_code)
+
+    async def fetch_since_async(self, stock_code: str, start_date: datetime) -> Optional[pd.DataFrame]:
+        """fetch_since 的异步版本，默认在线程池中执行"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.fetch_since, stock_code, start_date)
+
 
 class AkshareProvider(DataProvider):
     """使用 akshare 获取数据的提供者"""
 
+    DATE_FORMAT = "%Y%m%d"
+    # stock_zh_a_daily 背后的上游主机，限流按主机共享
+    HOST = "finance.sina.com.cn"
+
+    # 全市场快照接口（东方财富）的上游主机
+    SNAPSHOT_HOST = "push2.eastmoney.com"
+
+    def __init__(self, rate_limit: Optional[float] = None, burst: int = 1):
+        """
+        Args:
+            rate_limit: 每秒最多请求数，None 表示不限流
+            burst: 允许的突发请求数
+        """
+        self.rate_limiter = (
+            RateLimiter.for_host(self.HOST, rate_limit, burst) if rate_limit else None
+        )
+        self.snapshot_rate_limiter = (
+            RateLimiter.for_host(self.SNAPSHOT_HOST, rate_limit, burst) if rate_limit else None
+        )
+        # 相同股票、相同日期区间的并发请求只下载一次
+        self._single_flight = SingleFlight()
+        # 交易日历每天只下载一次
+        self._trade_dates: Optional[Set[date]] = None
+        self._trade_dates_day: Optional[date] = None
+
     def fetch(self, stock_code: str) -> Optional[pd.DataFrame]:
         """从 akshare 获取股票数据"""
+        data = self._download(stock_code)
+
+        if data is None or len(data) == 0:
+            return None
+
+        return data
+
+    def fetch_since(self, stock_code: str, start_date: datetime) -> Optional[pd.DataFrame]:
+        """只下载 start_date（含）之后的数据"""
+        return self._download(
+            stock_code,
+            start_date=start_date.strftime(self.DATE_FORMAT),
+            end_date=datetime.now().strftime(self.DATE_FORMAT),
+        )
+
+    def _download(self, stock_code: str, **date_range) -> Optional[pd.DataFrame]:
+        """调用 akshare 下载数据，失败返回 None；重复的并发请求共享同一次下载"""
+        symbol = self._format_symbol(stock_code)
+        key = (symbol, tuple(sorted(date_range.items())))
+        return self._single_flight.do(key, lambda: self._download_once(stock_code, symbol, date_range))
+
+    def _download_once(self, stock_code: str, symbol: str, date_range: dict) -> Optional[pd.DataFrame]:
+        """限流后实际调用 akshare"""
         try:
-            import akshare as ak
+            ak = _akshare()
+
+            if self.rate_limiter:
+                waited = self.rate_limiter.acquire()
+                if waited:
+                    logger.debug(f"{stock_code} 限流等待 {waited:.2f} 秒")
 
-            symbol = self._format_symbol(stock_code)
             logger.info(f"从 akshare 获取 {stock_code} 的数据")
 
-            data = ak.stock_zh_a_daily(symbol=symbol)
+            data = ak.stock_zh_a_daily(symbol=symbol, **date_range)
 
             if data is None or len(data) == 0:
-                return None
+                return pd.DataFrame(columns=["date", "close"])
 
             # 数据清理和标准化
             data = self._standardize_columns(data)
@@ -55,6 +174,79 @@ class AkshareProvider(DataProvider):
             logger.error(f"akshare 获取数据失败: {e}")
             return None
 
+    def fetch_snapshot(self) -> Optional[pd.DataFrame]:
+        """
+        一次请求获取全市场最新行情（A 股 + 场内 ETF）
+
+        Returns:
+            以 6 位代码为索引、包含 'close' 等列的 DataFrame，失败返回 None
+        """
+        try:
+            ak = _akshare()
+
+            frames = []
+            for name, loader in (("A股", ak.stock_zh_a_spot_em), ("ETF", ak.fund_etf_spot_em)):
+                if self.snapshot_rate_limiter:
+                    self.snapshot_rate_limiter.acquire()
+                logger.info(f"从 akshare 获取全市场{name}快照")
+                frames.append(self._standardize_snapshot(loader()))
+
+            snapshot = pd.concat(frames)
+            return snapshot[~snapshot.index.duplicated(keep="first")]
+
+        except Exception as e:
+            logger.error(f"akshare 获取全市场快照失败: {e}")
+            return None
+
+    def fetch_trade_dates(self) -> Optional[Set[date]]:
+        """
+        交易所交易日历（已排除节假日休市），每天只下载一次
+
+        Returns:
+            交易日集合，失败返回 None
+        """
+        today = datetime.now(MARKET_TZ).date()
+        if self._trade_dates is not None and self._trade_dates_day == today:
+            return self._trade_dates
+
+        try:
+            ak = _akshare()
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            logger.info("从 akshare 获取交易日历")
+            calendar = ak.tool_trade_date_hist_sina()
+            trade_dates = set(pd.to_datetime(calendar["trade_date"]).dt.date)
+        except Exception as e:
+            logger.error(f"akshare 获取交易日历失败: {e}")
+            return None
+
+        self._trade_dates, self._trade_dates_day = trade_dates, today
+        return trade_dates
+
+    @staticmethod
+    def _standardize_snapshot(data: pd.DataFrame) -> pd.DataFrame:
+        """标准化快照列名（成交量由手换算为股），去掉停牌（无最新价）的股票"""
+        column_mapping = {
+            "代码": "code",
+            "最新价": "close",
+            "今开": "open",
+            "开盘价": "open",
+            "最高": "high",
+            "最高价": "high",
+            "最低": "low",
+            "最低价": "low",
+            "成交量": "volume",
+        }
+        data = data.rename(columns=column_mapping)
+        columns = [c for c in PRICE_COLUMNS if c in data.columns]
+        data = data[["code"] + columns].copy()
+        data["code"] = data["code"].astype(str).str[-6:]
+        for column in columns:
+            data[column] = pd.to_numeric(data[column], errors="coerce")
+        if "volume" in data.columns:
+            data["volume"] = data["volume"] * SHARES_PER_LOT
+        return data.dropna(subset=["close"]).set_index("code")
+
     @staticmethod
     def _format_symbol(stock_code: str) -> str:
         """格式化股票代码"""
@@ -87,6 +279,7 @@ class AkshareProvider(DataProvider):
             "最高": "high",
             "low_price": "low",
             "最低": "low",
+            "成交量": "volume",
         }
 
         for old_name, new_name in column_mapping.items():
@@ -102,7 +295,12 @@ class AkshareProvider(DataProvider):
             else:
                 logger.warning("无法找到日期列")
 
-        return data[["date", "close"]].dropna() if "close" in data.columns else data
+        if "close" not in data.columns:
+            return data
+
+        # 保留 OHLCV 中存在的列，指标策略（ATR、成交量突破等）需要用到
+        columns = ["date"] + [c for c in PRICE_COLUMNS if c in data.columns]
+        return data[columns].dropna(subset=["date", "close"])
 
 
 class MockProvider(DataProvider):
@@ -113,12 +311,21 @@ class MockProvider(DataProvider):
         logger.info(f"使用模拟数据生成 {stock_code} 的数据")
 
         dates = pd.date_range(end=datetime.now(), periods=60, freq="D")
-        np.random.seed(hash(stock_code) % (2**32))
+        # 使用独立的随机数生成器，多线程并发调用时互不干扰
+        rng = np.random.RandomState(hash(stock_code) % (2**32))
 
         base_price = 10 + (hash(stock_code) % 100) / 10
-        prices = base_price + np.cumsum(np.random.randn(60) * 0.5)
+        prices = base_price + np.cumsum(rng.randn(60) * 0.5)
+
+        # 其余字段在收盘价之后生成，收盘价序列与只生成收盘价时相同
+        opens = prices + rng.randn(60) * 0.2
+        highs = np.maximum(opens, prices) + np.abs(rng.randn(60)) * 0.2
+        lows = np.minimum(opens, prices) - np.abs(rng.randn(60)) * 0.2
+        volumes = np.round(rng.lognormal(13, 0.5, 60))
 
-        return pd.DataFrame({"date": dates, "close": prices})
+        return pd.DataFrame(
+            {"date": dates, "open": opens, "high": highs, "low": lows, "close": prices, "volume": volumes}
+        )
 
 
 class FallbackProvider(DataProvider):
@@ -136,4 +343,263 @@ class FallbackProvider(DataProvider):
             return data
 
         logger.info(f"尝试使用备用提供者获取 {stock_code} 的数据")
-        return self.fallback.fetch(stock_code)
+        metrics.incr("fallbacks")
+        with metrics.timer("fallback"):
+            return self.fallback.fetch(stock_code)
+
+    def prefetch(self, stock_codes: List[str]) -> None:
+        """预取只针对主数据源"""
+        self.primary.prefetch(stock_codes)
+
+    async def fetch_async(self, stock_code: str) -> Optional[pd.DataFrame]:
+        """fetch 的异步版本"""
+        data = await self.primary.fetch_async(stock_code)
+
+        if data is not None and not data.empty:
+            return data
+
+        logger.info(f"尝试使用备用提供者获取 {stock_code} 的数据")
+        metrics.incr("fallbacks")
+        with metrics.timer("fallback"):
+            return await self.fallback.fetch_async(stock_code)
+
+
+class HistoryStore:
+    """本地行情存储 - 每只股票一个 pickle 文件"""
+
+    SUFFIX = ".pkl"
+
+    def __init__(self, cache_dir: str = ".cache"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, stock_code: str) -> Path:
+        """股票对应的存储文件路径"""
+        return self.cache_dir / f"{stock_code.strip()}{self.SUFFIX}"
+
+    def load(self, stock_code: str) -> Optional[pd.DataFrame]:
+        """读取本地数据，不存在或损坏时返回 None"""
+        path = self.path(stock_code)
+        if not path.exists():
+            return None
+
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"读取缓存 {path} 失败: {e}")
+            return None
+
+    def save(self, stock_code: str, data: pd.DataFrame) -> None:
+        """写入本地数据（先写临时文件再替换，避免写入中断留下半个文件）"""
+        path = self.path(stock_code)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+        try:
+            data.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入缓存 {path} 失败: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def age(self, stock_code: str) -> Optional[timedelta]:
+        """距上次写入的时间，不存在返回 None"""
+        path = self.path(stock_code)
+        if not path.exists():
+            return None
+        return datetime.now() - datetime.fromtimestamp(path.stat().st_mtime)
+
+
+class CachedProvider(DataProvider):
+    """带本地磁盘缓存的数据提供者，可包装任意提供者"""
+
+    def __init__(
+        self,
+        provider: DataProvider,
+        cache_dir: str = ".cache",
+        ttl_minutes: float = 60,
+        incremental: bool = False,
+        snapshot: bool = False,
+    ):
+        """
+        Args:
+            provider: 被包装的数据提供者
+            cache_dir: 缓存目录
+            ttl_minutes: 缓存有效期（分钟）
+            incremental: 缓存过期时只下载最后缓存日期之后的数据并追加
+            snapshot: 预取时用一次全市场快照为本地历史追加当日 K 线
+                （需要被包装的提供者实现 fetch_snapshot）
+        """
+        self.provider = provider
+        self.store = HistoryStore(cache_dir)
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self.incremental = incremental
+        self.snapshot = snapshot
+
+    def prefetch(self, stock_codes: List[str]) -> None:
+        """
+        快照模式下，一次请求获取全市场最新行情并合并到本地历史
+
+        只在交易日开盘后合并（按交易所日历判断，节假日和开盘前的快照不是当日行情），
+        且只处理本地历史仅缺当日 K 线的股票；其余股票（无缓存、缺多日数据）
+        在 fetch 时按原有方式逐只获取。
+        """
+        self.provider.prefetch(stock_codes)
+
+        if not self.snapshot or not hasattr(self.provider, "fetch_snapshot"):
+            return
+
+        now = datetime.now(MARKET_TZ)
+        today = now.date()
+        trade_dates = self.provider.fetch_trade_dates() if hasattr(self.provider, "fetch_trade_dates") else None
+        if not trade_dates:
+            logger.warning("无法获取交易日历，跳过全市场快照")
+            return
+        if today not in trade_dates:
+            logger.info("非交易日，跳过全市场快照")
+            return
+        if now.time() < SESSION_OPEN:
+            logger.info("尚未开盘，跳过全市场快照")
+            return
+
+        previous_sessions = [day for day in trade_dates if day < today]
+        if not previous_sessions:
+            return
+        previous_session = max(previous_sessions)
+
+        pending = []
+        for stock_code in dict.fromkeys(stock_codes):
+            age = self.store.age(stock_code)
+            if age is None or age < self.ttl:
+                continue
+            cached = self.store.load(stock_code)
+            if self._can_increment(cached) and self._only_today_missing(cached, previous_session):
+                pending.append((stock_code, cached))
+
+        if not pending:
+            return
+
+        snapshot = self.provider.fetch_snapshot()
+        if snapshot is None:
+            return
+
+        merged = 0
+        for stock_code, cached in pending:
+            code = stock_code.strip()[-6:]
+            if code not in snapshot.index:
+                continue
+            self.store.save(stock_code, self._merge(cached, self._snapshot_bar(cached, snapshot.loc[code], today)))
+            merged += 1
+
+        logger.info(f"全市场快照已合并 {merged}/{len(pending)} 只股票的当日数据")
+
+    @staticmethod
+    def _only_today_missing(cached: pd.DataFrame, previous_session: date) -> bool:
+        """本地历史已包含上一个交易日，只缺当日 K 线"""
+        return pd.to_datetime(cached["date"]).max().date() >= previous_session
+
+    @staticmethod
+    def _snapshot_bar(cached: pd.DataFrame, quote: pd.Series, today) -> pd.DataFrame:
+        """把快照行情转换成与缓存列一致的一行 K 线"""
+        date_value = pd.Timestamp(today) if pd.api.types.is_datetime64_any_dtype(cached["date"]) else today
+        bar = {"date": [date_value]}
+        for column in cached.columns:
+            if column in quote.index:
+                bar[column] = [quote[column]]
+        return pd.DataFrame(bar)
+
+    def fetch(self, stock_code: str) -> Optional[pd.DataFrame]:
+        """缓存未过期时读取本地数据，否则从被包装的提供者获取并写入缓存"""
+        cached, fresh = self._load_cached(stock_code)
+        if fresh:
+            return cached
+
+        if self._can_increment(cached):
+            new_data = self.provider.fetch_since(stock_code, self._last_date(cached))
+            data = self._apply_increment(stock_code, cached, new_data)
+        else:
+            data = self.provider.fetch(stock_code)
+
+        return self._store_result(stock_code, data, cached)
+
+    async def fetch_async(self, stock_code: str) -> Optional[pd.DataFrame]:
+        """fetch 的异步版本，本地文件读写放在线程池中执行"""
+        cached, fresh = await asyncio.to_thread(self._load_cached, stock_code)
+        if fresh:
+            return cached
+
+        if self._can_increment(cached):
+            new_data = await self.provider.fetch_since_async(stock_code, self._last_date(cached))
+            data = self._apply_increment(stock_code, cached, new_data)
+        else:
+            data = await self.provider.fetch_async(stock_code)
+
+        return await asyncio.to_thread(self._store_result, stock_code, data, cached)
+
+    def _load_cached(self, stock_code: str) -> Tuple[Optional[pd.DataFrame], bool]:
+        """读取缓存，返回 (缓存数据, 是否在有效期内)"""
+        age = self.store.age(stock_code)
+        cached = self.store.load(stock_code) if age is not None else None
+
+        if cached is not None and not cached.empty and age < self.ttl:
+            logger.info(f"使用缓存数据: {stock_code}")
+            metrics.incr("cache_hits")
+            return cached, True
+
+        metrics.incr("cache_misses")
+        return cached, False
+
+    def _store_result(
+        self, stock_code: str, data: Optional[pd.DataFrame], cached: Optional[pd.DataFrame]
+    ) -> Optional[pd.DataFrame]:
+        """写入新数据；上游失败时退回到过期缓存，总比没有数据好"""
+        if data is not None and not data.empty:
+            self.store.save(stock_code, data)
+            return data
+
+        if cached is not None and not cached.empty:
+            logger.warning(f"{stock_code} 获取失败，使用过期缓存数据")
+            metrics.incr("stale_cache_used")
+            return cached
+
+        return data
+
+    def _can_increment(self, cached: Optional[pd.DataFrame]) -> bool:
+        """是否可以基于缓存做增量获取"""
+        return (
+            self.incremental
+            and cached is not None
+            and not cached.empty
+            and "date" in cached.columns
+        )
+
+    @staticmethod
+    def _last_date(cached: pd.DataFrame) -> datetime:
+        """
+        增量获取的起始日期
+
+        从最后缓存日期（含）开始，最后一根 K 线会被重新下载，以覆盖盘中写入的不完整数据。
+        """
+        return pd.to_datetime(cached["date"]).max().to_pydatetime()
+
+    def _apply_increment(
+        self, stock_code: str, cached: pd.DataFrame, new_data: Optional[pd.DataFrame]
+    ) -> Optional[pd.DataFrame]:
+        """把增量数据合并进缓存，获取失败返回 None"""
+        if new_data is None:
+            return None
+
+        logger.info(
+            f"{stock_code} 增量获取 {len(new_data)} 条数据（自 {self._last_date(cached).date()}）"
+        )
+        if new_data.empty:
+            return cached
+
+        return self._merge(cached, new_data)
+
+    @staticmethod
+    def _merge(cached: pd.DataFrame, new_data: pd.DataFrame) -> pd.DataFrame:
+        """按日期合并，重复日期以新数据为准"""
+        merged = pd.concat([cached, new_data], ignore_index=True)
+        merged["_key"] = pd.to_datetime(merged["date"])
+        merged = merged.drop_duplicates(subset="_key", keep="last").sort_values("_key")
+        return merged.drop(columns="_key").reset_index(drop=True)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""信号状态模块 - 记录已通知的信号，只通知状态变化"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SignalStateStore:
+    """
+    信号状态存储
+
+    以 (股票代码, 策略, 信号标识) 为键持久化到 JSON 文件。每次运行只输出变化：
+    新触发的信号、超过重复提醒间隔仍在触发的信号，以及已解除的信号。
+    """
+
+    def __init__(self, state_file: str = ".cache/signal_state.json", realert_hours: Optional[float] = 24):
+        """
+        Args:
+            state_file: 状态文件路径
+            realert_hours: 持续触发的信号间隔多少小时再次提醒，None 或 <= 0 表示不再提醒
+        """
+        self.state_file = Path(state_file)
+        self.realert = (
+            timedelta(hours=realert_hours) if realert_hours and realert_hours > 0 else None
+        )
+        self.state: Dict[str, Dict] = self._load()
+        # filter 得到、尚未取走的状态变化：股票代码 -> {键: 新条目，None 表示删除}
+        self._pending: Dict[str, Dict[str, Optional[Dict]]] = {}
+        # 后台发送模式下 commit 在通知队列的工作线程中调用
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(stock_code: str, strategy: str, signal_id: str) -> str:
+        return f"{stock_code}|{strategy}|{signal_id}"
+
+    def _load(self) -> Dict[str, Dict]:
+        """读取状态文件，不存在或损坏时从空状态开始"""
+        if not self.state_file.exists():
+            return {}
+
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"读取信号状态文件失败，将重新记录: {e}")
+            return {}
+
+    def save(self) -> None:
+        """写入状态文件（先写临时文件再替换）"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_file.with_name(f"{self.state_file.name}.tmp")
+
+        try:
+            with self._lock:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.state, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            logger.warning(f"写入信号状态文件失败: {e}")
+
+    def filter(self, results: List[Dict], stock_codes: List[str]) -> List[Dict]:
+        """
+        根据历史状态筛选需要通知的变化
+
+        信号以 (股票代码, 策略, 信号标识) 为键，消息中的价格等数值变化不算新信号。
+        状态变化先暂存，发送通知前用 take 取出，实际发送成功后由 commit 写入状态文件，
+        发送失败的信号下次运行会再次通知。
+
+        Args:
+            results: 本次运行的分析结果
+            stock_codes: 本次完成分析的股票代码（未出现在 results 中的视为无信号）；
+                获取失败或评估出错的股票不应包含在内，否则其信号会被误判为已解除
+
+        Returns:
+            需要通知的结果列表：'signals' 只包含需要提醒的信号，
+            已解除的信号放在 'cleared' 中
+        """
+        now = datetime.now()
+        active = set()
+        deltas: Dict[str, Dict] = {}
+        self._pending = {}
+        with self._lock:
+            state = dict(self.state)
+
+        for result in results:
+            stock_code = result["code"]
+            alerts = []
+            updates: Dict[str, Optional[Dict]] = {}
+
+            for strategy, signals in result.get("strategy_signals", {"": result["signals"]}).items():
+                signal_ids = result.get("signal_ids", {}).get(strategy, signals)
+                for signal_id, signal in zip(signal_ids, signals):
+                    key = self._key(stock_code, strategy, signal_id)
+                    active.add(key)
+                    entry = state.get(key)
+
+                    if entry is None:
+                        entry = {
+                            "code": stock_code,
+                            "strategy": strategy,
+                            "signal": signal_id,
+                            "message": signal,
+                            "first_seen": now.isoformat(),
+                        }
+                    elif self.realert is None or now - datetime.fromisoformat(entry["last_alert"]) < self.realert:
+                        continue
+
+                    updates[key] = {**entry, "message": signal, "last_alert": now.isoformat()}
+                    alerts.append(signal)
+
+            if alerts:
+                deltas[stock_code] = {**result, "signals": alerts, "cleared": []}
+                self._pending[stock_code] = updates
+
+        # 本次分析过、但不再触发的信号视为解除
+        analyzed = set(stock_codes)
+        for key, entry in state.items():
+            if entry["code"] not in analyzed or key in active:
+                continue
+            stock_code = entry["code"]
+            delta = deltas.setdefault(
+                stock_code,
+                {"code": stock_code, "date": None, "price": None, "signals": [], "cleared": []},
+            )
+            delta["cleared"].append(entry.get("message", entry["signal"]))
+            self._pending.setdefault(stock_code, {})[key] = None
+
+        ordered = [deltas[code] for code in dict.fromkeys(stock_codes) if code in deltas]
+        ordered += [delta for code, delta in deltas.items() if code not in analyzed]
+        logger.info(f"信号去重: {len(results)} 只股票触发，{len(ordered)} 只股票有状态变化")
+        return ordered
+
+    def take(self, stock_codes: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        取出这些股票暂存的状态变化，通知实际发送成功后交给 commit
+
+        Args:
+            stock_codes: 同一条通知包含的股票代码
+
+        Returns:
+            键 -> 新条目，None 表示删除
+        """
+        changes: Dict[str, Optional[Dict]] = {}
+        for stock_code in stock_codes:
+            changes.update(self._pending.pop(stock_code, {}))
+        return changes
+
+    def commit(self, changes: Dict[str, Optional[Dict]]) -> None:
+        """
+        把已成功通知的状态变化写入状态文件
+
+        后台发送模式下在通知队列的工作线程中调用，可能晚于下一次 filter。
+
+        Args:
+            changes: take 取出的状态变化
+        """
+        if not changes:
+            return
+
+        with self._lock:
+            for key, entry in changes.items():
+                if entry is None:
+                    self.state.pop(key, None)
+                else:
+                    self.state[key] = entry
+        self.save()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""行情存储模块 - 全市场历史行情的紧凑列式存储，可保存为内存映射文件"""
+
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .providers import DataProvider
+
+logger = logging.getLogger(__name__)
+
+# 存储目录中的索引文件：股票代码、字段和格式版本
+INDEX_FILE = "index.json"
+FORMAT_VERSION = 1
+
+
+class PriceStore:
+    """
+    紧凑的列式行情存储
+
+    所有股票的同一字段首尾相接存放在一个连续数组里，offsets[i]:offsets[i + 1]
+    是第 i 只股票的区间；日期不逐行保存，而是存为共享交易日历 calendar 中的
+    int32 下标。读取单只股票得到的是数组视图，不复制数据。
+    """
+
+    def __init__(
+        self,
+        codes: Sequence[str],
+        offsets: np.ndarray,
+        day_offsets: np.ndarray,
+        calendar: np.ndarray,
+        fields: Dict[str, np.ndarray],
+    ):
+        """
+        Args:
+            codes: 股票代码，顺序与 offsets 对应
+            offsets: 长度为 len(codes) + 1 的区间边界
+            day_offsets: 每一行在 calendar 中的下标
+            calendar: 按升序排列的交易日（datetime64[D]）
+            fields: 字段名 -> 与 day_offsets 等长的数值数组
+        """
+        self.codes = list(codes)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.day_offsets = day_offsets
+        self.calendar = calendar
+        self.fields = fields
+        self._index = {stock_code: i for i, stock_code in enumerate(self.codes)}
+
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Dict[str, pd.DataFrame],
+        fields: Iterable[str] = ("close",),
+        dtype=np.float64,
+    ) -> "PriceStore":
+        """
+        由每只股票的 DataFrame 构建存储
+
+        Args:
+            frames: 股票代码 -> 包含 'date' 和各字段列的 DataFrame
+            fields: 保存的字段，DataFrame 缺少的字段填 NaN
+            dtype: 数值字段的类型，float32 占用减半
+        """
+        fields = list(fields)
+        columns = [_frame_columns(frame, fields, dtype) for frame in frames.values()]
+        return cls._build(list(frames), columns, fields, dtype)
+
+    @classmethod
+    def from_provider(
+        cls,
+        provider: DataProvider,
+        stock_codes: List[str],
+        fields: Iterable[str] = ("close",),
+        dtype=np.float64,
+        max_workers: int = 1,
+    ) -> "PriceStore":
+        """
+        从数据提供者获取行情并构建存储
+
+        每只股票获取后立即转换成紧凑数组、丢弃 DataFrame，内存峰值不随股票数增长为
+        DataFrame 的总和。获取失败或无数据的股票不会出现在存储中。
+
+        Args:
+            provider: 数据提供者
+            stock_codes: 股票代码列表
+            fields: 保存的字段
+            dtype: 数值字段的类型
+            max_workers: 并发获取的线程数
+        """
+        fields = list(fields)
+
+        def load(stock_code: str) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+            try:
+                data = provider.fetch(stock_code)
+            except Exception as e:
+                logger.error(f"获取股票 {stock_code} 数据时出错: {e}", exc_info=True)
+                return None
+            if data is None or len(data) == 0:
+                logger.warning(f"无法获取 {stock_code} 的数据")
+                return None
+            return _frame_columns(data, fields, dtype)
+
+        workers = max(1, min(int(max_workers), len(stock_codes)))
+        if workers == 1:
+            loaded = [load(stock_code) for stock_code in stock_codes]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="store") as executor:
+                loaded = list(executor.map(load, stock_codes))
+
+        pairs = [(code, columns) for code, columns in zip(stock_codes, loaded) if columns is not None]
+        return cls._build([code for code, _ in pairs], [columns for _, columns in pairs], fields, dtype)
+
+    @classmethod
+    def _build(
+        cls,
+        codes: List[str],
+        columns: List[Tuple[np.ndarray, Dict[str, np.ndarray]]],
+        fields: List[str],
+        dtype,
+    ) -> "PriceStore":
+        """把逐只股票的 (日期, 字段) 数组拼接成连续存储"""
+        lengths = np.array([len(dates) for dates, _ in columns], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        if columns:
+            all_dates = np.concatenate([dates for dates, _ in columns])
+            calendar = np.unique(all_dates)
+            day_offsets = np.searchsorted(calendar, all_dates).astype(np.int32)
+            values = {
+                field: np.concatenate([arrays[field] for _, arrays in columns]).astype(dtype, copy=False)
+                for field in fields
+            }
+        else:
+            calendar = np.array([], dtype="datetime64[D]")
+            day_offsets = np.array([], dtype=np.int32)
+            values = {field: np.array([], dtype=dtype) for field in fields}
+
+        return cls(codes, offsets, day_offsets, calendar, values)
+
+    def save(self, path: str) -> None:
+        """
+        保存到目录：每个数组一个 .npy 文件，外加 index.json
+
+        先写入临时目录再整体替换，读取方不会看到写了一半的文件。
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir()
+
+        try:
+            np.save(tmp_path / "offsets.npy", self.offsets)
+            np.save(tmp_path / "day_offsets.npy", self.day_offsets)
+            np.save(tmp_path / "calendar.npy", self.calendar)
+            for field, values in self.fields.items():
+                np.save(tmp_path / f"{field}.npy", values)
+
+            index = {
+                "version": FORMAT_VERSION,
+                "codes": self.codes,
+                "fields": list(self.fields),
+                "created": datetime.now().isoformat(),
+            }
+            with open(tmp_path / INDEX_FILE, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False)
+
+            # 目录不能原子覆盖：先把旧目录移开，再换入新目录
+            old_path = path.with_name(f"{path.name}.{os.getpid()}.old")
+            if path.exists():
+                os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> "PriceStore":
+        """
+        打开 save 保存的存储
+
+        mmap 为 True 时数组以只读方式内存映射，打开只读取索引，实际数据按需由
+        操作系统分页加载，同一份文件在多个进程间共享页缓存。
+
+        Raises:
+            OSError / ValueError: 目录不存在、文件损坏或格式版本不匹配
+        """
+        path = Path(path)
+        with open(path / INDEX_FILE, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的行情存储格式版本: {index.get('version')}")
+
+        mmap_mode = "r" if mmap else None
+
+        def load(name: str) -> np.ndarray:
+            return np.load(path / f"{name}.npy", mmap_mode=mmap_mode)
+
+        return cls(
+            index["codes"],
+            np.asarray(load("offsets")),
+            load("day_offsets"),
+            np.asarray(load("calendar")),
+            {field: load(field) for field in index["fields"]},
+        )
+
+    @staticmethod
+    def age(path: str) -> Optional[float]:
+        """已保存存储的年龄（秒），不存在时返回 None"""
+        index_path = Path(path) / INDEX_FILE
+        if not index_path.exists():
+            return None
+        return datetime.now().timestamp() - index_path.stat().st_mtime
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, stock_code: str) -> bool:
+        return stock_code in self._index
+
+    @property
+    def nbytes(self) -> int:
+        """数组占用的字节数"""
+        arrays = [self.offsets, self.day_offsets, self.calendar, *self.fields.values()]
+        return sum(array.nbytes for array in arrays)
+
+    def span(self, stock_code: str) -> Tuple[int, int]:
+        """股票在连续数组中的 [start, stop) 区间"""
+        i = self._index[stock_code]
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def values(self, stock_code: str, field: str = "close") -> np.ndarray:
+        """单只股票某字段的数组视图（不复制）"""
+        start, stop = self.span(stock_code)
+        return self.fields[field][start:stop]
+
+    def dates(self, stock_code: str) -> np.ndarray:
+        """单只股票的日期（datetime64[D]）"""
+        start, stop = self.span(stock_code)
+        return self.calendar[self.day_offsets[start:stop]]
+
+    def frame(self, stock_code: str) -> pd.DataFrame:
+        """
+        兼容现有策略接口的 DataFrame
+
+        数值列直接引用存储中的数组视图，只有日期列需要由日历下标展开。
+        """
+        data = {"date": self.dates(stock_code)}
+        data.update({field: self.values(stock_code, field) for field in self.fields})
+        frame = pd.DataFrame(data, copy=False)
+        frame.attrs["code"] = stock_code
+        return frame
+
+    def tail_matrix(
+        self, rows: int, stock_codes: Optional[List[str]] = None, field: str = "close"
+    ) -> np.ndarray:
+        """
+        各股票最近 rows 根 K 线组成的 (日期 × 股票) float64 矩阵
+
+        每列按最新一根对齐到最后一行，历史不足的部分填 NaN，与 align_closes 的
+        约定一致，可直接交给 MovingAverageStrategy.panel_signals。
+        """
+        indices = (
+            np.arange(len(self.codes))
+            if stock_codes is None
+            else np.array([self._index[code] for code in stock_codes], dtype=np.int64)
+        )
+        starts = self.offsets[indices]
+        stops = self.offsets[indices + 1]
+
+        positions = stops[np.newaxis, :] - rows + np.arange(rows)[:, np.newaxis]
+        valid = positions >= starts[np.newaxis, :]
+        values = np.asarray(self.fields[field][np.where(valid, positions, 0)], dtype=np.float64)
+        values[~valid] = np.nan
+        return values
+
+
+def _frame_columns(
+    data: pd.DataFrame, fields: List[str], dtype
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """取出 DataFrame 的日期（datetime64[D]）和各字段数组，按日期升序"""
+    dates = pd.to_datetime(data["date"]).to_numpy(dtype="datetime64[D]")
+    order = None if len(dates) < 2 or (dates[1:] >= dates[:-1]).all() else np.argsort(dates, kind="stable")
+
+    arrays = {}
+    for field in fields:
+        if field in data.columns:
+            values = pd.to_numeric(data[field], errors="coerce").to_numpy(dtype=dtype)
+        else:
+            values = np.full(len(data), np.nan, dtype=dtype)
+        arrays[field] = values if order is None else values[order]
+
+    return (dates if order is None else dates[order]), arrays
@@ -5,12 +5,23 @@
 
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+from .indicators import IndicatorCache, PanelContext, compute_indicator
+
 logger = logging.getLogger(__name__)
 
+# (信号标识, 消息)：标识在各次运行间保持不变，消息中可以带有价格等随行情变化的数值
+Signal = Tuple[str, str]
+
+
+def signal_messages(signals: Optional[List[Signal]]) -> Optional[List[str]]:
+    """只保留信号消息，无信号时返回 None"""
+    return [message for _, message in signals] if signals else None
+
 
 class Strategy(ABC):
     """策略基类"""
@@ -18,12 +29,16 @@ class Strategy(ABC):
     def __init__(self, name: str, config: Dict = None):
         self.name = name
         self.config = config or {}
+        # 由 StockAnalyzer 注入，多个策略共享
+        self.indicator_cache: Optional[IndicatorCache] = None
 
     @abstractmethod
     def analyze(self, data: pd.DataFrame) -> Optional[List[str]]:
         """
         分析股票数据
 
+        data 在所有策略间共享，策略不应修改它；需要的指标通过 indicator() 获取。
+
         Args:
             data: 包含 'close' 列的 DataFrame
 
@@ -32,17 +47,66 @@ class Strategy(ABC):
         """
         pass
 
+    def detect(self, data: pd.DataFrame) -> Optional[List[Signal]]:
+        """
+        分析股票数据，返回带标识的信号
+
+        信号去重以标识为键。默认以消息本身作为标识，内置策略返回稳定的信号标识
+        （与 signal_matrix 的键相同）。消息中含有价格、指标值等会变化的数值时，
+        自定义策略应重写本方法返回固定的标识（如 "oversold"），否则每次运行都会被当作
+        新信号通知，同时把上次的消息当作已解除的信号通知。
+
+        Returns:
+            (信号标识, 消息) 列表，如果无信号返回 None
+        """
+        signals = self.analyze(data)
+        return [(message, message) for message in signals] if signals else None
+
+    def signal_matrix(
+        self, closes: np.ndarray, context: Optional[PanelContext] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        对 (日期 × 股票) 收盘价矩阵的每个日期一次性计算信号，用于回测
+
+        Args:
+            closes: 按日期升序的收盘价矩阵，缺失值为 NaN
+            context: 同一 closes 上共享的中间结果（参数扫描时复用）
+
+        Returns:
+            信号标识 -> 与 closes 同形状的布尔矩阵
+        """
+        raise NotImplementedError(f"策略 {self.name} 不支持向量化回测")
+
+    @property
+    def label(self) -> str:
+        """策略配置中的名称，未配置时使用策略类型名"""
+        return self.config.get("name", self.name)
+
+    def indicator(self, data: pd.DataFrame, name: str, *params):
+        """获取指标值，同一股票同一指标在各策略间只计算一次"""
+        return compute_indicator(data, name, *params, cache=self.indicator_cache)
+
 
 class MovingAverageStrategy(Strategy):
-    """移动平均线策略"""
+    """移动平均线策略：价格跌破任一配置周期的均线时产生 break_ma<周期> 信号"""
 
     def __init__(self, config: Dict = None):
         super().__init__("moving_average", config)
         self.periods = self.config.get("params", {}).get("periods", [5, 10, 20])
+        # 每个配置的周期都产生跌破信号，按周期从短到长排列
+        self.signal_periods = sorted(set(self.periods))
         self.signals_config = self.config.get("params", {}).get("signals", {})
+        # 价格低于均线的幅度超过 threshold（如 0.02 表示 2%）才算跌破
+        self.threshold = float(self.config.get("params", {}).get("threshold", 0.0))
+        # 只计算最近 max(periods) 根 K 线的均线，不计算完整的均线序列
+        self.last_bar_only = self.config.get("params", {}).get("last_bar_only", True)
 
     def analyze(self, data: pd.DataFrame) -> Optional[List[str]]:
         """分析股票，返回触发的信号"""
+        return signal_messages(self.detect(data))
+
+    def detect(self, data: pd.DataFrame) -> Optional[List[Signal]]:
+        """分析股票，返回触发的 (信号标识, 消息)"""
         if data is None or len(data) < max(self.periods):
             return None
 
@@ -50,40 +114,148 @@ class MovingAverageStrategy(Strategy):
             logger.error("数据缺少 'close' 列")
             return None
 
-        # 计算移动平均线
-        close_prices = data["close"]
+        latest_price = data["close"].iloc[-1]
 
-        for period in self.periods:
-            data[f"MA{period}"] = close_prices.rolling(window=period).mean()
+        if self.last_bar_only:
+            averages = {period: self.indicator(data, "sma_last", period) for period in self.periods}
+        else:
+            averages = {period: self.indicator(data, "sma", period).iloc[-1] for period in self.periods}
 
-        # 获取最新数据
-        latest = data.iloc[-1]
-        latest_price = latest["close"]
+        return self.detect_signals(latest_price, averages)
 
-        signals = []
+    def analyze_panel(self, closes: np.ndarray) -> np.ndarray:
+        """
+        对整个股票池一次性计算最新价是否跌破各均线
 
-        # 检查是否跌破各均线
-        if pd.notna(latest.get("MA5")) and latest_price < latest["MA5"]:
-            signal_msg = self.signals_config.get(
-                "break_ma5", f"价格 ({latest_price:.2f}) 已跌破5日均线 ({latest['MA5']:.2f})"
-            )
-            signals.append(signal_msg)
+        Args:
+            closes: (日期 × 股票) 收盘价矩阵，每列按最新日期对齐到最后一行，
+                历史不足的部分填 NaN（见 align_closes）
 
-        if pd.notna(latest.get("MA10")) and latest_price < latest["MA10"]:
-            signal_msg = self.signals_config.get(
-                "break_ma10", f"价格 ({latest_price:.2f}) 已跌破10日均线 ({latest['MA10']:.2f})"
+        Returns:
+            (股票 × periods) 的布尔矩阵，列顺序与 self.periods 一致
+        """
+        price, averages = self._panel_averages(closes)
+        return np.column_stack(
+            [price < self._trigger_level(averages[period]) for period in self.periods]
+        )
+
+    def panel_signals(self, closes: np.ndarray) -> List[Optional[List[Signal]]]:
+        """
+        基于 analyze_panel 的计算结果生成每只股票的信号，结果与逐只调用 detect 一致
+
+        Args:
+            closes: 同 analyze_panel
+
+        Returns:
+            与 closes 列顺序一致的信号列表
+        """
+        price, averages = self._panel_averages(closes)
+        mask = np.zeros(price.shape, dtype=bool)
+        for period in self.signal_periods:
+            mask |= price < self._trigger_level(averages[period])
+
+        results: List[Optional[List[Signal]]] = [None] * len(price)
+        for i in np.flatnonzero(mask):
+            results[i] = self.detect_signals(
+                price[i], {period: ma[i] for period, ma in averages.items()}
             )
-            signals.append(signal_msg)
+        return results
 
-        if pd.notna(latest.get("MA20")) and latest_price < latest["MA20"]:
-            signal_msg = self.signals_config.get(
-                "break_ma20", f"价格 ({latest_price:.2f}) 已跌破20日均线 ({latest['MA20']:.2f})"
+    def _panel_averages(self, closes: np.ndarray):
+        """计算最新价和各周期最新均线值，历史长度不足的股票均线为 NaN"""
+        closes = np.asarray(closes, dtype=np.float64)
+        if closes.ndim != 2:
+            raise ValueError("closes 必须是 (日期 × 股票) 的二维矩阵")
+
+        max_period = max(self.periods)
+        if closes.shape[0] < max_period:
+            closes = np.vstack(
+                [np.full((max_period - closes.shape[0], closes.shape[1]), np.nan), closes]
             )
-            signals.append(signal_msg)
+
+        averages = self._trailing_averages(closes[-max_period:])
+
+        # 与 analyze 一致：历史长度不足最长周期时不产生信号
+        lengths = closes.shape[0] - np.argmax(~np.isnan(closes), axis=0)
+        lengths[np.isnan(closes).all(axis=0)] = 0
+        short = lengths < max_period
+        for period in self.periods:
+            averages[period][short] = np.nan
+
+        return closes[-1], averages
+
+    def _trailing_averages(self, tail: np.ndarray) -> Dict[int, np.ndarray]:
+        """
+        由最近 max(periods) 行计算各周期的最新均线值
+
+        倒序累加后第 p 行即最近 p 日之和，一次遍历得到所有周期；窗口内有 NaN 时结果为 NaN。
+        tail 可以是一维序列或 (日期 × 股票) 矩阵。
+        """
+        window_sums = np.cumsum(tail[::-1], axis=0)
+        return {period: window_sums[period - 1] / period for period in self.periods}
+
+    def signal_matrix(
+        self, closes: np.ndarray, context: Optional[PanelContext] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        每个日期的跌破均线信号
+
+        与 analyze 的规则一致：历史长度不足最长周期、窗口内有缺失值时不产生信号。
+        """
+        context = context or PanelContext(closes)
+        enough_history = context.lengths >= max(self.periods)
+
+        with np.errstate(invalid="ignore"):
+            return {
+                f"break_ma{period}": enough_history
+                & (context.closes < self._trigger_level(context.mean(period)))
+                for period in self.signal_periods
+            }
+
+    def _trigger_level(self, ma):
+        """跌破判定线：均线下方 threshold 比例处"""
+        return ma * (1 - self.threshold) if self.threshold else ma
+
+    def build_signals(self, price: float, averages: Dict[int, float]) -> Optional[List[str]]:
+        """根据最新价和均线值生成信号"""
+        return signal_messages(self.detect_signals(price, averages))
+
+    def detect_signals(self, price: float, averages: Dict[int, float]) -> Optional[List[Signal]]:
+        """根据最新价和均线值生成 (信号标识, 消息)，标识为 break_ma<周期>"""
+        signals = []
+
+        # 检查是否跌破各均线
+        for period in self.signal_periods:
+            ma = averages.get(period)
+            if ma is not None and pd.notna(ma) and price < self._trigger_level(ma):
+                signal_id = f"break_ma{period}"
+                signal_msg = self.signals_config.get(
+                    signal_id, f"价格 ({price:.2f}) 已跌破{period}日均线 ({ma:.2f})"
+                )
+                signals.append((signal_id, signal_msg))
 
         return signals if signals else None
 
 
+def align_closes(series: Sequence) -> np.ndarray:
+    """
+    把多只股票的收盘价序列按最新日期对齐成 (日期 × 股票) 矩阵
+
+    Args:
+        series: 每只股票的收盘价序列（按日期升序）
+
+    Returns:
+        行数为最长序列长度的矩阵，较短序列的开头填 NaN
+    """
+    arrays = [np.asarray(values, dtype=np.float64) for values in series]
+    rows = max((len(values) for values in arrays), default=0)
+    closes = np.full((rows, len(arrays)), np.nan)
+    for i, values in enumerate(arrays):
+        if len(values):
+            closes[rows - len(values):, i] = values
+    return closes
+
+
 class StrategyFactory:
     """策略工厂"""
 
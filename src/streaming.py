@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""盘中流式监控模块 - 逐笔/逐分钟更新当日 K 线的均线并实时检查信号"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .providers import MARKET_TZ, SESSION_OPEN
+from .strategies import MovingAverageStrategy, Signal
+
+logger = logging.getLogger(__name__)
+
+# (时间, 股票代码, 价格)
+Bar = Tuple[datetime, str, float]
+
+
+class RollingMean:
+    """O(1) 更新的滑动平均：维护窗口内数据和累计和"""
+
+    # 累计和做加减会积累浮点误差，每隔若干次更新按窗口重新求和
+    RESYNC_INTERVAL = 10000
+
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.window: deque = deque(maxlen=self.period)
+        self.total = 0.0
+        self._updates = 0
+
+    def update(self, value: float) -> Optional[float]:
+        """加入一个新值，窗口未满时返回 None"""
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+
+        self._updates += 1
+        if self._updates % self.RESYNC_INTERVAL == 0:
+            self.total = sum(self.window)
+
+        return self.value
+
+    def replace(self, value: float) -> Optional[float]:
+        """用新值替换窗口中最新的一个值（更新当日未收盘的 K 线），窗口为空时等同 update"""
+        if not self.window:
+            return self.update(value)
+        self.total += value - self.window[-1]
+        self.window[-1] = value
+
+        self._updates += 1
+        if self._updates % self.RESYNC_INTERVAL == 0:
+            self.total = sum(self.window)
+
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        """当前均值，窗口未满时为 None"""
+        if len(self.window) < self.period:
+            return None
+        return self.total / self.period
+
+
+class StreamingMonitor:
+    """
+    流式均线监控
+
+    为每只股票维护各周期的日线 RollingMean（先用 seed 以历史日收盘价预热）。
+    同一交易日内的报价替换当日 K 线的收盘价，新的交易日才追加一根 K 线，
+    每次都只做 O(1) 更新，然后按 MovingAverageStrategy 的条件检查信号。
+    信号以标识（如 break_ma5）去重，只在新出现时回调，持续触发的信号不会每笔重复通知。
+    """
+
+    def __init__(
+        self,
+        strategy: MovingAverageStrategy,
+        on_signal: Optional[Callable[[str, float, List[str], datetime], None]] = None,
+    ):
+        """
+        Args:
+            strategy: 提供周期和信号文案的均线策略
+            on_signal: 新信号回调 (股票代码, 价格, 新触发的信号, 时间)
+        """
+        self.strategy = strategy
+        self.on_signal = on_signal
+        self._means: Dict[str, Dict[int, RollingMean]] = {}
+        self._counts: Dict[str, int] = {}
+        self._prices: Dict[str, float] = {}
+        self._days: Dict[str, date] = {}
+        self._active: Dict[str, set] = {}
+
+    def seed(self, stock_code: str, closes: Iterable[float], last_date: Optional[date] = None) -> None:
+        """
+        用历史日收盘价预热窗口，不触发回调
+
+        Args:
+            stock_code: 股票代码
+            closes: 按日期升序的日收盘价
+            last_date: 最后一个收盘价的交易日；同一天的报价会替换这根 K 线而不是追加
+        """
+        for price in closes:
+            self._update_means(stock_code, float(price), same_day=False)
+        if last_date is not None:
+            self._days[stock_code] = last_date
+        self._active[stock_code] = {signal_id for signal_id, _ in self._signals(stock_code)}
+
+    def update(self, stock_code: str, price: float, timestamp: Optional[datetime] = None) -> List[str]:
+        """
+        处理一笔新报价/一根新 K 线：与上一笔同一交易日时更新当日 K 线，否则追加一根
+
+        Returns:
+            本次新出现的信号
+        """
+        price = float(price)
+        timestamp = timestamp or datetime.now()
+        day = timestamp.date()
+        same_day = self._days.get(stock_code) == day
+        self._days[stock_code] = day
+        self._update_means(stock_code, price, same_day)
+
+        signals = self._signals(stock_code)
+        previous = self._active.get(stock_code, set())
+        new_signals = [message for signal_id, message in signals if signal_id not in previous]
+        self._active[stock_code] = {signal_id for signal_id, _ in signals}
+
+        if new_signals and self.on_signal:
+            self.on_signal(stock_code, price, new_signals, timestamp)
+
+        return new_signals
+
+    def run(self, bars: Iterable[Bar]) -> int:
+        """
+        消费一个 K 线流直到结束
+
+        Returns:
+            触发的新信号总数
+        """
+        count = 0
+        for timestamp, stock_code, price in bars:
+            count += len(self.update(stock_code, price, timestamp))
+        return count
+
+    def _update_means(self, stock_code: str, price: float, same_day: bool) -> None:
+        """same_day 为 True 时替换当日 K 线的收盘价，否则追加一根新 K 线"""
+        means = self._means.get(stock_code)
+        if means is None:
+            means = {period: RollingMean(period) for period in self.strategy.periods}
+            self._means[stock_code] = means
+
+        if same_day and self._counts.get(stock_code):
+            for rolling in means.values():
+                rolling.replace(price)
+        else:
+            for rolling in means.values():
+                rolling.update(price)
+            self._counts[stock_code] = self._counts.get(stock_code, 0) + 1
+        self._prices[stock_code] = price
+
+    def _signals(self, stock_code: str) -> List[Signal]:
+        """按当前均线检查信号；与 analyze 一致，数据不足最长周期时不产生信号"""
+        if self._counts.get(stock_code, 0) < max(self.strategy.periods):
+            return []
+
+        means = self._means[stock_code]
+        averages = {period: rolling.value for period, rolling in means.items()}
+        return self.strategy.detect_signals(self._prices[stock_code], averages) or []
+
+
+class ReplayProvider:
+    """回放已记录的 K 线，用于离线测试流式监控"""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], time_column: str = "date", speed: Optional[float] = None):
+        """
+        Args:
+            frames: 股票代码 -> 包含时间列和 'close' 列的 DataFrame
+            time_column: 时间列名
+            speed: 回放倍速，None 表示不等待、尽快回放
+        """
+        self.frames = frames
+        self.time_column = time_column
+        self.speed = speed
+
+    def bars(self) -> Iterator[Bar]:
+        """按时间顺序产出所有股票的 K 线"""
+        merged = pd.concat(
+            [
+                pd.DataFrame(
+                    {
+                        "time": pd.to_datetime(frame[self.time_column]),
+                        "code": stock_code,
+                        "close": frame["close"].to_numpy(),
+                    }
+                )
+                for stock_code, frame in self.frames.items()
+            ],
+            ignore_index=True,
+        ).sort_values("time", kind="stable")
+
+        previous = None
+        for timestamp, stock_code, price in merged.itertuples(index=False):
+            if self.speed and previous is not None:
+                time.sleep(max(0.0, (timestamp - previous).total_seconds() / self.speed))
+            previous = timestamp
+            yield timestamp.to_pydatetime(), stock_code, price
+
+
+def _skip_reason(provider, now: datetime) -> Optional[str]:
+    """当前不应轮询快照的原因（节假日和开盘前的快照不是当日行情），可以轮询时返回 None"""
+    trade_dates = provider.fetch_trade_dates() if hasattr(provider, "fetch_trade_dates") else None
+    if not trade_dates:
+        return "无法获取交易日历"
+    if now.date() not in trade_dates:
+        return "非交易日"
+    if now.time() < SESSION_OPEN:
+        return "尚未开盘"
+    return None
+
+
+def poll_snapshots(
+    provider,
+    stock_codes: List[str],
+    interval_seconds: float = 60,
+    stop_event: Optional[threading.Event] = None,
+) -> Iterator[Bar]:
+    """
+    定时轮询全市场快照，产出关注股票的最新价
+
+    只在交易日开盘后请求快照（按交易所日历判断），时间为交易所当地时间。
+
+    Args:
+        provider: 实现了 fetch_snapshot 和 fetch_trade_dates 的提供者（如 AkshareProvider）
+        stock_codes: 关注的股票代码
+        interval_seconds: 轮询间隔
+        stop_event: 设置后停止轮询
+    """
+    stop_event = stop_event or threading.Event()
+    codes = {stock_code.strip()[-6:]: stock_code for stock_code in stock_codes}
+    skipped = None
+
+    while not stop_event.is_set():
+        now = datetime.now(MARKET_TZ).replace(tzinfo=None)
+        reason = _skip_reason(provider, now)
+        if reason != skipped:
+            if reason:
+                logger.info(f"{reason}，暂停轮询全市场快照")
+            skipped = reason
+
+        snapshot = None if reason else provider.fetch_snapshot()
+        if snapshot is not None:
+            for code in snapshot.index.intersection(list(codes)):
+                yield now, codes[code], float(snapshot.at[code, "close"])
+
+        stop_event.wait(interval_seconds)
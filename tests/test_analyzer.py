@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""分析器测试：本地保存的行情存储只分析本次请求的股票"""
+
+import tempfile
+import unittest
+
+from src.analyzer import StockAnalyzer
+from src.providers import MockProvider
+
+# 每只股票都会触发的表达式信号，便于检查分析了哪些股票
+ALWAYS = {"type": "expression", "name": "always", "params": {"signals": {"always": "close > 0"}}}
+
+
+class CountingProvider(MockProvider):
+    def __init__(self):
+        self.fetched = []
+
+    def fetch(self, stock_code):
+        self.fetched.append(stock_code)
+        return super().fetch(stock_code)
+
+
+class TestSavedStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.provider = CountingProvider()
+        self.analyzer = StockAnalyzer(
+            self.provider, [ALWAYS], use_store=True, history_path=self.tmp_dir.name
+        )
+        self.codes = [f"{600000 + i}" for i in range(40)]
+
+    def test_subset_of_saved_store(self):
+        self.assertEqual(len(self.analyzer.analyze_batch(self.codes)), 40)
+        self.provider.fetched.clear()
+
+        subset = [self.codes[7], self.codes[2], self.codes[30]]
+        results = self.analyzer.analyze_batch(subset)
+
+        # 直接打开了保存的存储，没有重新获取
+        self.assertEqual(self.provider.fetched, [])
+        self.assertEqual([result["code"] for result in results], subset)
+        self.assertEqual(self.analyzer.analyzed_codes, set(subset))
+
+    def test_empty_request(self):
+        self.analyzer.analyze_batch(self.codes[:5])
+        self.assertEqual(self.analyzer.analyze_batch([]), [])
+        self.assertEqual(self.analyzer.analyzed_codes, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""回测测试：信号时间线与逐日调用 detect 一致（含停牌），统计和参数扫描"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.backtest import BarLayout, build_panel, forward_returns, onsets, run_backtest, run_sweep
+from src.indicator_strategies import RSIStrategy
+from src.strategies import MovingAverageStrategy
+
+
+def make_frames() -> dict:
+    """三只股票：完整历史、中途停牌 5 天、上市较晚且停牌 2 天"""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2024-01-01", periods=90)
+    gaps = {"A": [], "B": list(range(30, 35)), "C": list(range(12)) + [50, 51]}
+
+    frames = {}
+    for code, missing in gaps.items():
+        keep = np.ones(len(dates), dtype=bool)
+        keep[missing] = False
+        closes = 10 + np.cumsum(rng.normal(0, 0.3, keep.sum()))
+        frames[code] = pd.DataFrame({"date": dates[keep], "close": closes})
+    return frames
+
+
+class TestBacktestTimeline(unittest.TestCase):
+    def setUp(self):
+        self.frames = make_frames()
+        self.panel = build_panel(self.frames)
+
+    def assertTimelineMatchesDetect(self, strategy, result):
+        """每只股票每个交易日的信号与对截至当日的实际 K 线调用 detect 的结果相同"""
+        triggered = 0
+        for code, frame in self.frames.items():
+            for end in range(1, len(frame) + 1):
+                day = frame["date"].iloc[end - 1]
+                detected = {signal_id for signal_id, _ in strategy.detect(frame.iloc[:end]) or []}
+                timeline = {
+                    signal_id for signal_id, mask in result.timelines.items() if mask.at[day, code]
+                }
+                self.assertEqual(detected, timeline, f"{code} {day.date()}")
+                triggered += len(detected)
+        self.assertGreater(triggered, 0)
+
+    def test_build_panel_marks_suspension_as_nan(self):
+        self.assertEqual(self.panel.shape, (90, 3))
+        self.assertEqual(self.panel["B"].isna().sum(), 5)
+        self.assertTrue(self.panel["C"].iloc[:12].isna().all())
+
+    def test_moving_average_timeline_matches_detect(self):
+        strategy = MovingAverageStrategy({})
+        result = run_backtest(strategy, self.panel)
+        self.assertEqual(set(result.timelines), {"break_ma5", "break_ma10", "break_ma20"})
+        self.assertTimelineMatchesDetect(strategy, result)
+
+    def test_indicator_timeline_matches_detect(self):
+        strategy = RSIStrategy({"params": {"oversold": 45, "overbought": 55}})
+        self.assertTimelineMatchesDetect(strategy, run_backtest(strategy, self.panel))
+
+    def test_no_signal_on_suspended_days(self):
+        result = run_backtest(MovingAverageStrategy({}), self.panel)
+        for mask in result.timelines.values():
+            self.assertFalse(mask["B"].iloc[30:35].any())
+            self.assertFalse(mask["C"].iloc[:12].any())
+
+    def test_summary_counts_onsets(self):
+        result = run_backtest(MovingAverageStrategy({}), self.panel, horizons=(1, 5))
+        for signal_id, mask in result.timelines.items():
+            self.assertEqual(result.summary.at[signal_id, "events"], int(onsets(mask.to_numpy()).sum()))
+        self.assertIn("hit_rate_5d", result.summary.columns)
+
+    def test_sweep_matches_backtest(self):
+        sweep = run_sweep(self.panel, [(5, 10, 20)], thresholds=(0.0,), horizons=(1, 5))
+        backtest = run_backtest(MovingAverageStrategy({}), self.panel, horizons=(1, 5))
+        pd.testing.assert_frame_equal(
+            sweep.loc[("5,10,20", 0.0)], backtest.summary, check_names=False
+        )
+
+    def test_sweep_signals_on_every_configured_period(self):
+        sweep = run_sweep(self.panel, [(5, 30), (10, 20, 60)], horizons=(1,))
+        self.assertEqual(
+            list(sweep.index.droplevel("threshold")),
+            [("5,30", "break_ma5"), ("5,30", "break_ma30"), ("10,20,60", "break_ma10"),
+             ("10,20,60", "break_ma20"), ("10,20,60", "break_ma60")],
+        )
+
+        strategy = MovingAverageStrategy({"params": {"periods": [10, 20, 60]}})
+        backtest = run_backtest(strategy, self.panel, horizons=(1,))
+        pd.testing.assert_frame_equal(
+            sweep.sort_index().loc[("10,20,60", 0.0)], backtest.summary, check_names=False
+        )
+        self.assertTimelineMatchesDetect(strategy, backtest)
+
+
+class TestBarLayout(unittest.TestCase):
+    def test_pack_and_unpack(self):
+        closes = np.array(
+            [
+                [1.0, np.nan],
+                [2.0, 10.0],
+                [3.0, np.nan],
+                [4.0, 11.0],
+            ]
+        )
+        layout = BarLayout(closes)
+        packed = layout.pack(closes)
+        np.testing.assert_array_equal(packed[:, 0], [1.0, 2.0, 3.0, 4.0])
+        np.testing.assert_array_equal(packed[:, 1], [np.nan, np.nan, 10.0, 11.0])
+
+        mask = layout.unpack(~np.isnan(packed))
+        np.testing.assert_array_equal(mask, ~np.isnan(closes))
+
+    def test_forward_returns(self):
+        closes = np.array([10.0, 11.0, 12.1])
+        np.testing.assert_allclose(forward_returns(closes, 1), [0.1, 0.1, np.nan])
+        self.assertTrue(np.isnan(forward_returns(closes, 5)).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""表达式策略测试：共享求值计划时各策略只计算自己的节点"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.expressions import ExpressionStrategy, share_plan
+from src.indicators import IndicatorCache
+
+
+def expression(name: str, rule: str) -> ExpressionStrategy:
+    return ExpressionStrategy({"name": name, "params": {"signals": {name: rule}}})
+
+
+def falling_frame(with_volume: bool) -> pd.DataFrame:
+    data = pd.DataFrame({"close": np.linspace(12, 8, 40)})
+    if with_volume:
+        data["volume"] = np.full(40, 1e6)
+        data.loc[39, "volume"] = 5e6
+    data.attrs["code"] = "000001"
+    return data
+
+
+class TestSharedPlan(unittest.TestCase):
+    def setUp(self):
+        self.cache = IndicatorCache()
+        self.price = expression("below_ma10", "close < ma(10)")
+        self.volume = expression("volume_surge", "volume_ratio(20) > 2 and close < ma(10)")
+        share_plan([self.price, self.volume])
+        for strategy in (self.price, self.volume):
+            strategy.indicator_cache = self.cache
+
+    def test_missing_field_only_affects_strategy_that_uses_it(self):
+        data = falling_frame(with_volume=False)
+
+        # 另一策略需要的 volume 缺失，不影响只用收盘价的策略
+        self.assertEqual(self.price.detect(data), [("below_ma10", "满足条件: close < ma(10)")])
+        self.assertIsNone(self.volume.detect(data))
+
+    def test_same_results_as_separate_plans(self):
+        data = falling_frame(with_volume=True)
+        separate = [
+            expression("below_ma10", "close < ma(10)"),
+            expression("volume_surge", "volume_ratio(20) > 2 and close < ma(10)"),
+        ]
+        for shared, alone in zip((self.price, self.volume), separate):
+            self.assertIsNotNone(shared.detect(data))
+            self.assertEqual(shared.detect(data), alone.detect(data))
+
+    def test_shared_nodes_evaluated_once(self):
+        data = falling_frame(with_volume=True)
+        self.price.detect(data)
+        values = self.price.plan.evaluate_frame(data, self.price._targets, self.cache)
+        # 只计算了第一个策略的节点
+        self.assertLess(sum(value is not None for value in values), len(self.price.plan))
+
+        self.volume.detect(data)
+        again = self.volume.plan.evaluate_frame(data, self.volume._targets, self.cache)
+        # 同一只股票的求值结果在各策略间共享，在同一个列表上补充
+        self.assertIs(values, again)
+        self.assertTrue(all(value is not None for value in again))
+
+
+if __name__ == "__main__":
+    unittest.main()
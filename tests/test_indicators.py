@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""指标测试：NumPy 内核与 pandas 写法一致，单只股票路径与矩阵路径的信号一致"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import kernels
+from src.expressions import ExpressionStrategy
+from src.indicator_strategies import (
+    ATRStrategy,
+    BollingerStrategy,
+    IndicatorStrategy,
+    MACDStrategy,
+    RSIStrategy,
+    VolumeBreakoutStrategy,
+)
+from src.indicators import IndicatorCache, PanelContext, WindowSums, compute_indicator
+from src.strategies import MovingAverageStrategy, align_closes
+
+
+def random_frame(length: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 10 + np.cumsum(rng.normal(0, 0.3, length))
+    high = close + np.abs(rng.normal(0, 0.2, length))
+    low = close - np.abs(rng.normal(0, 0.2, length))
+    volume = np.round(rng.lognormal(13, 0.5, length))
+    # 偶尔放量，保证成交量突破信号会出现
+    volume[rng.random(length) < 0.05] *= 4
+    return pd.DataFrame({"high": high, "low": low, "close": close, "volume": volume})
+
+
+def pandas_wilder(series: pd.Series, period: int) -> pd.Series:
+    return series.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+
+
+class TestKernels(unittest.TestCase):
+    """内核与对应的 pandas 写法逐位置比较（NaN 位置也必须相同）"""
+
+    def setUp(self):
+        self.data = random_frame(200, seed=0)
+        self.close = self.data["close"]
+
+    def assertSeriesClose(self, actual, expected):
+        np.testing.assert_allclose(actual, np.asarray(expected, dtype=np.float64), rtol=1e-9, atol=1e-9)
+
+    def test_rolling_mean(self):
+        self.assertSeriesClose(kernels.rolling_mean(self.close, 20), self.close.rolling(20).mean())
+
+    def test_rolling_std(self):
+        self.assertSeriesClose(kernels.rolling_std(self.close, 20), self.close.rolling(20).std(ddof=0))
+
+    def test_ema(self):
+        self.assertSeriesClose(kernels.ema(self.close, 12), self.close.ewm(span=12, adjust=False).mean())
+        self.assertSeriesClose(
+            kernels.ema(self.close, 26, min_periods=26),
+            self.close.ewm(span=26, adjust=False, min_periods=26).mean(),
+        )
+
+    def test_rsi(self):
+        change = self.close.diff()
+        gain = pandas_wilder(change.clip(lower=0), 14)
+        loss = pandas_wilder(-change.clip(upper=0), 14)
+        self.assertSeriesClose(kernels.rsi(self.close, 14), 100 - 100 / (1 + gain / loss))
+
+    def test_macd(self):
+        line = (
+            self.close.ewm(span=12, adjust=False).mean()
+            - self.close.ewm(span=26, adjust=False, min_periods=26).mean()
+        )
+        signal = line.ewm(span=9, adjust=False, min_periods=9).mean()
+        actual = kernels.macd(self.close, 12, 26, 9)
+        for actual_part, expected_part in zip(actual, (line, signal, line - signal)):
+            self.assertSeriesClose(actual_part, expected_part)
+
+    def test_bollinger(self):
+        middle = self.close.rolling(20).mean()
+        width = 2.0 * self.close.rolling(20).std(ddof=0)
+        actual = kernels.bollinger(self.close, 20, 2.0)
+        for actual_part, expected_part in zip(actual, (middle + width, middle, middle - width)):
+            self.assertSeriesClose(actual_part, expected_part)
+
+    def test_atr(self):
+        high, low = self.data["high"], self.data["low"]
+        previous = self.close.shift()
+        true_range = pd.concat(
+            [high - low, (high - previous).abs(), (low - previous).abs()], axis=1
+        ).max(axis=1)
+        self.assertSeriesClose(kernels.atr(high, low, self.close, 14), pandas_wilder(true_range, 14))
+
+    def test_volume_ratio(self):
+        volume = self.data["volume"]
+        expected = volume / volume.rolling(20).mean().shift()
+        self.assertSeriesClose(kernels.volume_ratio(volume, 20), expected)
+
+    def test_matrix_matches_columns(self):
+        """矩阵输入（开头以 NaN 填充较短的历史）与逐列计算一致"""
+        series = [self.close.to_numpy()[-length:] for length in (200, 150, 30)]
+        matrix = align_closes(series)
+        for name, func in (
+            ("ema", lambda v: kernels.ema(v, 12)),
+            ("rsi", lambda v: kernels.rsi(v, 14)),
+            ("bollinger", lambda v: kernels.bollinger(v, 20)[2]),
+        ):
+            with self.subTest(indicator=name):
+                result = func(matrix)
+                for i, values in enumerate(series):
+                    np.testing.assert_allclose(result[-len(values):, i], func(values), rtol=1e-9, atol=1e-9)
+
+    def test_window_sums(self):
+        values = self.close.to_numpy().copy()
+        values[50] = np.nan
+        for period in (5, 20):
+            expected = pd.Series(values).rolling(period).mean()
+            np.testing.assert_allclose(WindowSums(values).mean(period), expected, rtol=1e-9, atol=1e-9)
+
+
+class TestFrameAndPanelSignals(unittest.TestCase):
+    """同一策略在单只股票上的 detect 与在矩阵上的 signal_matrix 结果一致"""
+
+    STRATEGIES = [
+        MovingAverageStrategy({}),
+        RSIStrategy({"params": {"oversold": 40, "overbought": 60}}),
+        MACDStrategy({}),
+        BollingerStrategy({"params": {"num_std": 1.5}}),
+        ATRStrategy({"params": {"multiplier": 1.0}}),
+        VolumeBreakoutStrategy({"params": {"multiplier": 1.5}}),
+        ExpressionStrategy(
+            {
+                "params": {
+                    "signals": {
+                        "below_ma10": "close < ma(10) and rsi(14) < 50",
+                        "range_up": "close - prev(close) > atr(14)",
+                    }
+                }
+            }
+        ),
+    ]
+
+    def setUp(self):
+        self.frames = [random_frame(length, seed) for seed, length in enumerate([90, 70, 40])]
+
+    def panel(self, column: str) -> np.ndarray:
+        return align_closes([frame[column].to_numpy() for frame in self.frames])
+
+    def test_detect_matches_signal_matrix(self):
+        rows = max(len(frame) for frame in self.frames)
+        context = PanelContext(
+            self.panel("close"), {name: self.panel(name) for name in ("high", "low", "volume")}
+        )
+
+        for strategy in self.STRATEGIES:
+            matrix = strategy.signal_matrix(context.closes, context)
+            triggered = 0
+            for i, frame in enumerate(self.frames):
+                offset = rows - len(frame)
+                for end in range(1, len(frame) + 1):
+                    with self.subTest(strategy=strategy.label, symbol=i, bars=end):
+                        detected = {signal_id for signal_id, _ in strategy.detect(frame.iloc[:end]) or []}
+                        expected = {
+                            signal_id for signal_id, mask in matrix.items() if mask[offset + end - 1, i]
+                        }
+                        self.assertEqual(detected, expected)
+                        triggered += len(detected)
+            # 测试数据要能触发信号，否则一致性检查没有意义
+            self.assertGreater(triggered, 0, strategy.label)
+
+    def test_evaluate_must_be_implemented(self):
+        class NoRule(IndicatorStrategy):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoRule("no_rule")
+
+
+class TestIndicatorCache(unittest.TestCase):
+    def test_shared_between_calls(self):
+        cache = IndicatorCache()
+        data = random_frame(50, seed=1)
+        data.attrs["code"] = "000001"
+
+        first = compute_indicator(data, "rsi", 14, cache=cache)
+        second = compute_indicator(data, "rsi", 14, cache=cache)
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_revised_last_bar_is_recomputed(self):
+        cache = IndicatorCache()
+        data = random_frame(50, seed=1)
+        data.attrs["code"] = "000001"
+        before = compute_indicator(data, "sma_last", 5, cache=cache)
+
+        revised = data.copy()
+        revised.attrs["code"] = "000001"
+        revised.loc[revised.index[-1], "close"] += 1.0
+        after = compute_indicator(revised, "sma_last", 5, cache=cache)
+
+        self.assertAlmostEqual(after - before, 0.2)
+
+    def test_evicts_least_recently_used(self):
+        cache = IndicatorCache(maxsize=2)
+        for key in ("a", "b", "a", "c"):
+            cache.get_or_compute(key, lambda: key)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_or_compute("a", lambda: "new"), "a")
+        self.assertEqual(cache.get_or_compute("b", lambda: "new"), "new")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""后台通知队列测试：重试、指数退避、统计和关闭"""
+
+import threading
+import unittest
+from unittest import mock
+
+from src.notifier import NotificationQueue
+
+
+class FlakySender:
+    """前 failures 次发送失败，之后成功；记录每次调用"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, subject: str, body: str) -> bool:
+        with self._lock:
+            self.calls.append(subject)
+            return len(self.calls) > self.failures
+
+
+class TestNotificationQueue(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("src.notifier.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_queue(self, send, **kwargs) -> NotificationQueue:
+        notification_queue = NotificationQueue(send, **kwargs)
+        self.addCleanup(notification_queue.close, 5)
+        return notification_queue
+
+    def test_delivers_in_background(self):
+        sender = FlakySender()
+        notification_queue = self.make_queue(sender, workers=2)
+        for i in range(5):
+            notification_queue.put(f"主题 {i}", "正文")
+
+        self.assertTrue(notification_queue.flush(5))
+        self.assertEqual(sorted(sender.calls), [f"主题 {i}" for i in range(5)])
+        self.assertEqual((notification_queue.sent, notification_queue.failed), (5, 0))
+        self.sleep.assert_not_called()
+
+    def test_retries_with_exponential_backoff(self):
+        sender = FlakySender(failures=3)
+        notification_queue = self.make_queue(sender, max_retries=3, backoff_seconds=1.0)
+        notification_queue.put("主题", "正文")
+
+        self.assertTrue(notification_queue.flush(5))
+        self.assertEqual(len(sender.calls), 4)
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1.0, 2.0, 4.0])
+        self.assertEqual((notification_queue.sent, notification_queue.failed), (1, 0))
+
+    def test_backoff_is_capped(self):
+        sender = FlakySender(failures=10)
+        notification_queue = self.make_queue(
+            sender, max_retries=4, backoff_seconds=2.0, max_backoff_seconds=5.0
+        )
+        notification_queue.put("主题", "正文")
+
+        self.assertTrue(notification_queue.flush(5))
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [2.0, 4.0, 5.0, 5.0])
+
+    def test_gives_up_after_max_retries(self):
+        sender = FlakySender(failures=10)
+        notification_queue = self.make_queue(sender, max_retries=2)
+        notification_queue.put("主题", "正文")
+
+        self.assertTrue(notification_queue.flush(5))
+        self.assertEqual(len(sender.calls), 3)
+        self.assertEqual((notification_queue.sent, notification_queue.failed), (0, 1))
+
+    def test_on_delivered_only_after_success(self):
+        delivered = []
+        notification_queue = self.make_queue(FlakySender(failures=2), max_retries=1)
+        notification_queue.put("失败", "正文", lambda: delivered.append("失败"))
+        notification_queue.put("成功", "正文", lambda: delivered.append("成功"))
+
+        self.assertTrue(notification_queue.flush(5))
+        self.assertEqual(delivered, ["成功"])
+        self.assertEqual((notification_queue.sent, notification_queue.failed), (1, 1))
+
+    def test_worker_survives_send_exception(self):
+        calls = []
+
+        def send(subject: str, body: str) -> bool:
+            calls.append(subject)
+            if subject == "出错":
+                raise RuntimeError("boom")
+            return True
+
+        notification_queue = self.make_queue(send)
+        notification_queue.put("出错", "正文")
+        notification_queue.put("正常", "正文")
+
+        self.assertTrue(notification_queue.flush(5))
+        self.assertEqual(calls, ["出错", "正常"])
+        self.assertEqual(notification_queue.sent, 1)
+
+    def test_close_drains_and_rejects_new_items(self):
+        sender = FlakySender()
+        notification_queue = NotificationQueue(sender)
+        notification_queue.put("主题", "正文")
+
+        self.assertTrue(notification_queue.close(5))
+        self.assertEqual(sender.calls, ["主题"])
+        self.assertEqual(notification_queue.pending(), 0)
+        with self.assertRaises(RuntimeError):
+            notification_queue.put("关闭后", "正文")
+
+    def test_flush_times_out(self):
+        release = threading.Event()
+
+        def send(subject: str, body: str) -> bool:
+            return release.wait(5)
+
+        notification_queue = self.make_queue(send)
+        notification_queue.put("主题", "正文")
+
+        self.assertFalse(notification_queue.flush(0.05))
+        release.set()
+        self.assertTrue(notification_queue.flush(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""剖析测试：cProfile 结果按策略类和数据提供者类归因"""
+
+import os
+import pstats
+import tempfile
+import unittest
+
+from src.analyzer import StockAnalyzer
+from src.profiling import profile_call
+from src.providers import MockProvider
+from src.strategies import MovingAverageStrategy
+
+
+class TestCProfileAttribution(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.output = os.path.join(self.tmp_dir.name, "run.pstats")
+
+    def test_batch_attributed_to_strategies_and_provider(self):
+        analyzer = StockAnalyzer(MockProvider(), [{"type": "moving_average"}, {"type": "rsi"}])
+        codes = [f"{600000 + i}" for i in range(5)]
+
+        results, report = profile_call(lambda: analyzer.analyze_batch(codes), self.output)
+
+        self.assertIsInstance(results, list)
+        self.assertGreater(report["strategy"].get("MovingAverageStrategy", 0), 0)
+        self.assertGreater(report["strategy"].get("IndicatorStrategy", 0), 0)
+        self.assertGreater(report["provider"].get("MockProvider", 0), 0)
+
+    def test_nested_entry_methods_counted_once(self):
+        strategy = MovingAverageStrategy({"params": {"last_bar_only": False}})
+        frames = [MockProvider().fetch(f"{600000 + i}") for i in range(20)]
+
+        def run():
+            # analyze 内部调用 detect，两者都是入口方法
+            for _ in range(5):
+                for frame in frames:
+                    strategy.analyze(frame)
+
+        _, report = profile_call(run, self.output)
+
+        total = pstats.Stats(self.output).total_tt
+        attributed = report["strategy"]["MovingAverageStrategy"]
+        self.assertGreater(attributed, 0)
+        self.assertLessEqual(attributed, total * 1.01)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            profile_call(lambda: None, self.output, mode="trace")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""信号状态测试：新信号、重复提醒、解除，以及只在通知发送成功后记录状态"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from src.notifier import NotificationQueue
+from src.signal_state import SignalStateStore
+
+
+def result(code: str, *signals, strategy: str = "ma") -> dict:
+    """signals 为 (信号标识, 消息)"""
+    return {
+        "code": code,
+        "date": "2024-01-02",
+        "price": 10.0,
+        "signals": [message for _, message in signals],
+        "strategy_signals": {strategy: [message for _, message in signals]},
+        "signal_ids": {strategy: [signal_id for signal_id, _ in signals]},
+    }
+
+
+class TestSignalStateStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.state_file = os.path.join(self.tmp_dir.name, "signal_state.json")
+        self.store = SignalStateStore(self.state_file, realert_hours=24)
+
+    def run_once(self, results, stock_codes, delivered=None):
+        """filter 后按 delivered（默认全部）提交，返回需要通知的结果"""
+        changes = self.store.filter(results, stock_codes)
+        for delta in changes:
+            if delivered is None or delta["code"] in delivered:
+                self.store.commit(self.store.take([delta["code"]]))
+        return changes
+
+    def test_new_signal_then_unchanged(self):
+        changes = self.run_once([result("000001", ("break_ma5", "跌破 MA5 (9.80)"))], ["000001"])
+        self.assertEqual(changes[0]["signals"], ["跌破 MA5 (9.80)"])
+        self.assertEqual(changes[0]["cleared"], [])
+
+        # 标识不变，只是消息中的价格变化，不算新信号
+        changes = self.run_once([result("000001", ("break_ma5", "跌破 MA5 (9.70)"))], ["000001"])
+        self.assertEqual(changes, [])
+
+    def test_realert_after_interval(self):
+        self.run_once([result("000001", ("break_ma5", "跌破 MA5"))], ["000001"])
+        for entry in self.store.state.values():
+            entry["last_alert"] = (datetime.now() - timedelta(hours=25)).isoformat()
+
+        changes = self.run_once([result("000001", ("break_ma5", "跌破 MA5"))], ["000001"])
+        self.assertEqual(changes[0]["signals"], ["跌破 MA5"])
+        self.assertEqual(self.run_once([result("000001", ("break_ma5", "跌破 MA5"))], ["000001"]), [])
+
+    def test_no_realert(self):
+        self.store = SignalStateStore(self.state_file, realert_hours=None)
+        self.run_once([result("000001", ("a", "A"))], ["000001"])
+        for entry in self.store.state.values():
+            entry["last_alert"] = (datetime.now() - timedelta(days=30)).isoformat()
+        self.assertEqual(self.run_once([result("000001", ("a", "A"))], ["000001"]), [])
+
+    def test_cleared_signal(self):
+        self.run_once([result("000001", ("break_ma5", "跌破 MA5"), ("break_ma10", "跌破 MA10"))], ["000001"])
+
+        changes = self.run_once([result("000001", ("break_ma5", "跌破 MA5"))], ["000001"])
+        self.assertEqual(changes[0]["signals"], [])
+        self.assertEqual(changes[0]["cleared"], ["跌破 MA10"])
+
+        # 股票不再出现在结果中，剩余信号全部解除
+        changes = self.run_once([], ["000001"])
+        self.assertEqual(changes[0]["cleared"], ["跌破 MA5"])
+        self.assertEqual(self.store.state, {})
+
+    def test_codes_not_analyzed_keep_state(self):
+        self.run_once([result("000001", ("break_ma5", "跌破 MA5"))], ["000001"])
+        # 获取失败的股票不在 stock_codes 中，不判断为解除
+        self.assertEqual(self.run_once([], []), [])
+        self.assertEqual(len(self.store.state), 1)
+
+    def test_failed_delivery_notifies_again(self):
+        signals = [result("000001", ("a", "A")), result("000002", ("b", "B"))]
+        self.run_once(signals, ["000001", "000002"], delivered={"000001"})
+
+        changes = self.run_once(signals, ["000001", "000002"])
+        self.assertEqual([delta["code"] for delta in changes], ["000002"])
+
+    def test_state_persists(self):
+        self.run_once([result("000001", ("break_ma5", "跌破 MA5"))], ["000001"])
+        reloaded = SignalStateStore(self.state_file)
+        self.assertEqual(reloaded.state, self.store.state)
+        self.assertEqual(reloaded.filter([result("000001", ("break_ma5", "跌破 MA5"))], ["000001"]), [])
+
+    @mock.patch("src.notifier.time.sleep")
+    def test_commit_from_queue_only_after_send(self, _sleep):
+        outcomes = {"000001": True, "000002": False}
+        notification_queue = NotificationQueue(lambda subject, body: outcomes[subject], max_retries=1)
+        self.addCleanup(notification_queue.close, 5)
+
+        signals = [result("000001", ("a", "A")), result("000002", ("b", "B"))]
+        for delta in self.store.filter(signals, ["000001", "000002"]):
+            changes = self.store.take([delta["code"]])
+            notification_queue.put(delta["code"], "正文", lambda changes=changes: self.store.commit(changes))
+        self.assertTrue(notification_queue.flush(5))
+
+        # 后台发送失败的股票没有记录状态，下次运行重新通知
+        self.assertEqual({entry["code"] for entry in self.store.state.values()}, {"000001"})
+        changes = self.store.filter(signals, ["000001", "000002"])
+        self.assertEqual([delta["code"] for delta in changes], ["000002"])
+
+
+if __name__ == "__main__":
+    unittest.main()
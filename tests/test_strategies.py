@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""均线策略测试：最新一根 K 线快速路径、截面计算与逐只分析的一致性"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.strategies import MovingAverageStrategy, align_closes
+
+
+def random_closes(length: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 10 + np.cumsum(rng.normal(0, 0.3, length))
+
+
+class TestLastBarOnly(unittest.TestCase):
+    """last_bar_only 只读取最近 max(periods) 根 K 线，结果应与完整均线序列一致"""
+
+    def setUp(self):
+        self.fast = MovingAverageStrategy({"params": {"last_bar_only": True}})
+        self.full = MovingAverageStrategy({"params": {"last_bar_only": False}})
+
+    def test_same_signals_on_every_prefix(self):
+        closes = random_closes(120, seed=1)
+        for end in range(1, len(closes) + 1):
+            data = pd.DataFrame({"close": closes[:end]})
+            self.assertEqual(self.fast.detect(data), self.full.detect(data), f"前 {end} 根 K 线")
+
+    def test_trailing_window_matches_rolling_mean(self):
+        closes = random_closes(60, seed=2)
+        data = pd.DataFrame({"close": closes})
+        expected = data["close"].rolling(20).mean().iloc[-1]
+        averages = self.fast._trailing_averages(closes[-20:])
+        self.assertAlmostEqual(averages[20], expected, places=10)
+
+    def test_not_enough_history(self):
+        data = pd.DataFrame({"close": random_closes(19, seed=3)})
+        self.assertIsNone(self.fast.analyze(data))
+        self.assertIsNone(self.full.analyze(data))
+
+    def test_threshold(self):
+        data = pd.DataFrame({"close": [10.0] * 19 + [9.9]})
+        self.assertIsNotNone(MovingAverageStrategy({"params": {"threshold": 0.0}}).analyze(data))
+        self.assertIsNone(MovingAverageStrategy({"params": {"threshold": 0.02}}).analyze(data))
+
+    def test_signals_on_every_configured_period(self):
+        strategy = MovingAverageStrategy({"params": {"periods": [60, 5, 30]}})
+        data = pd.DataFrame({"close": np.linspace(12, 8, 80)})
+        self.assertEqual(
+            [signal_id for signal_id, _ in strategy.detect(data)], ["break_ma5", "break_ma30", "break_ma60"]
+        )
+        self.assertIsNone(strategy.detect(data.iloc[:59]))
+
+    def test_signal_ids_are_stable(self):
+        strategy = MovingAverageStrategy({})
+        down = pd.DataFrame({"close": np.linspace(12, 8, 30)})
+        lower = pd.DataFrame({"close": np.linspace(12, 7, 30)})
+        ids = [signal_id for signal_id, _ in strategy.detect(down)]
+        self.assertEqual(ids, ["break_ma5", "break_ma10", "break_ma20"])
+        # 价格变化只改变消息，不改变标识
+        self.assertEqual(ids, [signal_id for signal_id, _ in strategy.detect(lower)])
+        self.assertNotEqual(strategy.analyze(down), strategy.analyze(lower))
+
+
+class TestPanelSignals(unittest.TestCase):
+    """panel_signals 对整个股票池一次性计算，结果应与逐只调用 detect 一致"""
+
+    def test_matches_per_symbol(self):
+        # 长短不一的历史，包括不足最长周期的股票
+        series = [random_closes(length, seed) for seed, length in enumerate([80, 45, 20, 19, 3, 60])]
+
+        for periods in ([5, 10, 20], [5, 30, 40]):
+            strategy = MovingAverageStrategy({"params": {"periods": periods, "threshold": 0.01}})
+            panel = strategy.panel_signals(align_closes(series))
+
+            self.assertEqual(len(panel), len(series))
+            for closes, signals in zip(series, panel):
+                self.assertEqual(signals, strategy.detect(pd.DataFrame({"close": closes})))
+
+    def test_analyze_panel_columns(self):
+        strategy = MovingAverageStrategy({})
+        closes = align_closes([np.linspace(12, 8, 30), np.linspace(8, 12, 30)])
+        mask = strategy.analyze_panel(closes)
+        self.assertEqual(mask.shape, (2, 3))
+        self.assertTrue(mask[0].all())
+        self.assertFalse(mask[1].any())
+
+    def test_rejects_one_dimensional_input(self):
+        with self.assertRaises(ValueError):
+            MovingAverageStrategy({}).panel_signals(np.arange(30.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
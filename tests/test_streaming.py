@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""流式监控测试：用 ReplayProvider 回放日内报价，检查预热、当日 K 线替换、跨日追加和快照轮询时段"""
+
+import threading
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.strategies import MovingAverageStrategy
+from src.streaming import ReplayProvider, StreamingMonitor, poll_snapshots
+
+DAY = date(2024, 1, 5)
+NEXT_DAY = date(2024, 1, 8)
+
+
+def history(length: int = 30) -> np.ndarray:
+    """上涨的日收盘价，预热后没有触发中的信号"""
+    rng = np.random.default_rng(0)
+    return np.linspace(9, 11, length) + rng.normal(0, 0.05, length)
+
+
+def intraday(day: date, prices) -> pd.DataFrame:
+    times = pd.date_range(f"{day} 09:30", periods=len(prices), freq="min")
+    return pd.DataFrame({"date": times, "close": prices})
+
+
+class TestStreamingMonitor(unittest.TestCase):
+    def setUp(self):
+        self.strategy = MovingAverageStrategy({})
+        self.alerts = []
+        self.monitor = StreamingMonitor(
+            self.strategy, lambda code, price, signals, timestamp: self.alerts.append((timestamp, signals))
+        )
+        self.closes = history()
+        self.monitor.seed("000001", self.closes, last_date=DAY)
+
+    def averages(self) -> dict:
+        return {period: rolling.value for period, rolling in self.monitor._means["000001"].items()}
+
+    def assertAveragesOf(self, closes):
+        for period, value in self.averages().items():
+            self.assertAlmostEqual(value, float(np.mean(closes[-period:])), places=10)
+
+    def test_seed_matches_history(self):
+        self.assertEqual(self.monitor._counts["000001"], len(self.closes))
+        self.assertAveragesOf(self.closes)
+        self.assertEqual(self.monitor._active["000001"], set())
+        self.assertEqual(self.alerts, [])
+
+    def test_same_day_quotes_replace_last_bar(self):
+        prices = [self.closes[-1] * factor for factor in (1.01, 0.99, 1.02)]
+        self.monitor.run(ReplayProvider({"000001": intraday(DAY, prices)}).bars())
+
+        self.assertEqual(self.monitor._counts["000001"], len(self.closes))
+        self.assertAveragesOf(np.append(self.closes[:-1], prices[-1]))
+
+    def test_new_day_appends_bar(self):
+        prices = [self.closes[-1] * factor for factor in (1.01, 0.98)]
+        self.monitor.run(ReplayProvider({"000001": intraday(NEXT_DAY, prices)}).bars())
+
+        self.assertEqual(self.monitor._counts["000001"], len(self.closes) + 1)
+        self.assertAveragesOf(np.append(self.closes, prices[-1]))
+
+    def test_signals_match_detect_and_are_deduplicated(self):
+        low = self.closes.min() * 0.9
+        prices = [low, low * 0.99, low * 0.98, self.closes.max() * 1.2, low]
+        self.monitor.run(ReplayProvider({"000001": intraday(NEXT_DAY, prices)}).bars())
+
+        # 持续触发的信号只在首次出现和重新出现时回调
+        self.assertEqual([timestamp.minute for timestamp, _ in self.alerts], [30, 34])
+        expected = self.strategy.detect(pd.DataFrame({"close": np.append(self.closes, low)}))
+        self.assertEqual(self.alerts[0][1], [message for _, message in expected])
+
+
+class OneShotEvent(threading.Event):
+    """第一次等待后即停止轮询"""
+
+    def wait(self, timeout=None):
+        self.set()
+        return True
+
+
+class SnapshotProvider:
+    def __init__(self, trade_dates):
+        self.trade_dates = trade_dates
+        self.requests = 0
+
+    def fetch_trade_dates(self):
+        return self.trade_dates
+
+    def fetch_snapshot(self):
+        self.requests += 1
+        return pd.DataFrame({"close": [10.5, 20.0]}, index=["000001", "600000"])
+
+
+class TestPollSnapshots(unittest.TestCase):
+    def poll(self, provider, now: datetime) -> list:
+        with mock.patch("src.streaming.datetime") as fake_datetime:
+            fake_datetime.now.return_value = now
+            return list(poll_snapshots(provider, ["sz000001"], stop_event=OneShotEvent()))
+
+    def test_polls_during_session(self):
+        provider = SnapshotProvider({DAY})
+        bars = self.poll(provider, datetime(2024, 1, 5, 10, 0))
+        self.assertEqual(bars, [(datetime(2024, 1, 5, 10, 0), "sz000001", 10.5)])
+
+    def test_skips_holiday_and_before_open(self):
+        provider = SnapshotProvider({DAY})
+        self.assertEqual(self.poll(provider, datetime(2024, 1, 6, 10, 0)), [])
+        self.assertEqual(self.poll(provider, datetime(2024, 1, 5, 9, 0)), [])
+        self.assertEqual(provider.requests, 0)
+
+    def test_skips_without_calendar(self):
+        provider = SnapshotProvider(None)
+        self.assertEqual(self.poll(provider, datetime(2024, 1, 5, 10, 0)), [])
+        self.assertEqual(provider.requests, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()